@@ -3,11 +3,12 @@
 import logging
 import logging.config
 import typing
-import yaml
 
-from seqlog.feature_flags import FeatureFlag, configure_feature
+from seqlog.ambient import log_context as _log_context
+from seqlog.feature_flags import FeatureFlag, configure_feature, configure_features
 from seqlog.structured_logging import StructuredLogger, StructuredRootLogger
 from seqlog.structured_logging import SeqLogHandler, ConsoleStructuredLogHandler
+from seqlog.clef import ClefStreamHandler, ClefFileHandler
 from seqlog.structured_logging import get_global_log_properties as _get_global_log_properties
 from seqlog.structured_logging import set_global_log_properties as _set_global_log_properties
 from seqlog.structured_logging import clear_global_log_properties as _clear_global_log_properties
@@ -40,10 +41,15 @@ def configure_from_file(file_name, override_root_logger=True, support_extra_prop
     :type use_clef: bool
     """
 
-    configure_feature(FeatureFlag.EXTRA_PROPERTIES, support_extra_properties)
-    configure_feature(FeatureFlag.STACK_INFO, support_stack_info)
-    configure_feature(FeatureFlag.IGNORE_SEQ_SUBMISSION_ERRORS, ignore_seq_submission_errors)
-    configure_feature(FeatureFlag.USE_CLEF, use_clef)
+    configure_features({
+        FeatureFlag.EXTRA_PROPERTIES: support_extra_properties,
+        FeatureFlag.STACK_INFO: support_stack_info,
+        FeatureFlag.IGNORE_SEQ_SUBMISSION_ERRORS: ignore_seq_submission_errors,
+        FeatureFlag.USE_CLEF: use_clef
+    })
+
+    # Imported here (rather than at module level) so that importing seqlog does not pay for loading PyYAML.
+    import yaml
 
     with open(file_name) as config_file:
         config = yaml.load(config_file, Loader=yaml.SafeLoader)
@@ -61,6 +67,9 @@ def configure_from_dict(config, override_root_logger=True, use_structured_logger
 
     Note that if you provide None to any of the default arguments, it just won't get changed (ie. it will stay the same).
 
+    The `support_stack_info`, `ignore_seq_submission_errors` and `use_clef` arguments set global defaults;
+    individual `SeqLogHandler` instances can override them using the handler options of the same names.
+
     :param config: A dict containing the configuration.
     :type config: dict
     :param override_root_logger: Override the root logger to use a Seq-specific implementation? (default: True)
@@ -77,10 +86,12 @@ def configure_from_dict(config, override_root_logger=True, use_structured_logger
     :type use_clef: bool
     """
 
-    configure_feature(FeatureFlag.EXTRA_PROPERTIES, support_extra_properties)
-    configure_feature(FeatureFlag.STACK_INFO, support_stack_info)
-    configure_feature(FeatureFlag.IGNORE_SEQ_SUBMISSION_ERRORS, ignore_seq_submission_errors)
-    configure_feature(FeatureFlag.USE_CLEF, use_clef)
+    configure_features({
+        FeatureFlag.EXTRA_PROPERTIES: support_extra_properties,
+        FeatureFlag.STACK_INFO: support_stack_info,
+        FeatureFlag.IGNORE_SEQ_SUBMISSION_ERRORS: ignore_seq_submission_errors,
+        FeatureFlag.USE_CLEF: use_clef
+    })
 
     if override_root_logger:
         _override_root_logger()
@@ -127,10 +138,8 @@ def log_to_seq(server_url, api_key=None, level=logging.WARNING,
     :rtype: SeqLogHandler
     """
 
+    # Format, stack-info and error-handling settings apply only to this handler (not to other SeqLogHandlers).
     configure_feature(FeatureFlag.EXTRA_PROPERTIES, support_extra_properties)
-    configure_feature(FeatureFlag.STACK_INFO, support_stack_info)
-    configure_feature(FeatureFlag.IGNORE_SEQ_SUBMISSION_ERRORS, ignore_seq_submission_errors)
-    configure_feature(FeatureFlag.USE_CLEF, use_clef)
 
     logging.setLoggerClass(StructuredLogger)
 
@@ -138,7 +147,12 @@ def log_to_seq(server_url, api_key=None, level=logging.WARNING,
         _override_root_logger()
 
     log_handlers = [
-        SeqLogHandler(server_url, api_key, batch_size, auto_flush_timeout, json_encoder_class)
+        SeqLogHandler(
+            server_url, api_key, batch_size, auto_flush_timeout, json_encoder_class,
+            use_clef=use_clef,
+            support_stack_info=support_stack_info,
+            ignore_seq_submission_errors=ignore_seq_submission_errors
+        )
     ]
 
     if additional_handlers:
@@ -171,8 +185,10 @@ def log_to_console(level=logging.WARNING, override_root_logger=False, support_ex
     :type support_stack_info: bool
     """
 
-    configure_feature(FeatureFlag.EXTRA_PROPERTIES, support_extra_properties)
-    configure_feature(FeatureFlag.STACK_INFO, support_stack_info)
+    configure_features({
+        FeatureFlag.EXTRA_PROPERTIES: support_extra_properties,
+        FeatureFlag.STACK_INFO: support_stack_info
+    })
 
     logging.setLoggerClass(StructuredLogger)
 
@@ -238,6 +254,27 @@ def clear_global_log_properties():
     _clear_global_log_properties()
 
 
+def context(**properties):
+    """
+    Attach properties to all log entries created within a scope.
+
+    Use as a context manager (or decorator); properties are scoped to the current thread or asyncio task,
+    and nested scopes inherit (and can override) the properties of outer scopes.
+
+    In CLEF mode, the ``trace_id`` and ``span_id`` properties are mapped to ``@tr`` and ``@sp``.
+
+    .. code-block:: python
+
+        with seqlog.context(trace_id=span.trace_id, span_id=span.span_id, RequestId=request_id):
+            logger.info("Handling request")
+
+    :param properties: Keyword arguments representing the properties.
+    :return: A context manager representing the scope.
+    """
+
+    return _log_context(**properties)
+
+
 def _override_root_logger():
     """
     Override the root logger with a `StructuredRootLogger`.
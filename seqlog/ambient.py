@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+import contextlib
+import contextvars
+
+# Ambient log properties for the current execution context (thread or asyncio task).
+#
+# The value is never modified once set (entering a new scope sets a new dictionary), so a log record can capture
+# the current ambient properties by reference.
+_ambient_log_props = contextvars.ContextVar('seqlog_ambient_log_props', default=None)
+
+
+@contextlib.contextmanager
+def log_context(**properties):
+    """
+    Attach properties to all log entries created within a scope (on the current thread or asyncio task).
+
+    Scopes can be nested; properties from inner scopes take precedence over those from outer scopes.
+
+    :param properties: Keyword arguments representing the properties (e.g. `trace_id` and `span_id`).
+    """
+
+    current_properties = _ambient_log_props.get()
+    if current_properties:
+        scope_properties = dict(current_properties, **properties)
+    else:
+        scope_properties = properties
+
+    token = _ambient_log_props.set(scope_properties)
+    try:
+        yield scope_properties
+    finally:
+        _ambient_log_props.reset(token)
+
+
+def get_ambient_log_properties():
+    """
+    Get the ambient log properties for the current execution context.
+
+    :return: The ambient log properties (which must not be modified), or None if there are none.
+    :rtype: dict
+    """
+
+    return _ambient_log_props.get()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import time
+
+from seqlog.structured_logging import _StructuredStreamHandler
+
+
+class ClefStreamHandler(_StructuredStreamHandler):
+    """
+    Log handler that writes newline-delimited CLEF events to a stream (such as stdout, or a pipe),
+    to be shipped to Seq by a log-forwarding sidecar (rather than from within the application process).
+
+    Events are written to the stream's buffer, which is only flushed once `flush_interval` has elapsed since the
+    previous flush, when a record at or above `flush_level` is written, or when the handler is flushed or closed.
+    Once the interval has elapsed, buffered events are flushed by the next log call or, if there is none, by a timer.
+    """
+
+    def __init__(self, stream=None, json_encoder_class=None, json_backend='auto', support_stack_info=None,
+                 flush_interval=1.0, flush_level=logging.ERROR):
+        """
+        Create a new `ClefStreamHandler`.
+
+        :param stream: The stream (text or binary) to write to. If not specified, `sys.stdout` is used
+                       (whichever stream it refers to when each event is written).
+        :param json_encoder_class: The custom JSON encoder class (or fully-qualified class name), if any, to use.
+        :param json_backend: The JSON encoder backend ('auto', 'orjson', 'ujson' or 'stdlib') used to serialise log entries.
+        :param support_stack_info: Attach stack-trace information (if available) to log entries?
+                                   If not specified, the global `FeatureFlag.STACK_INFO` feature flag is used.
+        :param flush_interval: The maximum time (in seconds) between flushes of the stream (0 flushes after every event).
+        :param flush_level: Flush the stream immediately after writing records at or above this level.
+        """
+
+        super().__init__(
+            stream,
+            use_clef=True,
+            json_encoder_class=json_encoder_class,
+            json_backend=json_backend,
+            support_stack_info=support_stack_info,
+            flush_interval=flush_interval,
+            flush_level=flush_level
+        )
+
+
+class ClefFileHandler(ClefStreamHandler):
+    """
+    Log handler that writes newline-delimited CLEF events to a file (to be shipped to Seq by a log-forwarding sidecar),
+    optionally rotating the file once it reaches a maximum size, or at a fixed interval.
+
+    When the file is rotated, it is renamed by appending ".1" (existing backups are renamed ".2", ".3", and so on,
+    up to `backup_count`). If `backup_count` is 0, the file is truncated instead.
+    """
+
+    def __init__(self, filename, max_bytes=0, backup_count=0, rotate_interval=None, buffer_size=64 * 1024,
+                 json_encoder_class=None, json_backend='auto', support_stack_info=None,
+                 flush_interval=1.0, flush_level=logging.ERROR):
+        """
+        Create a new `ClefFileHandler`.
+
+        :param filename: The name of the file to write to.
+        :param max_bytes: If greater than 0, rotate the file before it would exceed this size (in bytes).
+        :param backup_count: The number of rotated files to keep.
+        :param rotate_interval: If specified, rotate the file after this interval (in seconds).
+        :param buffer_size: The size (in bytes) of the file's write buffer.
+        :param json_encoder_class: The custom JSON encoder class (or fully-qualified class name), if any, to use.
+        :param json_backend: The JSON encoder backend ('auto', 'orjson', 'ujson' or 'stdlib') used to serialise log entries.
+        :param support_stack_info: Attach stack-trace information (if available) to log entries?
+                                   If not specified, the global `FeatureFlag.STACK_INFO` feature flag is used.
+        :param flush_interval: The maximum time (in seconds) between flushes of the file (0 flushes after every event).
+        :param flush_level: Flush the file immediately after writing records at or above this level.
+        """
+
+        self.filename = os.path.abspath(os.fspath(filename))
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_interval = rotate_interval
+        self.buffer_size = buffer_size
+
+        self._file_size = 0
+        self._rotate_at = None
+
+        super().__init__(
+            self._open(),
+            json_encoder_class=json_encoder_class,
+            json_backend=json_backend,
+            support_stack_info=support_stack_info,
+            flush_interval=flush_interval,
+            flush_level=flush_level
+        )
+
+    def close(self):
+        """
+        Flush and close the file.
+        """
+
+        self.acquire()
+        try:
+            try:
+                self.flush()
+            finally:
+                stream = self.stream
+                self.stream = None
+                if stream:
+                    stream.close()
+
+                logging.Handler.close(self)
+        finally:
+            self.release()
+
+    def _write_line(self, line):
+        event_size = len(line) + 1
+        if self._should_rotate(event_size):
+            self._rotate()
+
+        self.stream.write(line + b'\n')
+        self._file_size += event_size
+
+    def _should_rotate(self, event_size):
+        """
+        Determine whether the file should be rotated before writing an event.
+
+        :param event_size: The size of the event (in bytes).
+        :return: `True`, if the file should be rotated; otherwise, `False`.
+        """
+
+        if self.max_bytes > 0 and self._file_size > 0 and self._file_size + event_size > self.max_bytes:
+            return True
+
+        return self._rotate_at is not None and time.time() >= self._rotate_at
+
+    def _rotate(self):
+        """
+        Close the current file, rename it (and any existing backups), and open a new file.
+        """
+
+        self.stream.close()
+
+        if self.backup_count > 0:
+            for backup_index in range(self.backup_count - 1, 0, -1):
+                backup_filename = '{0}.{1}'.format(self.filename, backup_index)
+                if os.path.exists(backup_filename):
+                    os.replace(backup_filename, '{0}.{1}'.format(self.filename, backup_index + 1))
+
+            os.replace(self.filename, self.filename + '.1')
+            self.stream = self._open()
+        else:
+            self.stream = self._open(truncate=True)
+
+    def _open(self, truncate=False):
+        """
+        Open the file for writing (in binary mode, since events are already UTF-8 encoded).
+
+        :param truncate: Truncate the file (rather than appending to it)?
+        :return: The file object.
+        """
+
+        stream = open(self.filename, 'wb' if truncate else 'ab', buffering=self.buffer_size)
+        self._file_size = stream.tell()
+
+        if self.rotate_interval:
+            self._rotate_at = time.time() + self.rotate_interval
+
+        return stream
@@ -1,4 +1,4 @@
-from queue import Empty
+from queue import Empty, Full
 from threading import Thread, RLock, Timer
 
 
@@ -7,12 +7,17 @@ class QueueConsumer:
     Consumes log records from a queue.
     """
 
-    def __init__(self, name, queue, callback, batch_size, auto_flush_timeout=None):
+    def __init__(self, name, queue, callback, batch_size, auto_flush_timeout=None, stage=None, flush_when_idle=False):
         """
         Create a new log record consumer.
 
         The consumer will publish the current batch with it either contains `batch_size` records.
         If `auto_flush_timeout` is not specified, batches will not be published until they are full.
+        If `flush_when_idle` is `True`, the current batch is also published as soon as the queue is empty
+        (so records are published immediately, but records that arrive together are batched together).
+
+        If a `stage` is specified, each record is passed through its `process()` method before being added to the current batch.
+        The stage may hold records back; held records are collected via `expire()` while the queue is idle and `drain()` when the consumer is flushed or stopped.
 
         :param queue: A short descriptive name for the consumer (appears in thread name).
         :type queue: str
@@ -24,6 +29,9 @@ class QueueConsumer:
         :type batch_size: int
         :param auto_flush_timeout: An optional timeout (in seconds) before each batch is automatically flushed.
         :type auto_flush_timeout: float
+        :param stage: An optional pipeline stage (e.g. `DuplicateEventSuppressor`) that records pass through before being batched.
+        :param flush_when_idle: Publish the current batch whenever the queue is empty?
+        :type flush_when_idle: bool
         """
 
         # AF: There should really be a second is_stopping flag
@@ -41,14 +49,38 @@ class QueueConsumer:
         self.callback = callback
         self.batch_size = batch_size
         self.auto_flush_timeout = auto_flush_timeout
+        self.stage = stage
+        self.flush_when_idle = flush_when_idle
 
     @property
     def current_batch_size(self):
         return len(self.current_batch)
 
-    def flush(self):
+    def flush(self, drain_queue=False):
         """
-        Flush the current batch (if any).
+        Flush the current batch (if any), including any records held by the pipeline stage.
+
+        :param drain_queue: Also publish records still waiting in the queue (on the calling thread, rather than the consumer thread)?
+        :type drain_queue: bool
+        """
+
+        self.state_lock.acquire()
+        try:
+            if drain_queue and self.is_running:
+                self._drain_queue()
+
+            if self.stage and self.is_running:
+                self.current_batch.extend(self.stage.drain())
+
+            self._flush_current_batch()
+        finally:
+            self.state_lock.release()
+
+    def _flush_current_batch(self):
+        """
+        Publish the current batch (if any).
+
+        If the current batch has grown beyond `batch_size` records (e.g. because the queue was drained into it), it is published in batches of `batch_size`.
         """
 
         self.state_lock.acquire()
@@ -64,10 +96,26 @@ class QueueConsumer:
             if not current_batch:
                 return
 
-            self.callback(current_batch)
+            for batch_start in range(0, len(current_batch), self.batch_size):
+                self.callback(current_batch[batch_start:batch_start + self.batch_size])
         finally:
             self.state_lock.release()
 
+    def request_flush(self):
+        """
+        Ask the consumer to flush the current batch once it has processed the records already in the queue.
+
+        :return: `True`, if the flush was requested; `False`, if the queue is full (in which case, batches are already being published).
+        :rtype: bool
+        """
+
+        try:
+            self.queue.put(_flush_current_batch_queue, block=False)
+        except Full:
+            return False
+
+        return True
+
     def start(self):
         """
         Start the consumer.
@@ -84,6 +132,34 @@ class QueueConsumer:
         self.is_running = True
         self.consumer_thread.start()
 
+    def reset_after_fork(self, queue, stage=None):
+        """
+        Reset the consumer's state in a child process (after `fork`).
+
+        The consumer thread (and any auto-flush timer) does not exist in the child process, and records inherited
+        from the parent process (which are still published by the parent process) are discarded.
+        The consumer must be started again before it will process any records.
+
+        :param queue: The (new) log record queue to consume.
+        :type queue: Queue
+        :param stage: The (new) pipeline stage, if any.
+        :return: `True`, if the consumer was running (in the parent process) when the process was forked; otherwise, `False`.
+        :rtype: bool
+        """
+
+        was_running = self.is_running
+
+        self.is_running = False
+        self.state_lock = RLock()
+        self.consumer_thread = None
+        self.flush_timer = None
+        self.current_batch = []
+
+        self.queue = queue
+        self.stage = stage
+
+        return was_running
+
     def stop(self):
         """
         Stop the consumer.
@@ -104,16 +180,40 @@ class QueueConsumer:
             try:
                 record = self.queue.get(block=True, timeout=0.25)
             except Empty:
-                pass
+                if self.stage:
+                    self._add_all_to_current_batch(self.stage.expire())
             else:
                 try:
-                    if not _should_stop_processing(record):
-                        self._add_to_current_batch(record)
+                    if _should_stop_processing(record):
+                        self._finish_processing()
+                    elif _should_flush_current_batch(record):
+                        self.flush()
+                    elif self.stage:
+                        self._add_all_to_current_batch(self.stage.process(record))
                     else:
-                        self.is_running = False
+                        self._add_to_current_batch(record)
+
+                    if self.flush_when_idle and self.queue.empty():
+                        self._flush_current_batch()
                 finally:
                     self.queue.task_done()
 
+    def _finish_processing(self):
+        """
+        Publish the remaining records (including any held by the pipeline stage), and stop processing the queue.
+        """
+
+        self.state_lock.acquire()
+        try:
+            if self.stage:
+                self._add_all_to_current_batch(self.stage.drain())
+
+            # Nothing else will publish the current batch once the consumer has stopped.
+            self._flush_current_batch()
+            self.is_running = False
+        finally:
+            self.state_lock.release()
+
     def _add_to_current_batch(self, record):
         """
         Add a log record to the current batch.
@@ -128,10 +228,48 @@ class QueueConsumer:
             if self.current_batch_size == 1:
                 self._schedule_auto_flush()
             elif self.current_batch_size >= self.batch_size:
-                self.flush()
+                self._flush_current_batch()
         finally:
             self.state_lock.release()
 
+    def _add_all_to_current_batch(self, records):
+        """
+        Add log records to the current batch.
+
+        :param records: The LogRecords.
+        """
+
+        for record in records:
+            self._add_to_current_batch(record)
+
+    def _drain_queue(self):
+        """
+        Move the records waiting in the queue into the current batch (without waiting for more records to arrive).
+        """
+
+        while True:
+            try:
+                record = self.queue.get(block=False)
+            except Empty:
+                return
+
+            try:
+                if _should_stop_processing(record):
+                    # Leave the consumer thread to stop once the batch has been flushed.
+                    self.queue.put(record)
+
+                    return
+
+                if _should_flush_current_batch(record):
+                    continue  # The batch is about to be flushed anyway.
+
+                if self.stage:
+                    self.current_batch.extend(self.stage.process(record))
+                else:
+                    self.current_batch.append(record)
+            finally:
+                self.queue.task_done()
+
     def _notify_stop_processing(self):
         """
         Enqueue the _stop_processing dummy log record to indicate that the consumer should stop processing the queue.
@@ -153,7 +291,7 @@ class QueueConsumer:
             if self.flush_timer:
                 return
 
-            self.flush_timer = Timer(self.auto_flush_timeout, self.flush)
+            self.flush_timer = Timer(self.auto_flush_timeout, self._flush_current_batch)
             self.flush_timer.daemon = True
             self.flush_timer.start()
         finally:
@@ -190,3 +328,18 @@ def _should_stop_processing(record):
 # Pseudo-record used to abort processing of the record queue.
 # This is necessary because it enables us to unblock a consumer thread waiting for an empty queue.
 _stop_processing_queue = object()
+
+
+def _should_flush_current_batch(record):
+    """
+    Determine whether the specified log record indicates that the consumer should flush the current batch.
+
+    :param record: The LogRecord (or _flush_current_batch_queue).
+    :return: True, if record is _flush_current_batch_queue; otherwise, False.
+    """
+
+    return record is _flush_current_batch_queue
+
+
+# Pseudo-record used to request a flush of the current batch (once the records ahead of it in the queue have been processed).
+_flush_current_batch_queue = object()
@@ -0,0 +1,351 @@
+# -*- coding: utf-8 -*-
+
+import base64
+import dataclasses
+import datetime
+import decimal
+import enum
+import pathlib
+import uuid
+
+# Converters registered for specific types (applied to values of those types and their subclasses).
+_converters = {}
+
+# Converters resolved for the exact types of converted values (None, if no converter applies to the type).
+_resolved_converters = {}
+
+# Marks types whose converter has not been resolved yet.
+_unresolved = object()
+
+# The built-in converters (captured once they have been registered).
+_builtin_converters = {}
+
+# Natively-serialised types that must be converted beforehand, keyed by the JSON library's native and matching types.
+_resolved_native_types = {}
+
+# Dictionary key types that can be serialised to JSON as-is.
+_json_key_types = (str, int, float, bool, type(None))
+
+# Value types that every JSON encoder backend serialises as-is (and that contain no other values).
+_json_scalar_types = frozenset([str, int, float, bool, type(None)])
+
+
+def register_converter(value_type, converter):
+    """
+    Register a function that converts values of the specified type (and its subclasses) to a form that can be serialised as JSON.
+
+    Converters should be registered before logging starts (lookups are not synchronised with registration).
+
+    :param value_type: The type of value to convert.
+    :type value_type: type
+    :param converter: A callable that takes a value and returns its JSON-serialisable form
+                      (the values it returns are converted, in turn, if necessary).
+    """
+
+    _converters[value_type] = converter
+    _resolved_converters.clear()
+    _resolved_native_types.clear()
+
+
+def unregister_converter(value_type):
+    """
+    Remove the converter (if any) registered for the specified type.
+
+    :param value_type: The type of value.
+    :type value_type: type
+    """
+
+    _converters.pop(value_type, None)
+    _resolved_converters.clear()
+    _resolved_native_types.clear()
+
+
+def get_converter(value_type):
+    """
+    Get the converter for values of the specified type.
+
+    The converter registered for the type itself takes precedence over those registered for its base classes.
+    Dataclasses without a registered converter are converted to a dict of their public fields.
+
+    :param value_type: The type of value.
+    :type value_type: type
+    :return: The converter, or None if no converter applies to the type.
+    """
+
+    converter = _resolved_converters.get(value_type, _unresolved)
+    if converter is _unresolved:
+        converter = _resolve_converter(value_type)
+        _resolved_converters[value_type] = converter
+
+    return converter
+
+
+def convert_value(value):
+    """
+    Convert a value using the converter (if any) for its type.
+
+    :param value: The value to convert.
+    :return: The converted value (or the original value, if no converter applies to its type).
+    """
+
+    converter = get_converter(type(value))
+    if converter is None:
+        return value
+
+    return converter(value)
+
+
+def create_json_default(fallback=None):
+    """
+    Create a `default` function for a JSON encoder (called for values that the encoder cannot serialise itself).
+
+    Values are converted using the converter for their type; values without a converter are passed to `fallback`
+    (if specified) and, if it cannot convert them either, converted to a string.
+
+    :param fallback: An optional callable (such as the `default` method of a custom `JSONEncoder`) that converts a value,
+                     or raises `TypeError` if it cannot.
+    :return: The `default` function.
+    """
+
+    def default(value):
+        converter = get_converter(type(value))
+        if converter is not None:
+            return converter(value)
+
+        if fallback is not None:
+            try:
+                return fallback(value)
+            except TypeError:
+                pass
+
+        return _convert_to_string(value)
+
+    return default
+
+
+def stringify_keys(data):
+    """
+    Convert dictionary keys that cannot be serialised to JSON (such as tuples) to strings, in the specified data and any data that it contains.
+
+    :param data: The data.
+    :return: A copy of the data (with the keys converted).
+    """
+
+    if isinstance(data, dict):
+        return {_convert_key(key): stringify_keys(value) for key, value in data.items()}
+
+    if isinstance(data, (list, tuple)):
+        return [stringify_keys(value) for value in data]
+
+    return data
+
+
+def overrides_native_types(native_types, matching_types=()):
+    """
+    Determine whether the registered converters convert values of any of the specified types (that a JSON library serialises itself,
+    without calling its `default` function) differently than that library does.
+
+    The library serialises the matching types exactly as the built-in converters do, so they are only converted differently
+    if a converter that applies to them (or their subclasses) has been registered in place of the built-in ones.
+
+    :param native_types: The types that the JSON library serialises itself.
+    :type native_types: tuple
+    :param matching_types: The types (of those) that the JSON library serialises exactly as the built-in converters do.
+    :type matching_types: tuple
+    :return: `True`, if data containing values of those types must be converted before it is passed to the library; otherwise, `False`.
+    :rtype: bool
+    """
+
+    cache_key = (native_types, matching_types)
+    overridden = _resolved_native_types.get(cache_key)
+    if overridden is None:
+        customised_types = [
+            value_type for value_type in set(_converters).union(_builtin_converters)
+            if _converters.get(value_type) is not _builtin_converters.get(value_type)
+        ]
+        overridden = any(
+            native_type not in matching_types or any(
+                issubclass(customised_type, native_type) or issubclass(native_type, customised_type)
+                for customised_type in customised_types
+            )
+            for native_type in native_types
+        )
+        _resolved_native_types[cache_key] = overridden
+
+    return overridden
+
+
+def requires_conversion(data):
+    """
+    Determine whether the specified data (or any data that it contains) includes values other than strings, numbers, booleans, None, lists and dicts,
+    or dictionary keys that are not strings, numbers, booleans or None.
+
+    This is considerably cheaper than converting the data (nothing is copied), so JSON encoder backends can skip
+    conversion for the majority of log events, which contain nothing to convert.
+
+    :param data: The data.
+    :return: `True`, if the data must be converted (see `convert_data`); otherwise, `False`.
+    :rtype: bool
+    """
+
+    return _contains_values_to_convert((data, ))
+
+
+def convert_data(data, default):
+    """
+    Convert values and dictionary keys that cannot be serialised to JSON, in the specified data and any data that it contains.
+
+    JSON libraries such as `orjson` and `ujson` serialise some types (such as `UUID` or `Decimal`) themselves,
+    without consulting their `default` function, so data that may contain values of those types (see `requires_conversion`)
+    is converted before it is passed to them in order that the registered converters apply to every value, regardless of the JSON encoder backend in use.
+
+    :param data: The data.
+    :param default: A callable (see `create_json_default`) that converts a value of any other type to a form that can be serialised as JSON.
+    :return: The converted data (or the original data, if it contains nothing to convert).
+    """
+
+    if type(data) in _json_scalar_types:
+        return data
+
+    if isinstance(data, dict):
+        return {_convert_key(key): convert_data(value, default) for key, value in data.items()}
+
+    if isinstance(data, (list, tuple)):
+        return [convert_data(value, default) for value in data]
+
+    # Subclasses of str and int (such as str- or int-based enums) are serialised as their base type (as they are by the json module).
+    if isinstance(data, (str, int)):
+        return data
+
+    if isinstance(data, float):
+        return float(data)
+
+    return convert_data(default(data), default)
+
+
+def _resolve_converter(value_type):
+    """
+    Find the converter that applies to values of the specified type.
+    """
+
+    for base_type in value_type.__mro__:
+        converter = _converters.get(base_type)
+        if converter is not None:
+            return converter
+
+    if dataclasses.is_dataclass(value_type):
+        return _convert_dataclass
+
+    return None
+
+
+def _contains_values_to_convert(values):
+    """
+    Determine whether any of the specified values (or the values they contain) must be converted (see `requires_conversion`).
+    """
+
+    for value in values:
+        value_type = type(value)
+        if value_type in _json_scalar_types:
+            continue
+
+        if value_type is dict:
+            for key in value:
+                if type(key) not in _json_scalar_types:
+                    return True
+
+            if _contains_values_to_convert(value.values()):
+                return True
+        elif value_type is list or value_type is tuple:
+            if _contains_values_to_convert(value):
+                return True
+        else:
+            # Values converted by default() may, in turn, contain values that the JSON library would serialise itself.
+            return True
+
+    return False
+
+
+def _convert_key(key):
+    """
+    Convert a dictionary key to a form that can be serialised as JSON.
+    """
+
+    if isinstance(key, _json_key_types):
+        return key
+
+    converted_key = convert_value(key)
+    if isinstance(converted_key, _json_key_types):
+        return converted_key
+
+    return _convert_to_string(key)
+
+
+def _convert_to_string(value):
+    """
+    Convert a value (that cannot otherwise be serialised) to a string.
+    """
+
+    try:
+        return str(value)
+    except ReferenceError:
+        return '<gone weak reference>'
+    except TypeError:
+        try:
+            return repr(value)
+        except TypeError:
+            return '<type %s>' % (type(value), )
+
+
+def _convert_bytes(value):
+    """
+    Convert bytes to a UTF8 string (using Base64 encoding if the bytes do not represent valid UTF8).
+    """
+
+    try:
+        return value.decode('utf8')
+    except UnicodeDecodeError:
+        return base64.encodebytes(value).decode('ascii')
+
+
+def _convert_isoformat(value):
+    """
+    Convert a date, time or datetime to an ISO 8601 string.
+    """
+
+    return value.isoformat()
+
+
+def _convert_dataclass(value):
+    """
+    Convert a dataclass instance to a dict of its public fields (the field values are converted, in turn, if necessary).
+    """
+
+    return {field.name: getattr(value, field.name) for field in dataclasses.fields(value) if not field.name.startswith('_')}
+
+
+def _convert_set(value):
+    """
+    Convert a set to a list (in sorted order, where possible, so the output is stable).
+    """
+
+    try:
+        return sorted(value)
+    except TypeError:
+        return list(value)
+
+
+# Built-in converters for common types (matching the way that orjson, where installed, serialises those types itself).
+register_converter(bytes, _convert_bytes)
+register_converter(bytearray, _convert_bytes)
+register_converter(uuid.UUID, str)
+register_converter(datetime.date, _convert_isoformat)  # Also applies to datetime.datetime.
+register_converter(datetime.time, _convert_isoformat)
+register_converter(datetime.timedelta, str)
+register_converter(decimal.Decimal, str)  # Preserves precision (rather than converting to float).
+register_converter(enum.Enum, lambda value: value.value)
+register_converter(pathlib.PurePath, str)
+register_converter(set, _convert_set)
+register_converter(frozenset, _convert_set)
+
+_builtin_converters.update(_converters)
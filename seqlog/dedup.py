@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import time
+from datetime import datetime
+from threading import Lock
+
+
+class DuplicateEventSuppressor:
+    """
+    Pipeline stage that collapses identical log records within a time window into a single record.
+
+    The first record for each distinct event (same logger, level, message template and properties) is held for the
+    duration of the window; identical records that arrive during that window are counted and discarded.
+    When the window closes, the held record is released. If duplicates were suppressed, a copy of it is released instead,
+    carrying the properties `RepeatCount`, `FirstTimestamp` and `LastTimestamp`.
+
+    Records carrying exception information are never held.
+    """
+
+    def __init__(self, window=5.0, max_held_events=10000):
+        """
+        Create a new `DuplicateEventSuppressor`.
+
+        :param window: The time window (in seconds) within which identical records are collapsed.
+        :type window: float
+        :param max_held_events: The maximum number of distinct events to hold at once (once reached, new events pass through).
+        :type max_held_events: int
+        """
+
+        if window <= 0:
+            raise ValueError("Window must be greater than 0.")
+
+        self.window = float(window)
+        self.max_held_events = max_held_events
+
+        self._lock = Lock()
+        self._held_events = {}  # Insertion-ordered, so the oldest window is always first.
+
+    def process(self, record):
+        """
+        Process a log record.
+
+        :param record: The LogRecord.
+        :return: The records (if any) that are ready to be published.
+        :rtype: list
+        """
+
+        now = time.monotonic()
+
+        if record.exc_info or record.exc_text:
+            return [record, *self.expire(now)]
+
+        event_key = _get_event_key(record)
+
+        with self._lock:
+            held_event = self._held_events.get(event_key)
+            if held_event:
+                held_event.add_duplicate(record)
+
+                return self._expire(now)
+
+            if len(self._held_events) >= self.max_held_events:
+                return [record, *self._expire(now)]
+
+            self._held_events[event_key] = _HeldEvent(record, now + self.window)
+
+            return self._expire(now)
+
+    def expire(self, now=None):
+        """
+        Release held records whose window has closed.
+
+        :param now: The current (monotonic) time, in seconds.
+        :type now: float
+        :return: The released records.
+        :rtype: list
+        """
+
+        with self._lock:
+            return self._expire(time.monotonic() if now is None else now)
+
+    def drain(self):
+        """
+        Release all held records.
+
+        :return: The released records.
+        :rtype: list
+        """
+
+        with self._lock:
+            released = [held_event.release() for held_event in self._held_events.values()]
+            self._held_events.clear()
+
+        return released
+
+    def _expire(self, now):
+        """
+        Release held records whose window has closed (the caller must hold the lock).
+
+        :param now: The current (monotonic) time, in seconds.
+        :return: The released records.
+        """
+
+        released = []
+        while self._held_events:
+            event_key, held_event = next(iter(self._held_events.items()))
+            if held_event.deadline > now:
+                break
+
+            del self._held_events[event_key]
+            released.append(held_event.release())
+
+        return released
+
+
+class _HeldEvent:
+    """
+    A log record held by the `DuplicateEventSuppressor`, together with its duplicate count.
+    """
+
+    __slots__ = ("record", "deadline", "repeat_count", "last_created")
+
+    def __init__(self, record, deadline):
+        self.record = record
+        self.deadline = deadline
+        self.repeat_count = 1
+        self.last_created = record.created
+
+    def add_duplicate(self, record):
+        self.repeat_count += 1
+        self.last_created = record.created
+
+    def release(self):
+        """
+        Return the held record (or, if there were duplicates, a copy of it with the rollup properties attached).
+        """
+
+        record = self.record
+        if self.repeat_count > 1:
+            # The record may also have been passed to other handlers, so the rollup properties must not be added to it.
+            record = copy.copy(record)
+            record.log_props = dict(
+                getattr(record, "log_props", None) or {},
+                RepeatCount=self.repeat_count,
+                FirstTimestamp=_format_timestamp(record.created),
+                LastTimestamp=_format_timestamp(self.last_created)
+            )
+
+        return record
+
+
+def _get_event_key(record):
+    """
+    Get a key that identifies records representing the same event.
+
+    :param record: The LogRecord.
+    :return: A hashable key.
+    """
+
+    log_props = getattr(record, "log_props", None) or {}
+    ambient_props = getattr(record, "ambient_props", None) or {}
+
+    return (
+        record.name,
+        record.levelno,
+        str(record.msg),
+        repr(record.args),
+        tuple(sorted((name, repr(value)) for name, value in log_props.items())),
+        tuple(sorted((name, repr(value)) for name, value in ambient_props.items()))
+    )
+
+
+def _format_timestamp(created):
+    """
+    Format a record creation time as an ISO-formatted local date / time string.
+
+    :param created: The record creation time (seconds since the epoch).
+    :return: The ISO-formatted date / time string.
+    """
+
+    return datetime.fromtimestamp(created).astimezone().isoformat()
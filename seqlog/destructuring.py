@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+import functools
+import re
+import types
+
+from seqlog.converters import _convert_to_string, get_converter
+
+#: The capture hint (a prefix for a message template hole, as in "{@order}") that destructures the property value.
+DESTRUCTURE = '@'
+
+#: The capture hint (a prefix for a message template hole, as in "{$user}") that stringifies the property value.
+STRINGIFY = '$'
+
+#: The (default) maximum depth of nested objects, dicts and lists captured when destructuring a value.
+DEFAULT_MAX_DESTRUCTURING_DEPTH = 10
+
+# Matches a (possibly escaped) hole with a capture hint, such as "{@order}" (the number of braces determines whether it is escaped).
+_capture_hint_pattern = re.compile(r'(\{+)([@$])([^{}:!.\[\]]+)')
+
+# Values of these types are captured as-is.
+_scalar_types = {str, int, float, bool, type(None)}
+
+# Objects of these types are stringified, rather than destructured.
+_stringified_types = (type, types.FunctionType, types.BuiltinFunctionType, types.MethodType, types.ModuleType)
+
+# Cached attribute plans, keyed by type (see `_get_attribute_plan`).
+_attribute_plans = {}
+
+
+def get_capture_hints(message_template):
+    """
+    Get the capture hints for the holes in a message template.
+
+    :param message_template: The message template.
+    :type message_template: str
+    :return: A sequence of (property name, capture hint) tuples.
+    :rtype: tuple
+    """
+
+    return _parse_message_template(message_template)[1]
+
+
+def strip_capture_hints(message_template):
+    """
+    Remove capture hints from a message template, so that it can be formatted using `str.format` (for example, "{@order}" becomes "{order}").
+
+    :param message_template: The message template.
+    :type message_template: str
+    :return: The message template without capture hints.
+    :rtype: str
+    """
+
+    return _parse_message_template(message_template)[0]
+
+
+def capture_value(value, capture_hint, max_depth=DEFAULT_MAX_DESTRUCTURING_DEPTH):
+    """
+    Capture a property value, as directed by a capture hint.
+
+    :param value: The property value.
+    :param capture_hint: The capture hint (`DESTRUCTURE` or `STRINGIFY`).
+    :param max_depth: The maximum depth of nested values to capture when destructuring.
+    :type max_depth: int
+    :return: The captured value.
+    """
+
+    if capture_hint == STRINGIFY:
+        return value if type(value) is str else _convert_to_string(value)
+
+    return destructure(value, max_depth)
+
+
+def destructure(value, max_depth=DEFAULT_MAX_DESTRUCTURING_DEPTH):
+    """
+    Destructure a value into dicts, lists and scalar values (that can be serialised as JSON).
+
+    Objects (attrs classes, named tuples, classes with `__slots__` and ordinary classes) are captured as a dict of their public
+    attributes; values of types with a converter (see `seqlog.converters`), including dataclasses, are converted instead.
+    Objects, dicts and lists nested deeper than `max_depth` are replaced with a placeholder ("{...}" or "[...]").
+
+    :param value: The value to destructure.
+    :param max_depth: The maximum depth of nested values to capture (the value itself is at depth 1).
+    :type max_depth: int
+    :return: The destructured value.
+    """
+
+    return _destructure(value, max_depth)
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_message_template(message_template):
+    """
+    Parse the capture hints in a message template (the results are cached, since most message templates are constants).
+
+    :return: The message template without capture hints, and a sequence of (property name, capture hint) tuples.
+    :rtype: tuple
+    """
+
+    if '{@' not in message_template and '{$' not in message_template:
+        return message_template, ()
+
+    capture_hints = []
+
+    def strip_capture_hint(match):
+        braces, capture_hint, name = match.groups()
+        if len(braces) % 2 == 0:
+            return match.group(0)  # Escaped (i.e. literal) braces.
+
+        capture_hints.append((name.strip(), capture_hint))
+
+        return braces + name
+
+    return _capture_hint_pattern.sub(strip_capture_hint, message_template), tuple(capture_hints)
+
+
+def _destructure(value, remaining_depth):
+    """
+    Destructure a value (see `destructure`).
+
+    :param remaining_depth: The remaining number of levels of nested values to capture.
+    """
+
+    if type(value) in _scalar_types:
+        return value
+
+    converter = get_converter(type(value))
+    if converter is not None:
+        value = converter(value)
+        if type(value) in _scalar_types:
+            return value
+
+    if isinstance(value, dict):
+        if remaining_depth <= 0:
+            return '{...}'
+
+        return {key: _destructure(item, remaining_depth - 1) for key, item in value.items()}
+
+    if isinstance(value, (list, tuple, set, frozenset)) and not hasattr(value, '_fields'):
+        if remaining_depth <= 0:
+            return '[...]'
+
+        return [_destructure(item, remaining_depth - 1) for item in value]
+
+    attribute_names, include_instance_attributes = _get_attribute_plan(type(value))
+    if attribute_names is None:
+        return _convert_to_string(value)
+
+    if remaining_depth <= 0:
+        return '{...}'
+
+    members = {}
+    for name in attribute_names:
+        try:
+            members[name] = _destructure(getattr(value, name), remaining_depth - 1)
+        except AttributeError:
+            pass  # An unset slot.
+
+    if include_instance_attributes:
+        for name, attribute_value in vars(value).items():
+            if not name.startswith('_'):
+                members[name] = _destructure(attribute_value, remaining_depth - 1)
+
+    return members
+
+
+def _get_attribute_plan(value_type):
+    """
+    Get the plan for destructuring objects of the specified type (cached, so each class is only examined once).
+
+    :return: The names of the (public) attributes to capture (or None, if objects of the type cannot be destructured),
+             and whether to also capture the object's instance attributes (from its `__dict__`).
+    :rtype: tuple
+    """
+
+    attribute_plan = _attribute_plans.get(value_type)
+    if attribute_plan is None:
+        attribute_plan = _attribute_plans[value_type] = _create_attribute_plan(value_type)
+
+    return attribute_plan
+
+
+def _create_attribute_plan(value_type):
+    """
+    Create the plan for destructuring objects of the specified type.
+    """
+
+    attrs_attributes = getattr(value_type, '__attrs_attrs__', None)
+    if attrs_attributes is not None:
+        return _public_names(attribute.name for attribute in attrs_attributes), False
+
+    named_tuple_fields = getattr(value_type, '_fields', None)
+    if issubclass(value_type, tuple) and named_tuple_fields is not None:
+        return _public_names(named_tuple_fields), False
+
+    if issubclass(value_type, _stringified_types):
+        return None, False
+
+    slot_names = []
+    for base_type in value_type.__mro__:
+        slots = base_type.__dict__.get('__slots__', ())
+        slot_names.extend((slots,) if isinstance(slots, str) else slots)
+
+    slot_names = _public_names(name for name in slot_names if name not in ('__dict__', '__weakref__'))
+    include_instance_attributes = value_type.__dictoffset__ != 0  # Do instances have a __dict__?
+    if not slot_names and not include_instance_attributes:
+        return None, False
+
+    return slot_names, include_instance_attributes
+
+
+def _public_names(names):
+    """
+    Get the public names (those that do not start with an underscore) from a sequence of names.
+
+    :rtype: tuple
+    """
+
+    return tuple(name for name in names if not name.startswith('_'))
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+
+import zlib
+
+# Default chunk size (in bytes) when streaming request bodies.
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Buffers larger than this (in bytes) are discarded, rather than retained for reuse, once a batch has been published.
+DEFAULT_RETAINED_CAPACITY = 1024 * 1024
+
+# Supported request body compression methods (and the corresponding zlib window-bits values).
+_compression_wbits = {
+    'gzip': 16 + zlib.MAX_WBITS
+}
+
+
+class RequestBodyWriter:
+    """
+    Writes a batch of JSON-encoded events directly into a reusable byte buffer, in either the CLEF format
+    (newline-delimited) or the api/events/raw format (`{"Events": [...]}`), optionally compressing it as it is written.
+
+    A writer is not thread-safe; it must only be used to build one request body at a time.
+    """
+
+    def __init__(self, compression=None, retained_capacity=DEFAULT_RETAINED_CAPACITY):
+        """
+        Create a new `RequestBodyWriter`.
+
+        :param compression: The compression method (if any) to apply to the request body ('gzip').
+        :type compression: str
+        :param retained_capacity: The maximum buffer size (in bytes) to retain for reuse between batches.
+        :type retained_capacity: int
+        """
+
+        if compression and compression not in _compression_wbits:
+            raise ValueError("Unsupported compression method: '{}'.".format(compression))
+
+        self.compression = compression
+        self.retained_capacity = retained_capacity
+
+        self.event_count = 0
+        self.bytes_written = 0
+
+        self._buffer = bytearray()
+        self._length = 0
+        self._use_clef = False
+        self._compressor = None
+
+    @property
+    def content_encoding(self):
+        """
+        The value for the request's Content-Encoding header (or None, if the body is not compressed).
+        """
+
+        return self.compression
+
+    @property
+    def pending_bytes(self):
+        """
+        The number of bytes written to the buffer, but not yet taken.
+        """
+
+        return self._length
+
+    def begin(self, use_clef):
+        """
+        Begin writing a new request body.
+
+        :param use_clef: Write the body in the CLEF format (rather than the api/events/raw format)?
+        :type use_clef: bool
+        """
+
+        if len(self._buffer) > self.retained_capacity:
+            self._buffer = bytearray()
+
+        self._length = 0
+        self._use_clef = use_clef
+        self.event_count = 0
+        self.bytes_written = 0
+
+        self._compressor = None
+        if self.compression:
+            self._compressor = zlib.compressobj(wbits=_compression_wbits[self.compression])
+
+        if not use_clef:
+            self._write(b'{"Events": [')
+
+    def write_event(self, event_json):
+        """
+        Write a JSON-encoded event.
+
+        :param event_json: The JSON representing the event (either UTF-8 encoded bytes, or a string).
+        :type event_json: bytes
+        """
+
+        if isinstance(event_json, str):
+            event_json = event_json.encode('utf-8')
+
+        if self.event_count:
+            self._write(b'\r\n' if self._use_clef else b',')
+
+        self._write(event_json)
+        self.event_count += 1
+
+    def write_encoded_events(self, events_data):
+        """
+        Write a block of events that are already encoded and delimited (such as newline-delimited CLEF read from a file).
+
+        The block is written as-is (it is not counted in `event_count`).
+
+        :param events_data: The encoded events (any bytes-like object).
+        """
+
+        self._write(events_data)
+
+    def finish(self):
+        """
+        Finish writing the request body (writing any closing delimiters and flushing the compressor).
+        """
+
+        if not self._use_clef:
+            self._write(b']}')
+
+        if self._compressor:
+            self._append(self._compressor.flush())
+            self._compressor = None
+
+    def take(self):
+        """
+        Take the bytes written to the buffer so far (the buffer is then reused for subsequent writes).
+
+        :return: The pending bytes.
+        :rtype: bytearray
+        """
+
+        pending = self._buffer[:self._length]
+        self._length = 0
+
+        return pending
+
+    def body(self):
+        """
+        Get a file-like request body that reads the pending bytes directly from the buffer.
+
+        The body is only valid until the writer is next used.
+
+        :return: The request body.
+        :rtype: BufferedRequestBody
+        """
+
+        return BufferedRequestBody(self._buffer, self._length)
+
+    def _write(self, data):
+        if self._compressor:
+            data = self._compressor.compress(data)
+
+        self._append(data)
+
+    def _append(self, data):
+        data_length = len(data)
+        if not data_length:
+            return
+
+        # Overwrites (and reuses) any previously-allocated capacity before growing the buffer.
+        self._buffer[self._length:self._length + data_length] = data
+        self._length += data_length
+        self.bytes_written += data_length
+
+
+class BufferedRequestBody:
+    """
+    A read-only, file-like view over the pending bytes in a `RequestBodyWriter`'s buffer.
+
+    Passing this (rather than `bytes`) as a request body lets the HTTP client send the body in blocks,
+    without first copying the whole buffer.
+    """
+
+    def __init__(self, buffer, length):
+        self._buffer = buffer
+        self._length = length
+        self._position = 0
+
+    def __len__(self):
+        return self._length - self._position
+
+    def __iter__(self):
+        while True:
+            block = self.read(8192)
+            if not block:
+                return
+
+            yield block
+
+    def read(self, size=-1):
+        """
+        Read up to `size` bytes (or all remaining bytes, if `size` is negative).
+
+        :param size: The maximum number of bytes to read.
+        :return: The bytes read.
+        :rtype: bytearray
+        """
+
+        end = self._length if size is None or size < 0 else min(self._length, self._position + size)
+        block = self._buffer[self._position:end]
+        self._position = end
+
+        return block
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import typing as tp
 from enum import Enum
+from threading import Lock
 
 
 class FeatureFlag(Enum):
@@ -17,13 +18,45 @@ class FeatureFlag(Enum):
     USE_CLEF = 4    #: Use more modern API to submit log entries
 
 
-_features = {
-    FeatureFlag.EXTRA_PROPERTIES: False,
-    FeatureFlag.STACK_INFO: False,
-    FeatureFlag.IGNORE_SEQ_SUBMISSION_ERRORS: False,
-    FeatureFlag.USE_CLEF: False
+class FeatureSnapshot(tp.NamedTuple):
+    """
+    An immutable snapshot of the state of all feature flags.
+
+    Changing a feature flag replaces the current snapshot (rather than modifying it), so a reader that captures
+    the snapshot once sees a consistent set of values, and never a partially-applied configuration.
+    """
+
+    extra_properties: bool = False
+    stack_info: bool = False
+    ignore_seq_submission_errors: bool = False
+    use_clef: bool = False
+
+
+# The FeatureSnapshot field corresponding to each feature flag.
+_snapshot_fields = {
+    FeatureFlag.EXTRA_PROPERTIES: 'extra_properties',
+    FeatureFlag.STACK_INFO: 'stack_info',
+    FeatureFlag.IGNORE_SEQ_SUBMISSION_ERRORS: 'ignore_seq_submission_errors',
+    FeatureFlag.USE_CLEF: 'use_clef'
 }
 
+# The current feature snapshot (only ever replaced, never modified).
+_snapshot = FeatureSnapshot()
+
+# Serialises updates to the current feature snapshot.
+_snapshot_update_lock = Lock()
+
+
+def get_feature_snapshot():
+    """
+    Get an immutable snapshot of the current state of all feature flags.
+
+    :return: The current feature snapshot.
+    :rtype: FeatureSnapshot
+    """
+
+    return _snapshot
+
 
 def is_feature_enabled(feature: FeatureFlag):
     """
@@ -35,7 +68,11 @@ def is_feature_enabled(feature: FeatureFlag):
     :rtype: bool
     """
 
-    return _features.get(feature, False)
+    field_name = _snapshot_fields.get(feature)
+    if not field_name:
+        return False
+
+    return getattr(_snapshot, field_name)
 
 
 def enable_feature(feature: FeatureFlag):
@@ -68,6 +105,29 @@ def configure_feature(feature: FeatureFlag, enable: tp.Optional[bool]):
     :type feature: FeatureFlag
     :param enable: `True`, to enable the feature; `False` to disable it.
     """
-    if enable is None:
+
+    configure_features({feature: enable})
+
+
+def configure_features(features: tp.Dict[FeatureFlag, tp.Optional[bool]]):
+    """
+    Enable or disable several features at once.
+
+    All changes are applied atomically (readers see either none or all of them).
+
+    :param features: A dictionary mapping `FeatureFlag` values to `True` (enable), `False` (disable), or None (leave unchanged).
+    :type features: dict
+    """
+
+    global _snapshot
+
+    changes = {
+        _snapshot_fields[feature]: bool(enable)
+        for feature, enable in features.items()
+        if enable is not None
+    }
+    if not changes:
         return
-    _features[feature] = enable
+
+    with _snapshot_update_lock:
+        _snapshot = _snapshot._replace(**changes)
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import decimal
+import enum
+import importlib.util
+import json
+import uuid
+
+from seqlog.converters import convert_data, create_json_default, overrides_native_types, requires_conversion, stringify_keys
+
+
+class JsonBackend:
+    """
+    The base class for JSON encoder backends (used to serialise log events).
+
+    A backend encodes JSON-compatible data (dicts, lists, strings, numbers, booleans and None) directly to UTF-8 bytes.
+    Unless the backend was created with `convert_values=True`, data that cannot be serialised raises a `TypeError` (or a subclass of it).
+
+    With `convert_values=True`, values of other types are converted using the converters registered in `seqlog.converters`
+    (and, if no converter applies, the custom encoder class, if any, or else `str`), and dictionary keys that cannot be serialised
+    are converted to strings. Backends whose JSON library serialises some of those types itself convert data containing them beforehand
+    (unless the library serialises them exactly as the built-in converters do), so the registered converters take precedence regardless of the backend.
+    """
+
+    name = None  #: The backend name.
+
+    def dumps(self, data):
+        """
+        Serialise data as JSON.
+
+        :param data: The data to serialise.
+        :return: The UTF-8 encoded JSON.
+        :rtype: bytes
+        """
+
+        raise NotImplementedError()
+
+
+class StdlibJsonBackend(JsonBackend):
+    """
+    JSON encoder backend that uses the standard library's `json` module (and, optionally, a custom `JSONEncoder` subclass).
+    """
+
+    name = 'stdlib'
+
+    def __init__(self, json_encoder_class=None, convert_values=False):
+        """
+        Create a new `StdlibJsonBackend`.
+
+        :param json_encoder_class: The `JSONEncoder` class (if any) to use. If not specified, the default `JSONEncoder` is used.
+        :type json_encoder_class: type
+        :param convert_values: Convert values that cannot otherwise be serialised (rather than raising `TypeError`)?
+        :type convert_values: bool
+        """
+
+        self.json_encoder_class = json_encoder_class or json.JSONEncoder
+        self.convert_values = convert_values
+
+        # Encoders are stateless (once constructed), so a single instance can be shared between calls and threads.
+        self._encoder = self.json_encoder_class()
+        if convert_values:
+            # Registered converters take precedence over the custom encoder class (which is only consulted for other types).
+            fallback = self._encoder.default if self.json_encoder_class.default is not json.JSONEncoder.default else None
+            self._encoder.default = create_json_default(fallback)
+
+    def dumps(self, data):
+        try:
+            return self._encoder.encode(data).encode('utf-8')
+        except TypeError:
+            if not self.convert_values:
+                raise
+
+            # Dictionary keys (unlike values) are never passed to the encoder's default() method.
+            return self._encoder.encode(stringify_keys(data)).encode('utf-8')
+
+
+class OrjsonBackend(JsonBackend):
+    """
+    JSON encoder backend that uses `orjson` (which serialises directly to bytes).
+
+    Data that `orjson` cannot serialise (such as integers larger than 64 bits) is serialised using the standard library.
+    """
+
+    name = 'orjson'
+
+    # Types that orjson serialises itself (as values or dictionary keys), even when datetimes and dataclasses are passed through to default.
+    _native_types = (uuid.UUID, enum.Enum, datetime.date, datetime.time)
+
+    def __init__(self, convert_values=False):
+        """
+        Create a new `OrjsonBackend`.
+
+        :param convert_values: Convert values that cannot otherwise be serialised (rather than raising `TypeError`)?
+        :type convert_values: bool
+        """
+
+        import orjson
+
+        self._dumps = orjson.dumps
+        self._options = orjson.OPT_NON_STR_KEYS
+        self._default = None
+        if convert_values:
+            # Datetimes and dataclasses are passed to default (and so to the registered converters), rather than serialised by orjson.
+            self._options |= orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+            self._default = create_json_default()
+
+        self._fallback = StdlibJsonBackend(convert_values=convert_values)
+
+    def dumps(self, data):
+        if self._default is not None:
+            # orjson serialises UUIDs, enums and dates exactly as the built-in converters do, so data only needs converting if they have been replaced.
+            if overrides_native_types(self._native_types, self._native_types) and requires_conversion(data):
+                data = convert_data(data, self._default)
+
+        try:
+            return self._dumps(data, default=self._default, option=self._options)
+        except TypeError:
+            return self._fallback.dumps(data)
+
+
+class UjsonBackend(JsonBackend):
+    """
+    JSON encoder backend that uses `ujson`.
+
+    Data that `ujson` cannot serialise is serialised using the standard library.
+    """
+
+    name = 'ujson'
+
+    # Types that ujson serialises itself (Decimals are serialised as numbers, rather than strings as the built-in converter does).
+    _native_types = (decimal.Decimal, )
+
+    def __init__(self, convert_values=False):
+        """
+        Create a new `UjsonBackend`.
+
+        :param convert_values: Convert values that cannot otherwise be serialised (rather than raising `TypeError`)?
+        :type convert_values: bool
+        """
+
+        import ujson
+
+        self._dumps = ujson.dumps
+        self._options = {'ensure_ascii': False, 'reject_bytes': True}
+        self._default = None
+        if convert_values:
+            self._options['default'] = self._default = create_json_default()
+
+        self._fallback = StdlibJsonBackend(convert_values=convert_values)
+
+    def dumps(self, data):
+        if self._default is not None:
+            # ujson also converts dictionary keys using str() (rather than the registered converters), so data containing them needs converting too.
+            if overrides_native_types(self._native_types) and requires_conversion(data):
+                data = convert_data(data, self._default)
+
+        try:
+            return self._dumps(data, **self._options).encode('utf-8')
+        except (TypeError, OverflowError):
+            return self._fallback.dumps(data)
+
+
+# Well-known JSON encoder backends, in order of preference (when selected automatically).
+_backends_by_name = {
+    'orjson': OrjsonBackend,
+    'ujson': UjsonBackend,
+    'stdlib': StdlibJsonBackend
+}
+
+
+def is_json_backend_available(name):
+    """
+    Determine whether a JSON encoder backend is available (i.e. whether the library it uses is installed).
+
+    :param name: The backend name ('orjson', 'ujson' or 'stdlib').
+    :type name: str
+    :return: `True`, if the backend is available; otherwise, `False`.
+    :rtype: bool
+    """
+
+    if name not in _backends_by_name:
+        return False
+
+    return name == 'stdlib' or importlib.util.find_spec(name) is not None
+
+
+def create_json_backend(name='auto', json_encoder_class=None, convert_values=False):
+    """
+    Create a JSON encoder backend.
+
+    :param name: The backend name ('orjson', 'ujson' or 'stdlib'), or 'auto' to use the fastest available backend.
+    :type name: str
+    :param json_encoder_class: The custom `JSONEncoder` class (if any) to use.
+                               Custom encoder classes are only supported by the 'stdlib' backend (which 'auto' selects if one is specified).
+    :type json_encoder_class: type
+    :param convert_values: Convert values that cannot otherwise be serialised, using the registered converters
+                           (see `seqlog.converters`), rather than raising `TypeError`?
+    :type convert_values: bool
+    :return: The backend.
+    :rtype: JsonBackend
+    """
+
+    # The default JSONEncoder is not a customisation (every backend produces equivalent output).
+    if json_encoder_class is json.JSONEncoder:
+        json_encoder_class = None
+
+    name = name or 'auto'
+    if name == 'auto':
+        if json_encoder_class is None:
+            name = next(backend_name for backend_name in _backends_by_name if is_json_backend_available(backend_name))
+        else:
+            name = 'stdlib'
+
+    backend_class = _backends_by_name.get(name)
+    if not backend_class:
+        raise ValueError("Unsupported JSON backend: '{}'.".format(name))
+
+    if backend_class is StdlibJsonBackend:
+        return StdlibJsonBackend(json_encoder_class, convert_values)
+
+    if json_encoder_class is not None:
+        raise ValueError("The '{}' JSON backend does not support a custom JSON encoder class.".format(name))
+
+    return backend_class(convert_values)
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+
+def resolve_level(level):
+    """
+    Resolve a logging level name (or number) to a level number.
+
+    :param level: The level name or number.
+    :return: The level number.
+    :rtype: int
+    """
+
+    if isinstance(level, int):
+        return level
+
+    resolved_level = logging.getLevelName(str(level).upper())
+    if not isinstance(resolved_level, int):
+        raise ValueError("Unknown logging level: '{}'.".format(level))
+
+    return resolved_level
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+import typing as tp
+
+# The (default) maximum size of a serialised event, in bytes (matches Seq's default event body size limit).
+DEFAULT_MAX_EVENT_BYTES = 256 * 1024
+
+#: The name of the property that lists the names of any properties that were truncated.
+TRUNCATED_PROPERTIES_PROPERTY_NAME = 'TruncatedProperties'
+
+# Appended to truncated strings.
+_truncation_suffix = '...'
+
+
+class PropertyLimits(tp.NamedTuple):
+    """
+    Limits on the size of log event properties (a limit of None means unlimited).
+    """
+
+    max_string_length: int = None  #: The maximum length of a string (longer strings are truncated).
+    max_collection_length: int = None  #: The maximum number of items in a list or dict (further items are dropped).
+    max_depth: int = None  #: The maximum nesting depth of lists and dicts (deeper lists and dicts are replaced by a placeholder).
+    max_event_bytes: int = None  #: The maximum size of a serialised event, in bytes (the largest properties are replaced until it fits).
+
+    @property
+    def limits_values(self):
+        """
+        Do these limits apply to individual property values (rather than just the size of the whole event)?
+        """
+
+        return self.max_string_length is not None or self.max_collection_length is not None or self.max_depth is not None
+
+
+def truncate_properties(properties, limits):
+    """
+    Truncate property values that exceed the specified limits (replacing them in the dictionary).
+
+    :param properties: The properties.
+    :type properties: dict
+    :param limits: The limits to apply.
+    :type limits: PropertyLimits
+    :return: The names of the properties that were truncated.
+    :rtype: list
+    """
+
+    truncated_property_names = []
+    for name, value in properties.items():
+        truncated_value, truncated = truncate_value(value, limits)
+        if truncated:
+            properties[name] = truncated_value
+            truncated_property_names.append(name)
+
+    return truncated_property_names
+
+
+def truncate_value(value, limits, depth=1):
+    """
+    Truncate a property value that exceeds the specified limits.
+
+    Only strings, lists, tuples and dicts are truncated (other values are returned unchanged).
+    A value is only copied if it (or something that it contains) is truncated.
+
+    :param value: The value.
+    :param limits: The limits to apply.
+    :type limits: PropertyLimits
+    :param depth: The nesting depth of the value (1 for a property value).
+    :type depth: int
+    :return: The (possibly truncated) value, and whether it was truncated.
+    :rtype: tuple
+    """
+
+    if isinstance(value, str):
+        if limits.max_string_length is not None and len(value) > limits.max_string_length:
+            return value[:limits.max_string_length] + _truncation_suffix, True
+
+        return value, False
+
+    if isinstance(value, dict):
+        if limits.max_depth is not None and depth > limits.max_depth:
+            return '{' + _truncation_suffix + '}', True
+
+        items = value.items()
+        truncated = limits.max_collection_length is not None and len(value) > limits.max_collection_length
+        if truncated:
+            items = list(items)[:limits.max_collection_length]
+
+        truncated_value = {}
+        for item_key, item_value in items:
+            truncated_value[item_key], item_truncated = truncate_value(item_value, limits, depth + 1)
+            truncated = truncated or item_truncated
+
+        return (truncated_value, True) if truncated else (value, False)
+
+    if isinstance(value, (list, tuple)):
+        if limits.max_depth is not None and depth > limits.max_depth:
+            return '[' + _truncation_suffix + ']', True
+
+        items = value
+        truncated = limits.max_collection_length is not None and len(value) > limits.max_collection_length
+        if truncated:
+            items = value[:limits.max_collection_length]
+
+        truncated_value = []
+        for item_value in items:
+            item_value, item_truncated = truncate_value(item_value, limits, depth + 1)
+            truncated_value.append(item_value)
+            truncated = truncated or item_truncated
+
+        return (truncated_value, True) if truncated else (value, False)
+
+    return value, False
+
+
+def shrink_members(members, excess_bytes, dumps, names=None):
+    """
+    Replace the largest members of a JSON object with placeholders, until the object has shrunk by (at least) the specified number of bytes.
+
+    :param members: The object's members (modified in place).
+    :type members: dict
+    :param excess_bytes: The number of bytes by which the serialised object must shrink.
+    :type excess_bytes: int
+    :param dumps: A callable that serialises a value as (UTF-8 encoded) JSON.
+    :param names: The names of the members that can be replaced (if not specified, all members can be replaced).
+    :return: The names of the members that were replaced, and the number of bytes by which the object still exceeds its limit
+             (0 or less, if it now fits).
+    :rtype: tuple
+    """
+
+    if names is None:
+        names = list(members)
+
+    member_sizes = sorted(((len(dumps(members[name])), name) for name in names if name in members), reverse=True)
+
+    replaced_names = []
+    for member_size, name in member_sizes:
+        if excess_bytes <= 0:
+            break
+
+        placeholder = '<truncated: {} bytes>'.format(member_size)
+        if member_size <= len(placeholder) + 2:
+            break  # Replacing this (or any smaller) member would not make the object smaller.
+
+        members[name] = placeholder
+        replaced_names.append(name)
+        excess_bytes -= member_size - (len(placeholder) + 2)
+
+    return replaced_names, excess_bytes
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+
+from bisect import bisect_left
+from threading import Lock
+
+# Default histogram buckets (upper bounds) for batch sizes (in records).
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Default histogram buckets (upper bounds) for durations (in seconds).
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    A fixed-bucket histogram (compatible with Prometheus histogram semantics).
+    """
+
+    def __init__(self, buckets):
+        """
+        Create a new `Histogram`.
+
+        :param buckets: The (sorted) upper bounds of the histogram buckets; an implicit `+Inf` bucket is always present.
+        :type buckets: tuple
+        """
+
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        """
+        Record an observed value (the caller is responsible for synchronisation).
+
+        :param value: The observed value.
+        """
+
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self):
+        """
+        Get a snapshot of the histogram's state.
+
+        :return: A dictionary containing `buckets` (cumulative counts keyed by upper bound), `count` and `sum`.
+        :rtype: dict
+        """
+
+        cumulative_buckets = {}
+        cumulative_count = 0
+        for upper_bound, bucket_count in zip(self.buckets + (float("inf"),), self.bucket_counts):
+            cumulative_count += bucket_count
+            cumulative_buckets[upper_bound] = cumulative_count
+
+        return {
+            "buckets": cumulative_buckets,
+            "count": self.count,
+            "sum": self.sum
+        }
+
+
+class HandlerMetrics:
+    """
+    Counters, gauges and histograms describing a `SeqLogHandler`'s shipping pipeline.
+
+    Recording a metric is a lock-protected integer or bucket update, so metrics can be left enabled in production.
+    """
+
+    #: Counter names.
+    COUNTERS = (
+        "events_enqueued",  # Records accepted by emit().
+        "events_sent",      # Records successfully submitted to Seq.
+        "events_dropped",   # Records discarded before submission (e.g. because they could not be serialised).
+        "events_failed",    # Records in batches that could not be submitted to Seq.
+        "bytes_sent",       # Request body bytes successfully submitted to Seq.
+    )
+
+    #: Histogram names.
+    HISTOGRAMS = (
+        "batch_size",             # Records per published batch.
+        "serialization_seconds",  # Time taken to serialise each batch.
+        "post_latency_seconds",   # Time taken to submit each batch to Seq.
+    )
+
+    def __init__(self, queue_depth=None):
+        """
+        Create a new `HandlerMetrics`.
+
+        :param queue_depth: An optional callable that returns the current queue depth.
+        :type queue_depth: callable
+        """
+
+        self._lock = Lock()
+        self._queue_depth = queue_depth
+
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.histograms = {
+            "batch_size": Histogram(BATCH_SIZE_BUCKETS),
+            "serialization_seconds": Histogram(DURATION_BUCKETS),
+            "post_latency_seconds": Histogram(DURATION_BUCKETS),
+        }
+
+    @property
+    def queue_depth(self):
+        """
+        The current number of records waiting in the handler's queue.
+        """
+
+        return self._queue_depth() if self._queue_depth else 0
+
+    def increment(self, counter, amount=1):
+        """
+        Increment a counter.
+
+        :param counter: The counter name (one of `HandlerMetrics.COUNTERS`).
+        :type counter: str
+        :param amount: The amount by which to increment the counter.
+        :type amount: int
+        """
+
+        with self._lock:
+            self.counters[counter] += amount
+
+    def observe(self, histogram, value):
+        """
+        Record a value in a histogram.
+
+        :param histogram: The histogram name (one of `HandlerMetrics.HISTOGRAMS`).
+        :type histogram: str
+        :param value: The observed value.
+        """
+
+        with self._lock:
+            self.histograms[histogram].observe(value)
+
+    def snapshot(self):
+        """
+        Get a consistent snapshot of all metrics.
+
+        :return: A dictionary of counter values, `queue_depth`, and histogram snapshots keyed by name.
+        :rtype: dict
+        """
+
+        with self._lock:
+            snapshot = dict(self.counters)
+            for name, histogram in self.histograms.items():
+                snapshot[name] = histogram.snapshot()
+
+        snapshot["queue_depth"] = self.queue_depth
+
+        return snapshot
+
+    def to_prometheus(self, prefix="seqlog", labels=None):
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        :param prefix: The prefix for metric names.
+        :type prefix: str
+        :param labels: Optional labels (e.g. {"handler": "seq"}) to attach to every sample.
+        :type labels: dict
+        :return: The rendered metrics.
+        :rtype: str
+        """
+
+        snapshot = self.snapshot()
+        lines = []
+
+        for counter in self.COUNTERS:
+            metric_name = "{}_{}_total".format(prefix, counter)
+            lines.append("# TYPE {} counter".format(metric_name))
+            lines.append("{}{} {}".format(metric_name, _format_labels(labels), snapshot[counter]))
+
+        metric_name = "{}_queue_depth".format(prefix)
+        lines.append("# TYPE {} gauge".format(metric_name))
+        lines.append("{}{} {}".format(metric_name, _format_labels(labels), snapshot["queue_depth"]))
+
+        for histogram in self.HISTOGRAMS:
+            metric_name = "{}_{}".format(prefix, histogram)
+            histogram_snapshot = snapshot[histogram]
+            lines.append("# TYPE {} histogram".format(metric_name))
+            for upper_bound, cumulative_count in histogram_snapshot["buckets"].items():
+                bucket_labels = dict(labels or {}, le="+Inf" if upper_bound == float("inf") else repr(upper_bound))
+                lines.append("{}_bucket{} {}".format(metric_name, _format_labels(bucket_labels), cumulative_count))
+            lines.append("{}_sum{} {}".format(metric_name, _format_labels(labels), histogram_snapshot["sum"]))
+            lines.append("{}_count{} {}".format(metric_name, _format_labels(labels), histogram_snapshot["count"]))
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    """
+    Format Prometheus labels.
+
+    :param labels: A dictionary of label names and values (or None).
+    :return: The formatted labels (e.g. '{handler="seq"}'), or an empty string if there are no labels.
+    """
+
+    if not labels:
+        return ""
+
+    return "{" + ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels.items()
+    ) + "}"
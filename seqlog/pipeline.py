@@ -0,0 +1,527 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import signal
+import sys
+import weakref
+from contextlib import contextmanager
+from queue import Full, Queue
+from threading import Lock, Thread
+
+from seqlog.consumer import QueueConsumer
+from seqlog.dedup import DuplicateEventSuppressor
+from seqlog.encoding import RequestBodyWriter
+from seqlog.metrics import HandlerMetrics
+from seqlog.transport import SeqTransport, _get_transport_class, create_transport
+
+# Shared pipelines, by key (a pipeline is discarded once the last handler using it has been closed or garbage-collected).
+_shared_pipelines = weakref.WeakValueDictionary()
+_shared_pipelines_lock = Lock()
+
+# Live pipelines (reset in child processes after a fork, and flushed when the process crashes).
+_pipelines = weakref.WeakSet()
+
+# The hooks (and the handlers they replaced) installed by install_crash_flush_hooks().
+_crash_flush_hooks_lock = Lock()
+_previous_excepthook = None
+_previous_signal_handlers = {}
+
+# The maximum time (in seconds) that a signal handler installed by install_crash_flush_hooks() waits for records to be published.
+_signal_flush_timeout = 5.0
+
+
+class SeqLogPipeline:
+    """
+    The queue, consumer thread, request body writer and transport that a `SeqLogHandler` uses to submit log records to Seq.
+
+    A pipeline can be shared by several handlers that submit to the same server (with the same API key and options).
+    Records emitted by any of those handlers are batched together, and each batch is published by one of them (the publisher).
+    Each handler still applies its own level and filters before records reach the pipeline.
+
+    Records at or above `priority_level` bypass the main queue: they go to a priority lane (with its own consumer thread),
+    and are published as soon as they arrive (in their own batches). If the main queue is bounded (by `max_queue_size`)
+    and full, lower-priority records are dropped, while priority records are still accepted.
+    Records at or above `flush_level` also cause the batch of lower-priority records to be published immediately
+    (so the records leading up to an error are not left waiting for the batch to fill up).
+
+    Consumer threads are started when the first record is enqueued, and the transport is created when it is first used.
+    """
+
+    def __init__(self, batch_size, auto_flush_timeout=None, duplicate_suppression_window=None, compression=None, transport=None,
+                 priority_level=logging.ERROR, max_queue_size=None, flush_level=logging.ERROR):
+        """
+        Create a new `SeqLogPipeline`.
+
+        :param batch_size: The number of records to batch up before publishing them.
+        :param auto_flush_timeout: If specified, the time (in seconds) before the current batch is automatically published.
+        :param duplicate_suppression_window: If specified, the time window (in seconds) within which identical
+                                             log records are collapsed into a single event with a `RepeatCount`.
+        :param compression: If specified, the compression method ('gzip') to apply to request bodies.
+        :param transport: A `SeqTransport`, or the name of a well-known transport ('requests', 'http2' or 'h2c').
+        :param priority_level: If specified, records at or above this level are published immediately via the priority lane.
+        :type priority_level: int
+        :param max_queue_size: If specified, the maximum number of records (below `priority_level`) waiting to be published.
+        :type max_queue_size: int
+        :param flush_level: If specified, records at or above this level cause the current batch to be published immediately.
+        :type flush_level: int
+        """
+
+        self.key = None
+
+        # The options that the pipeline was created with (used to create a private pipeline for a handler that stops sharing it).
+        self.options = dict(
+            batch_size=batch_size,
+            auto_flush_timeout=auto_flush_timeout,
+            duplicate_suppression_window=duplicate_suppression_window,
+            compression=compression,
+            transport=transport,
+            priority_level=priority_level,
+            max_queue_size=max_queue_size,
+            flush_level=flush_level
+        )
+
+        if isinstance(transport, SeqTransport):
+            self._transport = transport
+        else:
+            _get_transport_class(transport)  # Fail fast on unsupported transport names.
+            self._transport = None
+
+        self._transport_name = transport
+        self._transport_lock = Lock()
+        self._owns_transport = self._transport is None
+
+        # Batches are encoded directly into reusable buffers (one per batch being published at the same time, e.g. by each lane).
+        self.compression = compression
+        self._body_writers = []
+        self._body_writers_lock = Lock()
+
+        self.duplicate_suppressor = None
+        if duplicate_suppression_window:
+            self.duplicate_suppressor = DuplicateEventSuppressor(duplicate_suppression_window)
+
+        self.flush_level = flush_level
+        self.max_queue_size = max_queue_size
+        self.log_queue = Queue(maxsize=max_queue_size or 0)
+        self.metrics = HandlerMetrics(queue_depth=self._get_queue_depth)
+        self.consumer = QueueConsumer(
+            name="SeqLogHandler",
+            queue=self.log_queue,
+            callback=self.publish_log_batch,
+            batch_size=batch_size,
+            auto_flush_timeout=auto_flush_timeout,
+            stage=self.duplicate_suppressor
+        )
+
+        # Priority records are never held by the duplicate suppressor (that would delay them by its window).
+        self.priority_level = priority_level
+        self.priority_queue = None
+        self.priority_consumer = None
+        if priority_level is not None:
+            self.priority_queue = Queue()
+            self.priority_consumer = QueueConsumer(
+                name="SeqLogHandler priority",
+                queue=self.priority_queue,
+                callback=self.publish_log_batch,
+                batch_size=batch_size,
+                flush_when_idle=True
+            )
+
+        self._handlers = []  # Weak references, in the order the handlers were added.
+        self._is_shut_down = False
+        self._start_lock = Lock()
+        self._start_consumer = True
+        self._start_priority_consumer = priority_level is not None
+
+        _pipelines.add(self)
+
+    @property
+    def transport(self):
+        """
+        The transport used to submit log entries to Seq (created on first use).
+
+        :rtype: SeqTransport
+        """
+
+        transport = self._transport
+        if transport is None:
+            with self._transport_lock:
+                if self._transport is None:
+                    self._transport = create_transport(self._transport_name)
+
+                transport = self._transport
+
+        return transport
+
+    @property
+    def handlers(self):
+        """
+        The (live) handlers using the pipeline.
+
+        :rtype: list
+        """
+
+        return [handler for handler in (handler_ref() for handler_ref in self._handlers) if handler is not None]
+
+    @property
+    def publisher(self):
+        """
+        The handler that publishes batches (the first live handler added to the pipeline), or None if there are none.
+        """
+
+        handlers = self.handlers
+
+        return handlers[0] if handlers else None
+
+    @contextmanager
+    def borrow_body_writer(self):
+        """
+        Borrow a request body writer (for as long as it takes to encode and send a batch).
+
+        :return: A context manager that yields the `RequestBodyWriter`.
+        """
+
+        with self._body_writers_lock:
+            writer = self._body_writers.pop() if self._body_writers else RequestBodyWriter(self.compression)
+
+        try:
+            yield writer
+        finally:
+            with self._body_writers_lock:
+                self._body_writers.append(writer)
+
+    def enqueue(self, record):
+        """
+        Enqueue a log record for publishing (starting the consumer for its lane, if this is the first record in that lane).
+
+        :param record: The log record.
+        :type record: logging.LogRecord
+        """
+
+        if self.priority_queue is not None and record.levelno >= self.priority_level:
+            if self._start_priority_consumer:
+                with self._start_lock:
+                    if self._start_priority_consumer:
+                        self._start_priority_consumer = False
+
+                        # The consumer may already have been started explicitly.
+                        if not self.priority_consumer.is_running:
+                            self.priority_consumer.start()
+
+            self.priority_queue.put(record, block=False)
+            self.metrics.increment("events_enqueued")
+        else:
+            if self._start_consumer:
+                with self._start_lock:
+                    if self._start_consumer:
+                        self._start_consumer = False
+
+                        if not self.consumer.is_running:
+                            self.consumer.start()
+
+            try:
+                self.log_queue.put(record, block=False)
+            except Full:
+                # Shed lower-priority records, rather than blocking the caller.
+                self.metrics.increment("events_dropped")
+
+                return
+
+            self.metrics.increment("events_enqueued")
+
+        if self.flush_level is not None and record.levelno >= self.flush_level and self.consumer.is_running:
+            self.consumer.request_flush()
+
+    def flush(self, drain_queue=False):
+        """
+        Publish the current batch (and, optionally, any records waiting in the queue).
+
+        :param drain_queue: Also publish records still waiting in the queues (on the calling thread)?
+        :type drain_queue: bool
+        """
+
+        if self.priority_consumer:
+            self.priority_consumer.flush(drain_queue)
+
+        self.consumer.flush(drain_queue)
+
+    def publish_log_batch(self, batch):
+        """
+        Publish a batch of log records (via the publisher).
+
+        :param batch: The log records.
+        :type batch: list
+        """
+
+        publisher = self.publisher
+        if publisher is None:
+            # Every handler using the pipeline has been garbage-collected (without being closed).
+            self.metrics.increment("events_dropped", len(batch))
+
+            return
+
+        publisher.publish_log_batch(batch)
+
+    def add_handler(self, handler):
+        """
+        Add a handler to the pipeline.
+
+        :param handler: The handler.
+        """
+
+        self._handlers.append(weakref.ref(handler))
+
+    def remove_handler(self, handler):
+        """
+        Remove a handler from the pipeline; once the last handler has been removed, the pipeline is shut down.
+
+        Records that the handler has already emitted are still published (by the remaining handlers).
+
+        :param handler: The handler.
+        :return: `True`, if the pipeline was shut down; otherwise, `False`.
+        :rtype: bool
+        """
+
+        with _shared_pipelines_lock:
+            handlers = self.handlers
+            if handler not in handlers or self._is_shut_down:
+                return False
+
+            # Once the last handler is being removed, the pipeline can no longer be shared.
+            self._is_shut_down = len(handlers) == 1
+            if self._is_shut_down and self.key is not None and _shared_pipelines.get(self.key) is self:
+                del _shared_pipelines[self.key]
+
+        if self._is_shut_down:
+            # The last handler remains the publisher, for any records that the consumer publishes while it stops.
+            self._shutdown()
+        else:
+            self._handlers = [handler_ref for handler_ref in self._handlers if handler_ref() not in (handler, None)]
+
+        return self._is_shut_down
+
+    def _shutdown(self):
+        """
+        Stop the consumer, and close the transport (if the pipeline created it).
+        """
+
+        with self._start_lock:
+            self._start_consumer = False
+            self._start_priority_consumer = False
+
+        if self.consumer.is_running:
+            self.consumer.stop()
+
+        if self.priority_consumer and self.priority_consumer.is_running:
+            self.priority_consumer.stop()
+
+        # TODO: Implement QueueConsumer.join() so we can wait
+        # for processing to complete before closing the HTTP session
+
+        # self.consumer.join()
+
+        if self._owns_transport and self._transport is not None:
+            self._transport.close()
+
+    def reset_after_fork(self):
+        """
+        Reset the pipeline in a child process (after `fork`).
+
+        Records inherited from the parent process are discarded (the parent process still publishes them), and the consumer thread
+        (which does not survive the fork) is started when the first record is emitted in the child process.
+        """
+
+        self._transport_lock = Lock()
+        self._start_lock = Lock()
+
+        for handler in self.handlers:
+            handler.reset_after_fork()
+
+        self._body_writers = []
+        self._body_writers_lock = Lock()
+
+        if self.duplicate_suppressor:
+            self.duplicate_suppressor = DuplicateEventSuppressor(
+                self.duplicate_suppressor.window,
+                self.duplicate_suppressor.max_held_events
+            )
+
+        self.log_queue = Queue(maxsize=self.max_queue_size or 0)
+        self.metrics = HandlerMetrics(queue_depth=self._get_queue_depth)
+        consumer_was_running = self.consumer.reset_after_fork(self.log_queue, self.duplicate_suppressor)
+        self._start_consumer = self._start_consumer or consumer_was_running
+
+        if self.priority_consumer:
+            self.priority_queue = Queue()
+            priority_consumer_was_running = self.priority_consumer.reset_after_fork(self.priority_queue)
+            self._start_priority_consumer = self._start_priority_consumer or priority_consumer_was_running
+
+    def _get_queue_depth(self):
+        """
+        Get the number of records waiting to be published (in all lanes).
+
+        :rtype: int
+        """
+
+        queue_depth = self.log_queue.qsize()
+        if self.priority_queue is not None:
+            queue_depth += self.priority_queue.qsize()
+
+        return queue_depth
+
+
+def get_pipeline(handler, key=None, **pipeline_options):
+    """
+    Get a pipeline for a handler (adding the handler to it).
+
+    :param handler: The handler.
+    :param key: If specified, a hashable key that identifies a shared pipeline (handlers with the same key share a pipeline).
+                If not specified, a new (unshared) pipeline is created.
+    :param pipeline_options: The options (see `SeqLogPipeline`) used to create the pipeline, if there is no existing one for the key.
+    :return: The pipeline.
+    :rtype: SeqLogPipeline
+    """
+
+    with _shared_pipelines_lock:
+        pipeline = _shared_pipelines.get(key) if key is not None else None
+        if pipeline is None or not pipeline.handlers:
+            pipeline = SeqLogPipeline(**pipeline_options)
+            if key is not None:
+                pipeline.key = key
+                _shared_pipelines[key] = pipeline
+
+        pipeline.add_handler(handler)
+
+    return pipeline
+
+
+def unshare_pipeline(handler, pipeline):
+    """
+    Stop a handler from sharing its pipeline (e.g. because its settings no longer match those of the handlers it shares the pipeline with).
+
+    If the handler is the only one using the pipeline, the pipeline is kept (but handlers created later no longer join it);
+    otherwise, the handler is moved to a new pipeline with the same options. Records that the handler has already emitted are still
+    published by the pipeline it leaves.
+
+    :param handler: The handler.
+    :param pipeline: The handler's current pipeline.
+    :return: The handler's (unshared) pipeline.
+    :rtype: SeqLogPipeline
+    """
+
+    with _shared_pipelines_lock:
+        if pipeline.key is None:
+            return pipeline
+
+        if pipeline.handlers == [handler]:
+            if _shared_pipelines.get(pipeline.key) is pipeline:
+                del _shared_pipelines[pipeline.key]
+            pipeline.key = None
+
+            return pipeline
+
+        private_pipeline = SeqLogPipeline(**pipeline.options)
+        private_pipeline.add_handler(handler)
+
+    pipeline.remove_handler(handler)
+
+    return private_pipeline
+
+
+def flush_all_pipelines():
+    """
+    Synchronously publish all records waiting in every live pipeline (on the calling thread).
+
+    This is a best-effort operation (used when the process is about to exit abnormally); errors are ignored.
+    """
+
+    for pipeline in list(_pipelines):
+        try:
+            pipeline.flush(drain_queue=True)
+        except Exception:
+            pass
+
+
+def install_crash_flush_hooks(signals=(signal.SIGTERM,), flush_timeout=5.0):
+    """
+    Install hooks that synchronously publish all waiting log records when the process crashes.
+
+    The hooks run when an exception is not caught (`sys.excepthook`), and when the process receives one of the specified signals.
+    Each hook publishes the waiting records, then calls the hook or signal handler that it replaced
+    (or, for signals with the default disposition, re-raises the signal).
+    Signal hooks can only be installed from the main thread; if called from any other thread, only the `sys.excepthook` hook is installed.
+    Calling this function more than once installs no further hooks.
+
+    A signal can interrupt the main thread while it holds a lock that publishing needs (for example, while it is adding a record to a queue),
+    so signal hooks publish the waiting records on another thread, and wait no longer than `flush_timeout` for it to finish.
+
+    :param signals: The signals that trigger a flush.
+    :param flush_timeout: The maximum time (in seconds) that a signal hook waits for the waiting records to be published.
+    :type flush_timeout: float
+    """
+
+    global _previous_excepthook, _signal_flush_timeout
+
+    with _crash_flush_hooks_lock:
+        _signal_flush_timeout = flush_timeout
+
+        if _previous_excepthook is None:
+            _previous_excepthook = sys.excepthook
+            sys.excepthook = _flush_on_uncaught_exception
+
+        for signum in signals:
+            if signum in _previous_signal_handlers:
+                continue
+
+            try:
+                _previous_signal_handlers[signum] = signal.signal(signum, _flush_on_signal)
+            except ValueError:
+                break  # Not the main thread.
+
+
+def _flush_on_uncaught_exception(exc_type, exc_value, exc_traceback):
+    """
+    A `sys.excepthook` that publishes waiting log records before calling the previous hook.
+    """
+
+    flush_all_pipelines()
+
+    (_previous_excepthook or sys.__excepthook__)(exc_type, exc_value, exc_traceback)
+
+
+def _flush_on_signal(signum, frame):
+    """
+    A signal handler that publishes waiting log records before calling the previous handler (or re-raising the signal).
+    """
+
+    # Signal handlers run on the main thread, between any two bytecodes, so this thread may already hold a (non-reentrant) lock
+    # that publishing needs. The records are published on another thread, which can still finish after this handler gives up waiting for it.
+    flusher = Thread(target=flush_all_pipelines, name='seqlog-crash-flush', daemon=True)
+    flusher.start()
+    flusher.join(_signal_flush_timeout)
+
+    previous_handler = _previous_signal_handlers.get(signum)
+    if callable(previous_handler):
+        previous_handler(signum, frame)
+    elif previous_handler != signal.SIG_IGN:
+        # Default disposition (or a handler installed outside of Python): re-raise the signal, so the process exits as it would have.
+        signal.signal(signum, signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
+
+
+def _reset_pipelines_after_fork():
+    """
+    Reset all live pipelines in a child process (after `fork`).
+    """
+
+    global _shared_pipelines_lock
+
+    # The lock may have been held by another thread in the parent process when it forked.
+    _shared_pipelines_lock = Lock()
+
+    for pipeline in list(_pipelines):
+        pipeline.reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):  # Not available on Windows.
+    os.register_at_fork(after_in_child=_reset_pipelines_after_fork)
@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import logging
+import time
+from threading import Lock
+
+from seqlog.levels import resolve_level
+
+
+class SamplingStrategy:
+    """
+    Base class for strategies that decide which log records are kept when sampling.
+
+    Each strategy instance tracks a single call site (logger name, level and message template).
+    """
+
+    def __init__(self):
+        """
+        Create a new `SamplingStrategy`.
+        """
+
+        self.suppressed_count = 0
+
+    def should_keep(self, now):
+        """
+        Determine whether the next record should be kept.
+
+        :param now: The current (monotonic) time, in seconds.
+        :type now: float
+        :return: `True`, if the record should be kept; otherwise, `False`.
+        :rtype: bool
+        """
+
+        raise NotImplementedError()
+
+    def sample(self, now):
+        """
+        Sample the next record.
+
+        :param now: The current (monotonic) time, in seconds.
+        :type now: float
+        :return: If the record should be kept, the number of records it represents (including those suppressed since the last kept record); otherwise, 0.
+        :rtype: int
+        """
+
+        if not self.should_keep(now):
+            self.suppressed_count += 1
+
+            return 0
+
+        sampled_count = self.suppressed_count + 1
+        self.suppressed_count = 0
+
+        return sampled_count
+
+
+class TokenBucketStrategy(SamplingStrategy):
+    """
+    Keep records while tokens are available; tokens are replenished at a fixed rate.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        Create a new `TokenBucketStrategy`.
+
+        :param rate: The number of records per second to keep (once the burst allowance has been used up).
+        :type rate: float
+        :param burst: The maximum number of records that can be kept in a burst (defaults to `rate`).
+        :type burst: int
+        """
+
+        super().__init__()
+
+        if rate <= 0:
+            raise ValueError("Rate must be greater than 0.")
+
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(rate, 1))
+        self.tokens = self.capacity
+        self.last_refill = None
+
+    def should_keep(self, now):
+        if self.last_refill is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+        if self.tokens < 1:
+            return False
+
+        self.tokens -= 1
+
+        return True
+
+
+class OneInNStrategy(SamplingStrategy):
+    """
+    Keep the first record, and then every Nth record after it.
+    """
+
+    def __init__(self, n):
+        """
+        Create a new `OneInNStrategy`.
+
+        :param n: Keep 1 in every `n` records.
+        :type n: int
+        """
+
+        super().__init__()
+
+        if n < 1:
+            raise ValueError("N must be at least 1.")
+
+        self.n = int(n)
+        self.seen = 0
+
+    def should_keep(self, now):
+        keep = self.seen % self.n == 0
+        self.seen += 1
+
+        return keep
+
+
+class BurstThenSampleStrategy(SamplingStrategy):
+    """
+    Keep the first `burst` records in each period, and then 1 in every N records for the rest of the period.
+    """
+
+    def __init__(self, burst, n, period=1.0):
+        """
+        Create a new `BurstThenSampleStrategy`.
+
+        :param burst: The number of records to keep at the start of each period.
+        :type burst: int
+        :param n: Once the burst has been used up, keep 1 in every `n` records.
+        :type n: int
+        :param period: The period length (in seconds).
+        :type period: float
+        """
+
+        super().__init__()
+
+        if n < 1:
+            raise ValueError("N must be at least 1.")
+        if period <= 0:
+            raise ValueError("Period must be greater than 0.")
+
+        self.burst = int(burst)
+        self.n = int(n)
+        self.period = float(period)
+        self.period_start = None
+        self.seen = 0
+
+    def should_keep(self, now):
+        if self.period_start is None or now - self.period_start >= self.period:
+            self.period_start = now
+            self.seen = 0
+
+        seen = self.seen
+        self.seen += 1
+
+        if seen < self.burst:
+            return True
+
+        return (seen - self.burst) % self.n == 0
+
+
+# Strategy names that can be used in configuration (e.g. via `configure_from_dict`).
+_strategies_by_name = {
+    "token_bucket": TokenBucketStrategy,
+    "one_in_n": OneInNStrategy,
+    "burst_then_sample": BurstThenSampleStrategy,
+}
+
+
+class SamplingRule:
+    """
+    Selects the log records to which a sampling strategy applies.
+    """
+
+    def __init__(self, strategy="token_bucket", logger=None, level=None, template=None, **strategy_options):
+        """
+        Create a new `SamplingRule`.
+
+        :param strategy: The name of the sampling strategy ("token_bucket", "one_in_n", or "burst_then_sample"), or a `SamplingStrategy` class.
+        :param logger: If specified, the rule only applies to this logger (and its descendants).
+        :type logger: str
+        :param level: If specified, the rule only applies to records at or below this level.
+        :type level: int | str
+        :param template: If specified, the rule only applies to records with this message template.
+        :type template: str
+        :param strategy_options: Keyword arguments for the strategy's constructor (e.g. `rate`, `burst`, `n`, `period`).
+        """
+
+        if isinstance(strategy, str):
+            strategy_class = _strategies_by_name.get(strategy)
+            if not strategy_class:
+                raise ValueError("Unknown sampling strategy: '{}'.".format(strategy))
+        else:
+            strategy_class = strategy
+
+        self.strategy_class = strategy_class
+        self.strategy_options = dict(strategy_options)
+        self.logger = logger
+        self.level = resolve_level(level) if level is not None else None
+        self.template = template
+
+        # Fail fast if the strategy options are invalid.
+        self.create_strategy()
+
+    def create_strategy(self):
+        """
+        Create a new instance of the rule's sampling strategy.
+
+        :return: The strategy.
+        :rtype: SamplingStrategy
+        """
+
+        return self.strategy_class(**self.strategy_options)
+
+    def matches(self, record):
+        """
+        Determine whether the rule applies to the specified log record.
+
+        :param record: The LogRecord.
+        :return: `True`, if the rule applies to the record; otherwise, `False`.
+        :rtype: bool
+        """
+
+        if self.level is not None and record.levelno > self.level:
+            return False
+
+        if self.logger and record.name != self.logger and not record.name.startswith(self.logger + "."):
+            return False
+
+        if self.template is not None and record.msg != self.template:
+            return False
+
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Log filter that samples or rate-limits log records.
+
+    Records are tracked per call site (logger name, level and message template), using the first matching rule.
+    Records that survive sampling are replaced by a copy with a `SampledCount` property attached, indicating how many records
+    they represent (the original record, which other loggers and handlers may also receive, is left unchanged).
+
+    Logging uses a record returned by a filter in place of the original from Python 3.12 onward; on earlier versions,
+    only seqlog's loggers and handlers do so (other loggers and handlers receive the original record, without `SampledCount`).
+    """
+
+    def __init__(self, rules=None, name='', max_tracked_call_sites=10000):
+        """
+        Create a new `SamplingFilter`.
+
+        :param rules: `SamplingRule`s (or dictionaries of `SamplingRule` constructor arguments) in order of precedence.
+        :type rules: list
+        :param name: The logger name used to initialise the base `logging.Filter`.
+        :type name: str
+        :param max_tracked_call_sites: The maximum number of call sites to track before sampling state is reset.
+        :type max_tracked_call_sites: int
+        """
+
+        super().__init__(name)
+
+        self.rules = [
+            rule if isinstance(rule, SamplingRule) else SamplingRule(**rule)
+            for rule in (rules or [])
+        ]
+        self.max_tracked_call_sites = max_tracked_call_sites
+
+        self._state_lock = Lock()
+        self._strategies = {}
+
+    def filter(self, record):
+        """
+        Determine whether the specified log record should be logged.
+
+        :param record: The LogRecord.
+        :return: `False`, if the record should not be logged; otherwise, `True` (if the record is not subject to sampling)
+                 or a copy of the record with the `SampledCount` property attached.
+        """
+
+        if not super().filter(record):
+            return False
+
+        for rule_index, rule in enumerate(self.rules):
+            if rule.matches(record):
+                break
+        else:
+            return True  # Not subject to sampling.
+
+        # Messages can be any object (not necessarily one that is hashable); they are logged as a string.
+        message_template = record.msg if isinstance(record.msg, str) else str(record.msg)
+        call_site = (rule_index, record.name, record.levelno, message_template)
+        with self._state_lock:
+            strategy = self._strategies.get(call_site)
+            if strategy is None:
+                if len(self._strategies) >= self.max_tracked_call_sites:
+                    self._strategies.clear()
+
+                strategy = self._strategies[call_site] = rule.create_strategy()
+
+            sampled_count = strategy.sample(time.monotonic())
+
+        if not sampled_count:
+            return False
+
+        sampled_record = copy.copy(record)
+        sampled_record.log_props = dict(getattr(record, "log_props", None) or {}, SampledCount=sampled_count)
+
+        return sampled_record
+
@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import mmap
+import os
+import sys
+import threading
+import time
+import typing as tp
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from seqlog.encoding import BufferedRequestBody, RequestBodyWriter
+from seqlog.transport import create_transport
+
+# The (default) maximum size of a request body, in bytes (well under Seq's default 10 MB request size limit).
+DEFAULT_BATCH_BYTES = 4 * 1024 * 1024
+
+# The CLEF ingestion endpoint (relative to the server URL).
+_clef_endpoint = 'ingest/clef'
+_clef_content_type = 'application/vnd.serilog.clef'
+
+
+class ShipResult(tp.NamedTuple):
+    """
+    The outcome of shipping one or more CLEF files to Seq.
+    """
+
+    batches_sent: int = 0  #: The number of batches (requests) accepted by Seq.
+    bytes_sent: int = 0  #: The number of (uncompressed) bytes accepted by Seq.
+    retries: int = 0  #: The number of requests that were retried.
+    failed: bool = False  #: Did shipping stop early, because a batch could not be submitted?
+
+
+class ClefShipper:
+    """
+    Ships newline-delimited CLEF files (such as those written by `ClefFileHandler`) to Seq.
+
+    Files are memory-mapped and cut into batches at line boundaries, without parsing (or copying) the events;
+    each batch is posted as-is (unless it is compressed) using a `SeqTransport`, with several batches in flight at once.
+    A last line without a line terminator (which may still be being written) is left for the next attempt to ship the file.
+
+    If a checkpoint file is specified, the offset up to which each file has been accepted by Seq is recorded there,
+    so that shipping a file again resumes where the previous attempt stopped.
+    """
+
+    def __init__(self, server_url, api_key=None, transport=None, compression=None, batch_bytes=DEFAULT_BATCH_BYTES,
+                 concurrency=4, retries=3, retry_delay=1.0, checkpoint_file=None):
+        """
+        Create a new `ClefShipper`.
+
+        :param server_url: The Seq server URL.
+        :param api_key: The Seq API key (optional).
+        :param transport: A `SeqTransport`, or the name of a well-known transport ('requests', 'http2' or 'h2c').
+        :param compression: If specified, the compression method ('gzip') to apply to request bodies.
+        :param batch_bytes: The maximum size (in bytes) of each batch (a single event larger than this is sent in a batch of its own).
+        :param concurrency: The maximum number of batches to post at once.
+        :param retries: The number of times to retry a batch that Seq did not accept (because it was unreachable, busy or failing).
+        :param retry_delay: The delay (in seconds) before the first retry (doubled for each subsequent retry).
+        :param checkpoint_file: If specified, the name of the file in which to record the offset up to which each file has been shipped.
+        """
+
+        self.server_url = server_url if server_url.endswith('/') else server_url + '/'
+        self.api_key = api_key
+        self.transport = create_transport(transport)
+        self.compression = compression
+        self.batch_bytes = batch_bytes
+        self.concurrency = concurrency
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.checkpoint = _Checkpoint(checkpoint_file) if checkpoint_file else None
+
+        self._body_writers = threading.local()
+        self._retry_count = 0
+        self._retry_count_lock = threading.Lock()
+
+        # Fail early (rather than on a worker thread) if the compression method is not supported.
+        RequestBodyWriter(compression)
+
+    def ship(self, filenames):
+        """
+        Ship CLEF files to Seq (stopping at the first batch that cannot be submitted).
+
+        :param filenames: The names of the files to ship.
+        :return: The outcome.
+        :rtype: ShipResult
+        """
+
+        result = ShipResult()
+        for filename in filenames:
+            file_result = self.ship_file(filename)
+            result = ShipResult(
+                result.batches_sent + file_result.batches_sent,
+                result.bytes_sent + file_result.bytes_sent,
+                result.retries + file_result.retries,
+                file_result.failed
+            )
+            if result.failed:
+                break
+
+        return result
+
+    def ship_file(self, filename):
+        """
+        Ship a CLEF file to Seq (starting from the checkpoint offset for the file, if any).
+
+        :param filename: The name of the file to ship.
+        :return: The outcome.
+        :rtype: ShipResult
+        """
+
+        filename = os.path.abspath(os.fspath(filename))
+        start_offset = self.checkpoint.get(filename) if self.checkpoint else 0
+
+        with open(filename, 'rb') as file:
+            file_size = os.fstat(file.fileno()).st_size
+            if start_offset > file_size:
+                start_offset = 0  # The file has been truncated (or replaced) since the checkpoint was recorded.
+
+            if start_offset == file_size:
+                return ShipResult()
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                return self._ship_mapped_file(filename, mapped_file, start_offset)
+
+    def _ship_mapped_file(self, filename, mapped_file, start_offset):
+        """
+        Ship the batches in a memory-mapped CLEF file, with up to `concurrency` batches in flight.
+
+        Batches may be accepted out of order, so the checkpoint only advances past a batch once all of the batches before it have been accepted.
+        """
+
+        self._retry_count = 0
+        batches_sent = 0
+        bytes_sent = 0
+        failed = False
+
+        checkpoint_offset = start_offset
+        accepted_batches = {}  # start offset -> end offset, for batches accepted ahead of the checkpoint.
+
+        with memoryview(mapped_file) as file_view, ThreadPoolExecutor(self.concurrency, thread_name_prefix='seqlog-ship') as executor:
+            batches = _iter_batches(mapped_file, start_offset, self.batch_bytes)
+            in_flight = {}
+            while True:
+                while not failed and len(in_flight) < self.concurrency:
+                    batch = next(batches, None)
+                    if batch is None:
+                        break
+
+                    in_flight[executor.submit(self._post_batch, file_view, *batch)] = batch
+
+                if not in_flight:
+                    break
+
+                completed, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    batch_start, batch_end = in_flight.pop(future)
+                    if not future.result():
+                        failed = True
+                        continue
+
+                    batches_sent += 1
+                    bytes_sent += batch_end - batch_start
+                    accepted_batches[batch_start] = batch_end
+
+                while checkpoint_offset in accepted_batches:
+                    checkpoint_offset = accepted_batches.pop(checkpoint_offset)
+
+                if self.checkpoint:
+                    self.checkpoint.set(filename, checkpoint_offset)
+
+        return ShipResult(batches_sent, bytes_sent, self._retry_count, failed)
+
+    def _post_batch(self, file_view, batch_start, batch_end):
+        """
+        Post a batch (retrying, if necessary) to Seq.
+
+        :param file_view: A memoryview over the mapped file.
+        :param batch_start: The offset of the batch's first byte.
+        :param batch_end: The offset just past the batch's last byte.
+        :return: `True`, if the batch was accepted; otherwise, `False`.
+        """
+
+        headers = {'Content-Type': _clef_content_type}
+        if self.api_key:
+            headers['X-Seq-ApiKey'] = self.api_key
+
+        with file_view[batch_start:batch_end] as batch_view:
+            if self.compression:
+                writer = self._get_body_writer()
+                writer.begin(use_clef=True)
+                writer.write_encoded_events(batch_view)
+                writer.finish()
+
+                headers['Content-Encoding'] = writer.content_encoding
+                create_body = writer.body
+            else:
+                def create_body():
+                    return BufferedRequestBody(batch_view, len(batch_view))
+
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    with self._retry_count_lock:
+                        self._retry_count += 1
+
+                try:
+                    self.transport.post(self.server_url + _clef_endpoint, create_body(), headers)
+
+                    return True
+                except self.transport.errors as request_failed:
+                    retry_after = _get_retry_after(request_failed)
+                    if retry_after is None or attempt == self.retries:
+                        _report_error(batch_start, batch_end, request_failed)
+
+                        return False
+
+                    time.sleep(max(retry_after, self.retry_delay * 2 ** attempt))
+
+    def _get_body_writer(self):
+        """
+        Get the request body writer for the current worker thread (each worker reuses its writer's buffer for subsequent batches).
+        """
+
+        writer = getattr(self._body_writers, 'writer', None)
+        if writer is None:
+            writer = self._body_writers.writer = RequestBodyWriter(self.compression, retained_capacity=self.batch_bytes)
+
+        return writer
+
+
+class _Checkpoint:
+    """
+    Records (in a JSON file) the offset up to which each CLEF file has been shipped.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._lock = threading.Lock()
+
+        try:
+            with open(filename) as checkpoint_file:
+                self._offsets = json.load(checkpoint_file)
+        except FileNotFoundError:
+            self._offsets = {}
+
+    def get(self, filename):
+        with self._lock:
+            return self._offsets.get(filename, 0)
+
+    def set(self, filename, offset):
+        with self._lock:
+            if self._offsets.get(filename) == offset:
+                return
+
+            self._offsets[filename] = offset
+
+            # Write the checkpoint to a new file and then replace the old one, so a crash never leaves it half-written.
+            temp_filename = self.filename + '.tmp'
+            with open(temp_filename, 'w') as checkpoint_file:
+                json.dump(self._offsets, checkpoint_file)
+
+            os.replace(temp_filename, self.filename)
+
+
+def _iter_batches(mapped_file, start_offset, batch_bytes):
+    """
+    Cut a memory-mapped CLEF file into batches of whole lines (without parsing them).
+
+    :param mapped_file: The memory-mapped file.
+    :param start_offset: The offset (at the start of a line) from which to start.
+    :param batch_bytes: The maximum size of a batch (unless it consists of a single, larger, line).
+    :return: An iterator of (start offset, end offset) tuples.
+    """
+
+    # A last line without a line terminator may still be being written, so it is left for the next run.
+    lines_end = mapped_file.rfind(b'\n', start_offset) + 1
+    batch_start = start_offset
+    while batch_start < lines_end:
+        batch_end = batch_start + batch_bytes
+        if batch_end >= lines_end:
+            batch_end = lines_end
+        else:
+            last_newline = mapped_file.rfind(b'\n', batch_start, batch_end)
+            if last_newline < 0:
+                # A single line that is larger than a batch.
+                last_newline = mapped_file.find(b'\n', batch_end)
+
+            batch_end = last_newline + 1
+
+        yield batch_start, batch_end
+
+        batch_start = batch_end
+
+
+def _get_retry_after(request_failed):
+    """
+    Determine whether (and after how long) a failed request should be retried.
+
+    :param request_failed: The exception raised by the transport.
+    :return: The minimum delay (in seconds) before retrying, or None if the request should not be retried
+             (because Seq rejected the batch itself, rather than being unreachable, busy or failing).
+    """
+
+    response = getattr(request_failed, 'response', None)
+    if response is None:
+        return 0
+
+    status_code = response.status_code
+    if status_code != 429 and status_code < 500:
+        return None
+
+    try:
+        return float(response.headers.get('Retry-After', 0))
+    except ValueError:
+        return 0  # An HTTP date (rather than a number of seconds).
+
+
+def _report_error(batch_start, batch_end, request_failed):
+    """
+    Report a batch that could not be submitted to Seq.
+    """
+
+    response = getattr(request_failed, 'response', None)
+    response_text = getattr(response, 'text', None) if response is not None else None
+
+    print(
+        'Failed to ship bytes {0}-{1}: {2}{3}'.format(batch_start, batch_end, request_failed, '\n\n' + response_text if response_text else ''),
+        file=sys.stderr
+    )
+
+
+def main(args=None):
+    """
+    Ship newline-delimited CLEF files to Seq (`python -m seqlog.ship`).
+
+    :param args: The command-line arguments (if not specified, `sys.argv` is used).
+    :return: The process exit code.
+    :rtype: int
+    """
+
+    parser = argparse.ArgumentParser(
+        prog='python -m seqlog.ship',
+        description='Ship newline-delimited CLEF files (such as those written by ClefFileHandler) to Seq.'
+    )
+    parser.add_argument('files', nargs='+', metavar='FILE', help='The CLEF files to ship.')
+    parser.add_argument('--server-url', required=True, help='The Seq server URL.')
+    parser.add_argument('--api-key', default=os.environ.get('SEQ_API_KEY'), help='The Seq API key (default: $SEQ_API_KEY).')
+    parser.add_argument('--transport', choices=('requests', 'http2', 'h2c'), default='requests', help='The transport used to post batches.')
+    parser.add_argument('--compression', choices=('gzip',), help='Compress request bodies.')
+    parser.add_argument('--batch-bytes', type=int, default=DEFAULT_BATCH_BYTES, help='The maximum size of each batch, in bytes.')
+    parser.add_argument('--concurrency', type=int, default=4, help='The maximum number of batches to post at once.')
+    parser.add_argument('--retries', type=int, default=3, help='The number of times to retry a batch that Seq did not accept.')
+    parser.add_argument('--retry-delay', type=float, default=1.0, help='The delay (in seconds) before the first retry.')
+    parser.add_argument('--checkpoint', metavar='CHECKPOINT_FILE', help='Record (and resume from) the offset shipped for each file.')
+    options = parser.parse_args(args)
+
+    shipper = ClefShipper(
+        options.server_url,
+        api_key=options.api_key,
+        transport=options.transport,
+        compression=options.compression,
+        batch_bytes=options.batch_bytes,
+        concurrency=options.concurrency,
+        retries=options.retries,
+        retry_delay=options.retry_delay,
+        checkpoint_file=options.checkpoint
+    )
+
+    started = time.perf_counter()
+    try:
+        result = shipper.ship(options.files)
+    finally:
+        shipper.transport.close()
+
+    elapsed = time.perf_counter() - started
+    print('Shipped {0} bytes in {1} batches ({2} retries) in {3:.2f}s ({4:.1f} MB/s).'.format(
+        result.bytes_sent, result.batches_sent, result.retries, elapsed, result.bytes_sent / max(elapsed, 1e-9) / 1e6
+    ))
+
+    return 1 if result.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
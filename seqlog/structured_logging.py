@@ -1,23 +1,31 @@
 # -*- coding: utf-8 -*-
 
-import base64
 import copy
 import json
 import importlib
 import inspect
+import io
 import logging
+import math
 import os
 import socket
 import sys
+import time
 import typing as tp
 import warnings
+from collections import ChainMap
 from datetime import datetime
-from dateutil.tz import tzlocal
-from queue import Queue
-import requests
-
-from seqlog.consumer import QueueConsumer
-from seqlog.feature_flags import FeatureFlag, is_feature_enabled
+from threading import RLock, Timer
+
+from seqlog.ambient import get_ambient_log_properties
+from seqlog.converters import convert_value, create_json_default
+from seqlog.destructuring import capture_value, get_capture_hints, strip_capture_hints
+from seqlog.encoding import DEFAULT_CHUNK_SIZE
+from seqlog.feature_flags import FeatureSnapshot, get_feature_snapshot
+from seqlog.json_backends import StdlibJsonBackend, create_json_backend
+from seqlog.levels import resolve_level
+from seqlog.limits import DEFAULT_MAX_EVENT_BYTES, TRUNCATED_PROPERTIES_PROPERTY_NAME, PropertyLimits, shrink_members, truncate_properties
+from seqlog.pipeline import get_pipeline, install_crash_flush_hooks, unshare_pipeline
 
 # Well-known keyword arguments used by the logging system.
 _well_known_logger_kwargs = {"extra", "exc_info", "func", "sinfo"}
@@ -32,8 +40,34 @@ _default_global_log_props = {
 _global_log_props = _default_global_log_props
 # Whether the _global_log_props DOES NOT contain any callables
 _global_log_props_is_raw_dict = True
+# Incremented whenever the global log properties change (invalidates cached static log contexts).
+_global_log_props_version = 0
+# Cached static log contexts, keyed by logger name.
+_static_log_contexts = {}   # type: tp.Dict[str, _StaticLogContext]
 _callback_on_failure = None     # type: tp.Callable[[Exception], None]
 
+# Used to format exceptions for handlers that do not have a formatter.
+_default_formatter = logging.Formatter()
+
+# Property value types that can be serialised to JSON as-is.
+_json_primitive_types = {str, int, float, bool, type(None)}
+
+# Marks missing values (where None is a valid value).
+_missing = object()
+
+# Serialises static log contexts (which are shared by all handlers).
+_static_log_context_json_backend = StdlibJsonBackend(convert_values=True)
+
+# Used by the (deprecated) best_effort_json_encode function.
+_best_effort_json_backend = StdlibJsonBackend()
+_best_effort_json_default = create_json_default()
+
+# Global log properties with special meaning in the CLEF format.
+_clef_property_names = {
+    'trace_id': '@tr',
+    'span_id': '@sp'
+}
+
 
 def get_global_log_properties(logger_name=None):
     """
@@ -72,6 +106,7 @@ def set_global_log_properties(**properties):
     global _global_log_props, _global_log_props_is_raw_dict
     _global_log_props_is_raw_dict = not any(callable(v) for v in properties.values())
     _global_log_props = copy.copy(properties)
+    _invalidate_static_log_contexts()
 
 
 def reset_global_log_properties():
@@ -82,6 +117,7 @@ def reset_global_log_properties():
     global _global_log_props, _global_log_props_is_raw_dict
     _global_log_props_is_raw_dict = True
     _global_log_props = _default_global_log_props
+    _invalidate_static_log_contexts()
 
 
 def clear_global_log_properties():
@@ -92,6 +128,7 @@ def clear_global_log_properties():
     global _global_log_props, _global_log_props_is_raw_dict
     _global_log_props_is_raw_dict = True
     _global_log_props = {}
+    _invalidate_static_log_contexts()
 
 
 def set_callback_on_failure(callback):  # type: (tp.Callable[[Exception], None]) -> None
@@ -107,13 +144,131 @@ def set_callback_on_failure(callback):  # type: (tp.Callable[[Exception], None])
     _callback_on_failure = callback
 
 
+class _StaticLogContext:
+    """
+    The static (non-callable) global log properties and logger name for a logger, with pre-serialised JSON fragments.
+
+    Static contexts are immutable; changing the global log properties creates new ones.
+    """
+
+    __slots__ = ('version', 'properties', 'dynamic_properties', 'clef_properties', 'ingest_json', 'clef_json')
+
+    def __init__(self, logger_name, global_log_props, version):
+        """
+        Create a new `_StaticLogContext`.
+
+        :param logger_name: The logger name (if any).
+        :param global_log_props: The global log properties.
+        :param version: The global log properties version that the context represents.
+        """
+
+        self.version = version
+
+        properties = {}
+        self.dynamic_properties = {}
+        for name, value in global_log_props.items():
+            if callable(value):
+                self.dynamic_properties[name] = value
+            else:
+                properties[name] = convert_value(value)
+
+        if logger_name:
+            properties["LoggerName"] = logger_name
+
+        self.properties = properties
+        self.clef_properties = {
+            _clef_property_names.get(name, name): value
+            for name, value in properties.items()
+        }
+
+        # Properties as JSON object members (i.e. without the enclosing braces), ready to be spliced into an event.
+        self.ingest_json = _static_log_context_json_backend.dumps(self.properties)[1:-1]
+        self.clef_json = _static_log_context_json_backend.dumps(self.clef_properties)[1:-1]
+
+    def get_dynamic_properties(self):
+        """
+        Evaluate the dynamic (callable) global log properties.
+
+        :return: A new dictionary containing the values of dynamic properties (callables that return None are omitted).
+        :rtype: dict
+        """
+
+        dynamic_properties = {}
+        for name, get_value in self.dynamic_properties.items():
+            value = get_value()
+            if value is not None:
+                dynamic_properties[name] = value
+
+        return dynamic_properties
+
+    def create_log_properties(self):
+        """
+        Create the log properties for a new log entry (the static properties, followed by the values of dynamic properties).
+
+        :return: A new dictionary containing the properties.
+        :rtype: dict
+        """
+
+        log_properties = dict(self.properties)
+        log_properties.update(self.get_dynamic_properties())
+
+        return log_properties
+
+    def get_own_properties(self, log_properties):
+        """
+        Get the log properties that do not come from this context (i.e. that were not copied from its static properties).
+
+        Static properties are serialised separately (see `ingest_json` and `clef_json`), with lower precedence than other properties.
+
+        :param log_properties: The log properties for a log entry created with this context.
+        :type log_properties: dict
+        :return: The properties (other than those copied from the static properties).
+        :rtype: dict
+        """
+
+        static_properties = self.properties
+
+        return {
+            name: value for name, value in log_properties.items()
+            if static_properties.get(name, _missing) is not value
+        }
+
+
+def _get_static_log_context(logger_name):
+    """
+    Get the (cached) static log context for the specified logger.
+
+    :param logger_name: The logger name (if any).
+    :type logger_name: str
+    :return: The static log context.
+    :rtype: _StaticLogContext
+    """
+
+    static_log_context = _static_log_contexts.get(logger_name)
+    if static_log_context is None or static_log_context.version != _global_log_props_version:
+        static_log_context = _StaticLogContext(logger_name, _global_log_props, _global_log_props_version)
+        _static_log_contexts[logger_name] = static_log_context
+
+    return static_log_context
+
+
+def _invalidate_static_log_contexts():
+    """
+    Invalidate cached static log contexts (called when the global log properties change).
+    """
+
+    global _global_log_props_version
+    _global_log_props_version += 1
+    _static_log_contexts.clear()
+
+
 class StructuredLogRecord(logging.LogRecord):
     """
     An extended LogRecord that with custom properties to be logged to Seq.
     """
 
     def __init__(self, name, level, pathname, lineno, msg, args,
-                 exc_info, func=None, sinfo=None, log_props=None, **kwargs):
+                 exc_info, func=None, sinfo=None, log_props=None, log_context=None, **kwargs):
 
         """
         Create a new StructuredLogRecord.
@@ -127,12 +282,18 @@ class StructuredLogRecord(logging.LogRecord):
         :param func: The function (if known) where the log entry was created.
         :param sinfo: Stack trace information (if known) for the log entry.
         :param log_props: Named message format arguments (if any).
+        :param log_context: The static log context (global log properties and logger name), if any, for the logger that produced the log record.
+                            Ambient log properties (see `seqlog.context`) are captured when the record is created.
         :param kwargs: Keyword (named) message format arguments.
         """
 
         super().__init__(name, level, pathname, lineno, msg, args, exc_info, func, sinfo, **kwargs)
 
         self.log_props = log_props or {}
+        self.log_context = log_context
+
+        # Capture (by reference) the ambient log properties for the current thread / asyncio task.
+        self.ambient_props = get_ambient_log_properties()
 
         if self.thread and "ThreadId" not in self.log_props:
             self.log_props["ThreadId"] = self.thread
@@ -155,9 +316,18 @@ class StructuredLogRecord(logging.LogRecord):
 
         if self.args:
             return self.msg % self.args
+        elif self.log_context or self.ambient_props:
+            try:
+                return strip_capture_hints(self.msg).format_map(ChainMap(
+                    self.log_props,
+                    self.ambient_props or {},
+                    self.log_context.properties if self.log_context else {}
+                ))
+            except (KeyError, IndexError, ValueError):
+                return self.msg
         elif self.log_props:
             try:
-                return self.msg.format(**self.log_props)
+                return strip_capture_hints(self.msg).format(**self.log_props)
             except (KeyError, IndexError, ValueError):
                 # IndexError because sometimes the wrong log messages go like {existing_prop[0]}
                 return self.msg   # handle the situation where we have braces in the logging value
@@ -189,7 +359,51 @@ class StructuredLogRecord(logging.LogRecord):
             return self.msg
 
 
-class StructuredLogger(logging.Logger):
+class _RecordReplacingFilterer:
+    """
+    Mixin for loggers and handlers that applies filters the way that logging does from Python 3.12 onward:
+    a filter can return a log record to be used in place of the original (e.g. `seqlog.sampling.SamplingFilter`,
+    which attaches properties to a copy of the record, rather than to the record that other loggers and handlers receive).
+    """
+
+    def filter(self, record):
+        """
+        Apply the filters to a log record.
+
+        :param record: The LogRecord.
+        :return: The record (or the record returned by a filter in its place), if it should be logged; otherwise, `False`.
+        """
+
+        for log_filter in self.filters:
+            if hasattr(log_filter, 'filter'):
+                result = log_filter.filter(record)
+            else:
+                result = log_filter(record)
+
+            if not result:
+                return False
+
+            if isinstance(result, logging.LogRecord):
+                record = result
+
+        return record
+
+
+class _RecordReplacingLogger(_RecordReplacingFilterer):
+    """
+    Mixin for loggers that passes the record returned by their filters (see `_RecordReplacingFilterer`) to their handlers.
+    """
+
+    def handle(self, record):
+        if self.disabled:
+            return
+
+        record = self.filter(record)
+        if record:
+            self.callHandlers(record)
+
+
+class StructuredLogger(_RecordReplacingLogger, logging.Logger):
     """
     Custom (dummy) logger that understands named log arguments.
     """
@@ -203,9 +417,11 @@ class StructuredLogger(logging.Logger):
 
         super().__init__(name, level)
 
+        self._static_log_context = None
+
     @property
     def _support_extra_properties(self):
-        return is_feature_enabled(FeatureFlag.EXTRA_PROPERTIES)
+        return get_feature_snapshot().extra_properties
 
     def _log(self, level, msg, args, exc_info=None, extra=None, stack_info=False, **kwargs):
         """
@@ -225,8 +441,10 @@ class StructuredLogger(logging.Logger):
         # well-known ones used by the logging system itself) and move them
         # into the `extra` argument as a sub-dictionary.
 
-        # Start off with a copy of the global log properties.
-        log_props = get_global_log_properties(self.name)
+        # Static global log properties (and the logger name) are carried by the static log context (which serialises them once);
+        # log_props also includes them (as well as dynamic global log properties), so it represents all of the entry's properties.
+        static_log_context = self._get_static_log_context()
+        log_props = static_log_context.create_log_properties()
 
         # Add supplied keyword arguments.
         for prop in kwargs.keys():
@@ -241,9 +459,24 @@ class StructuredLogger(logging.Logger):
 
         extra = extra or {}
         extra['log_props'] = log_props
+        extra['log_context'] = static_log_context
 
         super()._log(level, msg, args, exc_info, extra, stack_info, stacklevel=2)
 
+    def _get_static_log_context(self):
+        """
+        Get the static log context (global log properties and logger name) for this logger.
+
+        :return: The static log context (cached until the global log properties change).
+        :rtype: _StaticLogContext
+        """
+
+        static_log_context = self._static_log_context
+        if static_log_context is None or static_log_context.version != _global_log_props_version:
+            static_log_context = self._static_log_context = _get_static_log_context(self.name)
+
+        return static_log_context
+
     def makeRecord(self, name, level, fn, lno, msg, args, exc_info, func=None, extra=None, sinfo=None):
         """
         Create a LogRecord.
@@ -262,14 +495,14 @@ class StructuredLogger(logging.Logger):
 
         # Do we have named format arguments?
         if extra and 'log_props' in extra:
-            record = StructuredLogRecord(name, level, fn, lno, msg, args, exc_info, func, sinfo, extra['log_props'])
+            record = StructuredLogRecord(name, level, fn, lno, msg, args, exc_info, func, sinfo, extra['log_props'], extra.get('log_context'))
         else:
             record = super().makeRecord(name, level, fn, lno, msg, args, exc_info, func, extra, sinfo)
 
         return record
 
 
-class StructuredRootLogger(logging.RootLogger):
+class StructuredRootLogger(_RecordReplacingLogger, logging.RootLogger):
     """
     Custom root logger that understands named log arguments.
     """
@@ -299,7 +532,8 @@ class StructuredRootLogger(logging.RootLogger):
         # We take keyword arguments provided to public logger methods (except
         # well-known ones used by the logging system itself) and move them
         # into the `extra` argument as a sub-dictionary.
-        log_props = get_global_log_properties(self.name)
+        static_log_context = _get_static_log_context(self.name)
+        log_props = static_log_context.create_log_properties()
         for prop in kwargs.keys():
             if prop in _well_known_logger_kwargs:
                 continue
@@ -308,6 +542,7 @@ class StructuredRootLogger(logging.RootLogger):
 
         extra = extra or {}
         extra['log_props'] = log_props
+        extra['log_context'] = static_log_context
 
         super()._log(level, msg, args, exc_info, extra, stack_info)
 
@@ -329,366 +564,1366 @@ class StructuredRootLogger(logging.RootLogger):
 
         # Do we have named format arguments?
         if extra and 'log_props' in extra:
-            return StructuredLogRecord(name, level, fn, lno, msg, args, exc_info, func, sinfo, extra['log_props'])
+            return StructuredLogRecord(name, level, fn, lno, msg, args, exc_info, func, sinfo, extra['log_props'], extra.get('log_context'))
 
         return super().makeRecord(name, level, fn, lno, msg, args, exc_info, func, extra, sinfo)
 
 
-class ConsoleStructuredLogHandler(logging.Handler):
-    def __init__(self):
-        super().__init__()
-
-    def emit(self, record):
-        msg = self.format(record)
-
-        print(msg)
-        if hasattr(record, 'kwargs'):
-            print("\tLog entry properties: {}".format(repr(record.kwargs)))
-
-
-def best_effort_json_encode(arg):
-    # No encoding necessary for strings.
-    if isinstance(arg, str):
-        return arg
-
-    try:
-        json.dumps(arg)
-    except TypeError:
-        try:
-            return str(arg)
-        except TypeError:
-            try:
-                return repr(arg)
-            except TypeError:
-                return '<type %s>' % (type(arg), )
-    except ReferenceError:
-        return '<gone weak reference>'
-    else:
-        return arg
-
-
-class SeqLogHandler(logging.Handler):
+class _StructuredEventEncoding(_RecordReplacingFilterer):
     """
-    Log handler that posts to Seq.
+    Mixin for log handlers that encode log records as Seq events (in either the CLEF or api/events/raw format).
+
+    The handler must have a `json_backend` attribute (a `JsonBackend`), and a `_get_settings()` method that returns
+    the handler's current settings (with at least `use_clef` and `support_stack_info` fields).
+    If the handler has a `property_limits` attribute (a `PropertyLimits`), property values are truncated to fit within those limits.
     """
 
-    def __init__(self, server_url, api_key=None, batch_size=10, auto_flush_timeout=None, json_encoder_class=None):
-        """
-        Create a new `SeqLogHandler`.
+    property_limits = None  # type: PropertyLimits
 
-        :param server_url: The Seq server URL.
-        :param api_key: The Seq API key (if any).
-        :param batch_size: The number of messages to batch up before posting to Seq.
-        :param auto_flush_timeout: If specified, the time (in seconds) before
-                                   the current batch is automatically flushed.
-        :param json_encoder_class: The custom JSON encoder class (or fully-qualified class name), if any, to use.
+    def handle(self, record):
         """
+        Conditionally emit the specified log record (the record returned by the handler's filters is emitted in place of the original).
 
-        super().__init__()
-
-        self.base_server_url = server_url
-        if not self.base_server_url.endswith("/"):
-            self.base_server_url += "/"
-
-        self.session = requests.Session()
-
-        if api_key:
-            self.session.headers["X-Seq-ApiKey"] = api_key
-
-        json_encoder_class = json_encoder_class or json.encoder.JSONEncoder
-        self.json_encoder_class = _ensure_class(json_encoder_class, compatible_class=json.encoder.JSONEncoder)
-
-        self.log_queue = Queue()
-        self.consumer = QueueConsumer(
-            name="SeqLogHandler",
-            queue=self.log_queue,
-            callback=self.publish_log_batch,
-            batch_size=batch_size,
-            auto_flush_timeout=auto_flush_timeout
-        )
-        self.consumer.start()
-
-    @property
-    def server_url(self):
-        if self._use_clef:
-            return self.base_server_url + 'ingest/clef'
-        return self.base_server_url + 'api/events/raw'
-
-    @property
-    def _use_clef(self):
-        return is_feature_enabled(FeatureFlag.USE_CLEF)
-
-    @property
-    def _support_stack_info(self):
-        return is_feature_enabled(FeatureFlag.STACK_INFO)
-
-    @property
-    def _ignore_seq_submission_errors(self):
-        return is_feature_enabled(FeatureFlag.IGNORE_SEQ_SUBMISSION_ERRORS)
-
-    def flush(self):
-        try:
-            self.consumer.flush()
-        finally:
-            super().flush()
-
-    def emit(self, record):
-        """
-        Emit a log record.
+        Ambient log properties (see `seqlog.context`) are captured for records that do not already carry them
+        (such as records created by standard loggers).
 
         :param record: The LogRecord.
+        :return: The record that was emitted, or `False` if the record was filtered out.
         """
 
-        self.log_queue.put(record, block=False)
-
-    def close(self):
-        """
-        Close the log handler.
-        """
-
-        try:
-            if self.consumer.is_running:
-                self.consumer.stop()
-
-            # TODO: Implement QueueConsumer.join() so we can wait
-            # for processing to complete before closing the HTTP session
-
-            # self.consumer.join()
-
-            self.session.close()
-        finally:
-            super().close()
-
-    def publish_log_batch(self, batch):     # type: (tp.List[StructuredLogRecord]) -> None
-        """
-        Publish a batch of log records.
-
-        :param batch: A list representing the batch.
-        """
-        if not batch:
-            return
+        record = self.filter(record)
+        if record:
+            if not hasattr(record, 'ambient_props'):
+                # Not a StructuredLogRecord; capture ambient log properties while still on the thread / task that logged it.
+                record.ambient_props = get_ambient_log_properties()
 
-        processed_records = []
-        for record in batch:
-            resp = self._build_event_data(record)
+            self.acquire()
             try:
-                resp = json.dumps(resp, cls=self.json_encoder_class)
-            except TypeError:
-                # cannot serialize to JSON
-                # report an serialization error and continue serializing what you can
-                self.handleError(record)
-                continue
-            processed_records.append(resp)
-
-        if self._use_clef:
-            request_body_json = '\r\n'.join(processed_records)
-        else:
-            request_body_json = '{"Events": [%s]}' % (','.join(processed_records), )
+                self.emit(record)
+            finally:
+                self.release()
 
-        self.acquire()
-        response = None
-        try:
-            response = self.session.post(
-                self.server_url,
-                data=request_body_json,
-                headers={'Content-Type': "application/vnd.serilog.clef" if self._use_clef else 'application/json'},
-                stream=True  # prevent '362'
-            )
-            response.raise_for_status()
-        except requests.RequestException as requestFailed:
-            if not self._ignore_seq_submission_errors:
-                # Only notify for the first record in the batch, or we'll be generating too much noise.
-                self.handleError(batch[0])
+        return record
 
-                # Attempt to log error response
-                if not requestFailed.response:
-                    _log_logger_error('response from Seq was unavailable.', requestFailed)
-                elif not requestFailed.response.text:
-                    _log_logger_error('response body from Seq was empty.', requestFailed)
-                else:
-                    _log_logger_error('response body from Seq:\n\n{0}'.format(requestFailed.response.text), requestFailed)
-        finally:
-            self.release()
+    def _build_event_data(self, record, include_static_context=True, settings=None):
+        settings = settings or self._get_settings()
+        if settings.use_clef:
+            return self._build_event_data_clef(record, include_static_context, settings)
+        else:
+            return self._build_event_data_ingest(record, include_static_context, settings)
 
-    def handleError(self, record: StructuredLogRecord):
+    def _encode_event(self, record, settings=None):
         """
-        Handle errors which occur during an emit() call.
+        Serialise a log record as JSON, splicing in the pre-serialised static log context (global log properties and logger name).
 
-        :param record: The StructuredLogRecord being logged.
+        :param record: The LogRecord.
+        :type record: StructuredLogRecord
+        :param settings: The handler settings to use (if not specified, the handler's current settings are used).
+        :type settings: SeqLogHandlerSettings
+        :return: The UTF-8 encoded JSON representing the event.
+        :rtype: bytes
         """
 
-        exception = None
-
-        if _callback_on_failure:
-            _, exception, _ = sys.exc_info()
-
-        super().handleError(record)
-
-        if _callback_on_failure:
-            _callback_on_failure(exception)
-
-    def _build_event_data(self, record):
-        if self._use_clef:
-            return self._build_event_data_clef(record)
-        else:
-            return self._build_event_data_ingest(record)
+        return _BatchEncoder(self, settings or self._get_settings()).encode(record)
 
-    def _build_event_data_ingest(self, record):
+    def _build_event_data_ingest(self, record, include_static_context=True, settings=None):
         """
         Build an event data dictionary from the specified log record for submission to Seq in the api/events format
 
         :param record: The LogRecord.
         :type record: StructuredLogRecord
+        :param include_static_context: Include the static log context (global log properties and logger name) in the event's properties?
+        :type include_static_context: bool
+        :param settings: The handler settings to use (if not specified, the handler's current settings are used).
+        :type settings: SeqLogHandlerSettings
         :return: A dictionary containing event data representing the log record.
         :rtype: dict
         """
 
-        logger_name = record.name if record.name else None
-
-        if isinstance(record, StructuredLogRecord):
-            message_template = record.getMessageTemplate()
-        else:
-            message_template = record.getMessage()
+        settings = settings or self._get_settings()
+        static_log_context = _get_record_log_context(record)
 
         event_data = {
             "Timestamp": _get_local_timestamp(record),
             "Level": logging.getLevelName(record.levelno),
-            "MessageTemplate": message_template,
-            "Properties": get_global_log_properties(logger_name)
+            "MessageTemplate": _get_message_template(record)
         }
 
-        if hasattr(record, 'args'):
-            # Standard (unnamed) format arguments (use 0-based index as property name).
-            for (arg_index, arg) in enumerate(record.args or []):
-                event_data["Properties"][str(arg_index)] = arg
+        exception = self._get_exception_text(record, settings)
+        if exception is not None:
+            event_data["Exception"] = exception
 
-        if hasattr(record, 'log_props'):
-            # assume record is StructuredLogRecord
-            for prop_name in record.log_props.keys():
-                event_data["Properties"][prop_name] = record.log_props[prop_name]
+        properties = _get_event_properties(record, static_log_context, include_args=True, limits=self.property_limits)
 
-        for log_prop_name in event_data["Properties"].keys():
-            # bytes is not serialisable to JSON; encode appropriately.
-            log_prop = event_data["Properties"][log_prop_name]
-            arg = _encode_bytes_if_required(log_prop)
-            arg = best_effort_json_encode(arg)
-            event_data["Properties"][log_prop_name] = arg
+        if include_static_context:
+            properties = dict(static_log_context.properties, **properties)
 
-        if record.exc_text:
-            # Rendered exception has already been cached
-            event_data["Exception"] = record.exc_text
-        elif self._support_stack_info and record.stack_info and not record.exc_info:
-            # Feature flag is set: fall back to stack_info (sinfo) if exc_info is not present
-            event_data["Exception"] = record.stack_info
-        elif isinstance(record.exc_info, tuple):
-            # Exception info is present
-            if record.exc_info[0] is None and self._support_stack_info and record.stack_info:
-                event_data["Exception"] = "{0}--NoException\n{1}".format(logging.getLevelName(record.levelno), record.stack_info)
-            else:
-                event_data["Exception"] = record.exc_text = self.formatter.formatException(record.exc_info)
-        elif isinstance(record.exc_info, str):
-            event_data["Exception"] = record.exc_info
-        elif record.exc_info:
-            # Exception info needs to be captured
-            exc_info = sys.exc_info()
-            if exc_info and exc_info[0] is not None:
-                event_data["Exception"] = record.exc_text = self.formatter.formatException(record.exc_info)
+        # Properties must be the last member (static log context properties are spliced into it when serialising).
+        event_data["Properties"] = properties
 
         return event_data
 
-    def _build_event_data_clef(self, record):
+    def _build_event_data_clef(self, record, include_static_context=True, settings=None):
         """
         Build an event data dictionary from the specified log record for submission to Seq in the CLEF format
 
         :param record: The LogRecord.
         :type record: StructuredLogRecord
+        :param include_static_context: Include the static log context (global log properties and logger name) in the event?
+        :type include_static_context: bool
+        :param settings: The handler settings to use (if not specified, the handler's current settings are used).
+        :type settings: SeqLogHandlerSettings
         :return: A dictionary containing event data representing the log record.
         :rtype: dict
         """
 
-        logger_name = record.name if record.name else None
-
-        if isinstance(record, StructuredLogRecord):
-            message_template = record.getMessageTemplate()
-        else:
-            message_template = record.getMessage()
+        settings = settings or self._get_settings()
+        static_log_context = _get_record_log_context(record)
 
         event_data = {
             "@t": _get_local_timestamp(record, True),
             "@l": logging.getLevelName(record.levelno),
-            "@mt": message_template,
+            "@mt": _get_message_template(record),
         }
-        props = {}
-        for key, value in get_global_log_properties(logger_name).items():
-            if key == 'trace_id':
-                props['@tr'] = value
-            elif key == 'span_id':
-                props['@sp'] = value
-            else:
-                props[key] = value
-        event_data.update(**props)
+        if include_static_context:
+            event_data.update(static_log_context.clef_properties)
+
+        for log_prop_name, log_prop in _get_event_properties(record, static_log_context, limits=self.property_limits).items():
+            event_data[_clef_property_names.get(log_prop_name, log_prop_name)] = log_prop
 
         if hasattr(record, 'args'):
             # Standard (unnamed) format arguments (use 0-based index as property name).
             event_data["@r"] = [str(arg) for arg in record.args]
 
-        if hasattr(record, 'log_props'):
-            # assume record is StructuredLogRecord
-            event_data.update(**record.log_props)
+        exception = self._get_exception_text(record, settings)
+        if exception is not None:
+            event_data["@x"] = exception
+
+        return event_data
+
+    def _get_exception_text(self, record, settings):
+        """
+        Get the exception (or stack-trace) text, if any, for the specified log record.
 
-        for log_prop_name in event_data.keys():
-            # bytes is not serialisable to JSON; encode appropriately.
-            log_prop = _encode_bytes_if_required(event_data[log_prop_name])
-            log_prop = best_effort_json_encode(log_prop)
-            event_data[log_prop_name] = log_prop
+        :param record: The LogRecord.
+        :type record: StructuredLogRecord
+        :param settings: The handler settings to use.
+        :type settings: SeqLogHandlerSettings
+        :return: The exception text, or None if the record has no exception information.
+        :rtype: str
+        """
 
         if record.exc_text:
             # Rendered exception has already been cached
-            event_data["@x"] = record.exc_text
-        elif self._support_stack_info and record.stack_info and not record.exc_info:
+            return record.exc_text
+        elif settings.support_stack_info and record.stack_info and not record.exc_info:
             # Feature flag is set: fall back to stack_info (sinfo) if exc_info is not present
-            event_data["@x"] = record.stack_info
+            return record.stack_info
         elif isinstance(record.exc_info, tuple):
             # Exception info is present
-            if record.exc_info[0] is None and self._support_stack_info and record.stack_info:
-                event_data["@x"] = "{0}--NoException\n{1}".format(logging.getLevelName(record.levelno), record.stack_info)
+            if record.exc_info[0] is None and settings.support_stack_info and record.stack_info:
+                return "{0}--NoException\n{1}".format(logging.getLevelName(record.levelno), record.stack_info)
             else:
-                event_data["@x"] = record.exc_text = self.formatter.formatException(record.exc_info)
+                record.exc_text = (self.formatter or _default_formatter).formatException(record.exc_info)
+                return record.exc_text
         elif isinstance(record.exc_info, str):
-            event_data["@x"] = record.exc_info
+            return record.exc_info
         elif record.exc_info:
-            # Exception info needs to be captured
+            # Exception info needs to be captured (only meaningful on the thread that logged the record).
             exc_info = sys.exc_info()
             if exc_info and exc_info[0] is not None:
-                event_data["@x"] = record.exc_text = self.formatter.formatException(record.exc_info)
+                record.exc_text = (self.formatter or _default_formatter).formatException(exc_info)
+                return record.exc_text
 
-        return event_data
+        return None
 
 
-def _get_local_timestamp(record, use_clef=False):
+class StructuredStreamHandlerSettings(tp.NamedTuple):
     """
-    Get the record's UTC timestamp as an ISO-formatted date / time string.
-
-    :param record: The LogRecord.
-    :type record: StructuredLogRecord
-    :param use_clef: CLEF requires the time separator to be true ISO8601
-    :return: The ISO-formatted date / time string.
-    :rtype: str
+    An immutable snapshot of a structured stream handler's configuration.
     """
 
-    timestamp = datetime.fromtimestamp(
-        timestamp=record.created,
-        tz=tzlocal()
-    )
+    features: FeatureSnapshot  #: The global feature snapshot from which the settings were resolved.
+    use_clef: bool  #: Write events in the CLEF format (rather than the api/events/raw format)?
+    support_stack_info: bool  #: Attach stack-trace information (if available) to log entries?
 
-    return timestamp.isoformat(sep='T' if use_clef else ' ')
 
+class _StructuredStreamHandler(_StructuredEventEncoding, logging.StreamHandler):
+    """
+    Base class for log handlers that write log records to a stream (one line per record).
 
-def _ensure_class(class_or_class_name, compatible_class=None):
+    Records are written to the stream's buffer, which is only flushed once `flush_interval` has elapsed since the
+    previous flush, when a record at or above `flush_level` is written, or when the handler is flushed or closed.
+    Once the interval has elapsed, buffered records are flushed by the next log call or, if there is none, by a timer
+    (scheduled when the first record is buffered), so they are not left waiting while nothing else is logged.
     """
-    Ensure that the supplied value is either a class or a fully-qualified class name.
 
-    :param name: A class or a fully-qualified class name.
+    def __init__(self, stream=None, use_clef=True, json_encoder_class=None, json_backend='auto', support_stack_info=None,
+                 flush_interval=1.0, flush_level=logging.ERROR):
+        """
+        Create a new `_StructuredStreamHandler`.
+
+        :param stream: The stream (text or binary) to write to. If not specified, `sys.stdout` is used
+                       (whichever stream it refers to when each record is written, in case it is redirected).
+        :param use_clef: Encode events in the CLEF format (rather than the api/events/raw format)?
+        :param json_encoder_class: The custom JSON encoder class (or fully-qualified class name), if any, to use.
+        :param json_backend: The JSON encoder backend ('auto', 'orjson', 'ujson' or 'stdlib') used to serialise log entries.
+        :param support_stack_info: Attach stack-trace information (if available) to log entries?
+                                   If not specified, the global `FeatureFlag.STACK_INFO` feature flag is used.
+        :param flush_interval: The maximum time (in seconds) between flushes of the stream (0 flushes after every record).
+        :param flush_level: Flush the stream immediately after writing records at or above this level.
+        """
+
+        super().__init__(stream)
+        self._use_stdout = stream is None
+
+        if json_encoder_class:
+            json_encoder_class = _ensure_class(json_encoder_class, compatible_class=json.encoder.JSONEncoder)
+
+        self.json_backend = create_json_backend(json_backend, json_encoder_class, convert_values=True)
+        self.flush_interval = flush_interval
+        self.flush_level = resolve_level(flush_level)
+
+        self._use_clef = bool(use_clef)
+        self._support_stack_info = support_stack_info
+        self._settings = None
+        self._encoder = None
+        self._next_flush_at = time.monotonic() + flush_interval
+        self._flush_timer = None
+
+    @property
+    def stream(self):
+        """
+        The stream that the handler writes to.
+        """
+
+        # Like logging.lastResort, resolve sys.stdout when it is used (rather than when the handler was created).
+        return sys.stdout if self._use_stdout else self._stream
+
+    @stream.setter
+    def stream(self, stream):
+        self._stream = stream
+        self._use_stdout = False
+
+    @property
+    def settings(self):
+        """
+        The handler's current settings.
+
+        :rtype: StructuredStreamHandlerSettings
+        """
+
+        return self._get_settings()
+
+    def _get_settings(self):
+        """
+        Get the handler's current settings (re-resolving them if the global feature flags have changed).
+
+        :rtype: StructuredStreamHandlerSettings
+        """
+
+        features = get_feature_snapshot()
+        settings = self._settings
+        if settings is None or settings.features is not features:
+            support_stack_info = self._support_stack_info
+            if support_stack_info is None:
+                support_stack_info = features.stack_info
+
+            settings = self._settings = StructuredStreamHandlerSettings(features, self._use_clef, bool(support_stack_info))
+
+        return settings
+
+    def emit(self, record):
+        """
+        Write a log record to the stream.
+
+        :param record: The LogRecord.
+        """
+
+        try:
+            self._write_line(self._render(record))
+
+            if record.levelno >= self.flush_level or time.monotonic() >= self._next_flush_at:
+                self.flush()
+            else:
+                self._schedule_flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        """
+        Flush the stream.
+        """
+
+        self.acquire()
+        try:
+            super().flush()
+
+            self._encoder = None
+            self._next_flush_at = time.monotonic() + self.flush_interval
+
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        finally:
+            self.release()
+
+    def close(self):
+        """
+        Flush the stream and close the handler (the stream itself is not closed).
+        """
+
+        self.flush()
+        super().close()
+
+    def _schedule_flush(self):
+        """
+        Schedule a flush of the stream for when `flush_interval` has elapsed (unless one is already scheduled).
+        """
+
+        # A timer inherited from the parent process (after a fork) is not running in this process.
+        flush_timer = self._flush_timer
+        if flush_timer is None or not flush_timer.is_alive():
+            self._flush_timer = Timer(max(0.0, self._next_flush_at - time.monotonic()), self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _render(self, record):
+        """
+        Render a log record as a line of output (by default, an encoded event).
+
+        :param record: The LogRecord.
+        :return: The line (without a terminator), as either text or UTF-8 encoded bytes.
+        """
+
+        return self._get_encoder().encode(record)
+
+    def _get_encoder(self):
+        """
+        Get the event encoder (which, together with the parts of events that it has cached, is shared by all records written between flushes).
+
+        :rtype: _BatchEncoder
+        """
+
+        settings = self._get_settings()
+
+        encoder = self._encoder
+        if encoder is None or encoder.settings is not settings:
+            encoder = self._encoder = _BatchEncoder(self, settings)
+
+        return encoder
+
+    def _write_line(self, line):
+        """
+        Write a line (and the line terminator) to the stream.
+
+        :param line: The line, as either text or UTF-8 encoded bytes.
+        """
+
+        if isinstance(self.stream, (io.RawIOBase, io.BufferedIOBase)):
+            if isinstance(line, str):
+                line = line.encode('utf-8')
+
+            self.stream.write(line + b'\n')
+        else:
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+
+            self.stream.write(line + self.terminator)
+
+
+# Properties that ConsoleStructuredLogHandler omits when writing a record's properties as text.
+_console_bookkeeping_properties = frozenset(['ThreadId', 'ThreadName'])
+
+
+class ConsoleStructuredLogHandler(_StructuredStreamHandler):
+    """
+    Log handler that writes log records to the console (or another stream).
+
+    By default, each record is written as its formatted message, followed by its properties (if any);
+    records can also be written as CLEF or JSON (api/events/raw format) events, one per line.
+    """
+
+    def __init__(self, stream=None, output_format='text', show_properties=True, json_encoder_class=None,
+                 json_backend='auto', support_stack_info=None, flush_interval=1.0, flush_level=logging.ERROR):
+        """
+        Create a new `ConsoleStructuredLogHandler`.
+
+        :param stream: The stream (text or binary) to write to. If not specified, `sys.stdout` is used
+                       (whichever stream it refers to when each record is written, in case it is redirected).
+        :param output_format: The output format ('text', 'clef' or 'json').
+        :param show_properties: When writing text, also write the record's properties?
+        :param json_encoder_class: The custom JSON encoder class (or fully-qualified class name), if any, to use for 'clef' or 'json' output.
+        :param json_backend: The JSON encoder backend ('auto', 'orjson', 'ujson' or 'stdlib') to use for 'clef' or 'json' output.
+        :param support_stack_info: Attach stack-trace information (if available) to 'clef' or 'json' output?
+                                   If not specified, the global `FeatureFlag.STACK_INFO` feature flag is used.
+        :param flush_interval: The maximum time (in seconds) between flushes of the stream (0 flushes after every record).
+        :param flush_level: Flush the stream immediately after writing records at or above this level.
+        """
+
+        if output_format not in ('text', 'clef', 'json'):
+            raise ValueError("Unsupported output format: '{}'.".format(output_format))
+
+        super().__init__(
+            stream,
+            use_clef=output_format == 'clef',
+            json_encoder_class=json_encoder_class,
+            json_backend=json_backend,
+            support_stack_info=support_stack_info,
+            flush_interval=flush_interval,
+            flush_level=flush_level
+        )
+
+        self.output_format = output_format
+        self.show_properties = show_properties
+
+    def _render(self, record):
+        if self.output_format != 'text':
+            return super()._render(record)
+
+        msg = self.format(record)
+        if not self.show_properties:
+            return msg
+
+        properties = getattr(record, 'ambient_props', None) or {}
+        log_props = _get_own_log_props(record)
+        if log_props:
+            properties = dict(properties, **log_props)
+
+        # Properties that every StructuredLogRecord carries would only add noise to each line.
+        properties = {name: value for name, value in properties.items() if name not in _console_bookkeeping_properties}
+        if not properties:
+            return msg
+
+        return "{0}\n\tLog entry properties: {1}".format(msg, repr(properties))
+
+
+def best_effort_json_encode(arg):
+    """
+    Get a form of a value that can be serialised as JSON (or the value itself, if it can be serialised as-is).
+
+    Deprecated: `SeqLogHandler` now converts property values when it serialises log entries
+    (using the converters registered in `seqlog.converters`), so there is no need to call this function.
+    """
+
+    warnings.warn(
+        'best_effort_json_encode is deprecated; property values are converted using the converters registered in seqlog.converters.',
+        DeprecationWarning,
+        stacklevel=2
+    )
+
+    # No encoding necessary for strings.
+    if isinstance(arg, str):
+        return arg
+
+    try:
+        _best_effort_json_backend.dumps(arg)
+    except TypeError:
+        return _best_effort_json_default(arg)
+    except ReferenceError:
+        return '<gone weak reference>'
+    else:
+        return arg
+
+
+class SeqLogHandlerSettings(tp.NamedTuple):
+    """
+    An immutable snapshot of a `SeqLogHandler`'s configuration, resolved when the handler is (re)configured.
+    """
+
+    features: FeatureSnapshot  #: The global feature snapshot from which the settings were resolved.
+    use_clef: bool  #: Submit log entries using the CLEF format?
+    support_stack_info: bool  #: Attach stack-trace information (if available) to log entries?
+    ignore_seq_submission_errors: bool  #: Ignore errors encountered while sending log records to Seq?
+    server_url: str  #: The URL to which log entries are submitted.
+    content_type: str  #: The content type for submitted log entries.
+
+
+class SeqLogHandler(_StructuredEventEncoding, logging.Handler):
+    """
+    Log handler that posts to Seq.
+    """
+
+    def __init__(self, server_url, api_key=None, batch_size=10, auto_flush_timeout=None, json_encoder_class=None,
+                 duplicate_suppression_window=None, use_clef=None, support_stack_info=None,
+                 ignore_seq_submission_errors=None, compression=None, stream_request_body=False, json_backend='auto',
+                 transport=None, share_pipeline=True, priority_level=logging.ERROR, max_queue_size=None,
+                 flush_level=logging.ERROR, flush_on_crash=False, max_property_string_length=None,
+                 max_property_collection_length=None, max_property_depth=None, max_event_bytes=DEFAULT_MAX_EVENT_BYTES):
+        """
+        Create a new `SeqLogHandler`.
+
+        :param server_url: The Seq server URL.
+        :param api_key: The Seq API key (if any).
+        :param batch_size: The number of messages to batch up before posting to Seq.
+        :param auto_flush_timeout: If specified, the time (in seconds) before
+                                   the current batch is automatically flushed.
+        :param json_encoder_class: The custom JSON encoder class (or fully-qualified class name), if any, to use.
+        :param duplicate_suppression_window: If specified, the time window (in seconds) within which identical
+                                             log records are collapsed into a single event with a `RepeatCount`.
+        :param use_clef: Submit log entries using the CLEF format?
+                         If not specified, the global `FeatureFlag.USE_CLEF` feature flag is used.
+        :param support_stack_info: Attach stack-trace information (if available) to log entries?
+                                   If not specified, the global `FeatureFlag.STACK_INFO` feature flag is used.
+        :param ignore_seq_submission_errors: Ignore errors encountered while sending log records to Seq?
+                                             If not specified, the global `FeatureFlag.IGNORE_SEQ_SUBMISSION_ERRORS` feature flag is used.
+        :param compression: If specified, the compression method ('gzip') to apply to request bodies.
+        :param stream_request_body: Stream each request body to Seq in chunks as it is encoded
+                                    (rather than encoding the whole batch before sending it)?
+        :param json_backend: The JSON encoder backend ('orjson', 'ujson' or 'stdlib') used to serialise log entries.
+                             If 'auto' (the default), the fastest installed backend is used, unless a custom `json_encoder_class`
+                             is specified (in which case the 'stdlib' backend is used).
+        :param transport: The transport used to submit log entries to Seq: either a `SeqTransport` (which can be shared between handlers),
+                          or the name of a well-known transport ('requests', 'http2' or 'h2c'). If not specified, the 'requests' transport is used.
+        :param share_pipeline: Share a pipeline (queue, consumer thread and transport) with other handlers in this process
+                               that have the same server URL, API key and options (rather than creating a new pipeline)?
+        :param priority_level: Records at or above this level (a level number or name) bypass the queue of lower-priority records,
+                               and are published immediately. If None, all records share one queue.
+        :param max_queue_size: If specified, the maximum number of lower-priority records waiting to be published
+                               (once reached, further lower-priority records are dropped).
+        :param flush_level: Records at or above this level (a level number or name) cause the current batch to be published immediately.
+                            If None, batches are only published when they are full (or `auto_flush_timeout` has elapsed).
+        :param flush_on_crash: Install process-wide hooks (see `seqlog.pipeline.install_crash_flush_hooks`) that publish all waiting
+                               records on an uncaught exception, or when the process is terminated (SIGTERM)?
+        :param max_property_string_length: If specified, the maximum length of string property values (longer strings are truncated).
+        :param max_property_collection_length: If specified, the maximum number of items in list and dict property values.
+        :param max_property_depth: If specified, the maximum nesting depth of list and dict property values.
+        :param max_event_bytes: If specified, the maximum size (in bytes) of a serialised event (the largest properties are
+                                replaced with placeholders until the event fits). Defaults to 256KB (Seq's default limit).
+        """
+
+        super().__init__()
+
+        self.base_server_url = server_url
+        if not self.base_server_url.endswith("/"):
+            self.base_server_url += "/"
+
+        if json_encoder_class:
+            json_encoder_class = _ensure_class(json_encoder_class, compatible_class=json.encoder.JSONEncoder)
+
+        self.json_backend = create_json_backend(json_backend, json_encoder_class, convert_values=True)
+        self.json_encoder_class = json_encoder_class or json.encoder.JSONEncoder
+        self.stream_request_body = bool(stream_request_body)
+        self.property_limits = PropertyLimits(
+            max_string_length=max_property_string_length,
+            max_collection_length=max_property_collection_length,
+            max_depth=max_property_depth,
+            max_event_bytes=max_event_bytes
+        )
+
+        # The API key is sent with each request (rather than configured on the transport), since transports can be shared.
+        self._api_key = api_key
+
+        # Settings that have been configured for this handler (others follow the global feature flags).
+        self._settings_lock = RLock()
+        self._setting_overrides = _get_setting_overrides(use_clef, support_stack_info, ignore_seq_submission_errors)
+        self._settings = self._resolve_settings(get_feature_snapshot())
+
+        if priority_level is not None:
+            priority_level = resolve_level(priority_level)
+        if flush_level is not None:
+            flush_level = resolve_level(flush_level)
+
+        # Handlers with identical endpoints, credentials and options share a pipeline (queue, consumer thread and transport).
+        pipeline_key = None
+        if share_pipeline:
+            pipeline_key = (
+                self.base_server_url, api_key, batch_size, auto_flush_timeout, duplicate_suppression_window, use_clef,
+                support_stack_info, ignore_seq_submission_errors, compression, self.stream_request_body, json_backend,
+                json_encoder_class, transport, priority_level, max_queue_size, flush_level, self.property_limits
+            )
+
+        self._pipeline = get_pipeline(
+            self,
+            pipeline_key,
+            batch_size=batch_size,
+            auto_flush_timeout=auto_flush_timeout,
+            duplicate_suppression_window=duplicate_suppression_window,
+            compression=compression,
+            transport=transport,
+            priority_level=priority_level,
+            max_queue_size=max_queue_size,
+            flush_level=flush_level
+        )
+
+        if flush_on_crash:
+            install_crash_flush_hooks()
+
+    @property
+    def server_url(self):
+        return self._get_settings().server_url
+
+    @property
+    def pipeline(self):
+        """
+        The pipeline (queue, consumer thread and transport) used to submit log entries to Seq.
+
+        :rtype: SeqLogPipeline
+        """
+
+        return self._pipeline
+
+    @property
+    def transport(self):
+        """
+        The transport used to submit log entries to Seq (created on first use).
+
+        :rtype: SeqTransport
+        """
+
+        return self._pipeline.transport
+
+    @property
+    def log_queue(self):
+        return self._pipeline.log_queue
+
+    @property
+    def consumer(self):
+        return self._pipeline.consumer
+
+    @property
+    def metrics(self):
+        """
+        The pipeline metrics (shared by all handlers using the pipeline).
+
+        :rtype: HandlerMetrics
+        """
+
+        return self._pipeline.metrics
+
+    @property
+    def duplicate_suppressor(self):
+        return self._pipeline.duplicate_suppressor
+
+    @property
+    def session(self):
+        """
+        The `requests.Session` used to submit log entries (if the handler uses the 'requests' transport).
+        """
+
+        return getattr(self.transport, 'session', None)
+
+    @session.setter
+    def session(self, session):
+        self.transport.session = session
+
+    @property
+    def settings(self):
+        """
+        The handler's current settings.
+
+        :rtype: SeqLogHandlerSettings
+        """
+
+        return self._get_settings()
+
+    @property
+    def _use_clef(self):
+        return self._get_settings().use_clef
+
+    @property
+    def _support_stack_info(self):
+        return self._get_settings().support_stack_info
+
+    @property
+    def _ignore_seq_submission_errors(self):
+        return self._get_settings().ignore_seq_submission_errors
+
+    def reconfigure(self, use_clef=None, support_stack_info=None, ignore_seq_submission_errors=None):
+        """
+        Reconfigure the handler, atomically replacing its settings.
+
+        Settings that have not been configured for the handler follow the corresponding global feature flags.
+        Batches that are already being published continue to use the settings they started with.
+        If the handler shares its pipeline with other handlers, and its settings change, it stops sharing the pipeline
+        (the other handlers keep their settings).
+
+        :param use_clef: Submit log entries using the CLEF format? If None, the setting is left unchanged.
+        :type use_clef: bool
+        :param support_stack_info: Attach stack-trace information (if available) to log entries? If None, the setting is left unchanged.
+        :type support_stack_info: bool
+        :param ignore_seq_submission_errors: Ignore errors encountered while sending log records to Seq? If None, the setting is left unchanged.
+        :type ignore_seq_submission_errors: bool
+        :return: The new settings.
+        :rtype: SeqLogHandlerSettings
+        """
+
+        with self._settings_lock:
+            setting_overrides = dict(
+                self._setting_overrides,
+                **_get_setting_overrides(use_clef, support_stack_info, ignore_seq_submission_errors)
+            )
+            if setting_overrides != self._setting_overrides:
+                # Handlers share a pipeline because their settings match (and batches are published using the publisher's settings).
+                self._pipeline = unshare_pipeline(self, self._pipeline)
+                self._setting_overrides = setting_overrides
+
+            self._settings = self._resolve_settings(get_feature_snapshot())
+
+            return self._settings
+
+    def _get_settings(self):
+        """
+        Get the handler's current settings (re-resolving them if the global feature flags have changed).
+
+        :return: The current settings.
+        :rtype: SeqLogHandlerSettings
+        """
+
+        settings = self._settings
+        features = get_feature_snapshot()
+        if settings.features is features:
+            return settings
+
+        with self._settings_lock:
+            if self._settings.features is not features:
+                self._settings = self._resolve_settings(features)
+
+            return self._settings
+
+    def reset_after_fork(self):
+        """
+        Reset the handler's process-specific state in a child process (after `fork`); called by the handler's pipeline.
+        """
+
+        # The lock may have been held by another thread in the parent process when it forked.
+        self._settings_lock = RLock()
+
+    def _resolve_settings(self, features):
+        """
+        Resolve the handler's settings from the global feature flags and any handler-specific settings.
+
+        :param features: The global feature snapshot.
+        :type features: FeatureSnapshot
+        :return: The resolved settings.
+        :rtype: SeqLogHandlerSettings
+        """
+
+        overrides = self._setting_overrides
+        use_clef = overrides.get('use_clef', features.use_clef)
+
+        return SeqLogHandlerSettings(
+            features=features,
+            use_clef=use_clef,
+            support_stack_info=overrides.get('support_stack_info', features.stack_info),
+            ignore_seq_submission_errors=overrides.get('ignore_seq_submission_errors', features.ignore_seq_submission_errors),
+            server_url=self.base_server_url + ('ingest/clef' if use_clef else 'api/events/raw'),
+            content_type='application/vnd.serilog.clef' if use_clef else 'application/json'
+        )
+
+    def flush(self):
+        try:
+            self._pipeline.flush()
+        finally:
+            super().flush()
+
+    def emit(self, record):
+        """
+        Emit a log record.
+
+        :param record: The LogRecord.
+        """
+
+        try:
+            self._pipeline.enqueue(self._detach_exception_info(record))
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def _detach_exception_info(self, record):
+        """
+        Render a log record's exception information (if any) on the thread that logged it,
+        so the queued record does not keep the traceback (and every frame it references) alive until it is published.
+
+        :param record: The LogRecord.
+        :return: The record (if it has no exception information), or a copy of it with the exception rendered as `exc_text`.
+        :rtype: logging.LogRecord
+        """
+
+        exc_info = record.exc_info
+        if not exc_info or isinstance(exc_info, str):
+            return record
+
+        if not isinstance(exc_info, tuple):
+            # exc_info=True on a record that was created directly (rather than by a logger).
+            exc_info = sys.exc_info()
+
+        # Other handlers may still need the original exception information, so only the queued copy is detached from it.
+        detached_record = copy.copy(record)
+        if exc_info[0] is None:
+            detached_record.exc_info = (None, None, None)
+        else:
+            # Like logging.Formatter, cache the rendered exception on the record (so other handlers can reuse it).
+            if not record.exc_text:
+                record.exc_text = (self.formatter or _default_formatter).formatException(exc_info)
+
+            detached_record.exc_text = record.exc_text
+            detached_record.exc_info = None
+
+        return detached_record
+
+    def close(self):
+        """
+        Close the log handler.
+        """
+
+        try:
+            # Records already emitted are still published (by the last handler using the pipeline to be closed).
+            self._pipeline.remove_handler(self)
+        finally:
+            super().close()
+
+    def publish_log_batch(self, batch):     # type: (tp.List[StructuredLogRecord]) -> None
+        """
+        Publish a batch of log records.
+
+        :param batch: A list representing the batch.
+        """
+        if not batch:
+            return
+
+        # Use the same settings for the whole batch (even if the handler is reconfigured while it is being published).
+        settings = self._get_settings()
+
+        with self._pipeline.borrow_body_writer() as writer:
+            if self.stream_request_body:
+                self._stream_log_batch(batch, settings, writer)
+            else:
+                self._post_log_batch(batch, settings, writer)
+
+    def _post_log_batch(self, batch, settings, writer):
+        """
+        Encode a batch of log records into the request body buffer, then post it to Seq.
+
+        :param batch: A list representing the batch.
+        :param settings: The settings to use for the batch.
+        :param writer: The `RequestBodyWriter` for the request body.
+        """
+
+        serialization_started = time.perf_counter()
+
+        writer.begin(settings.use_clef)
+        self._write_log_batch(writer, batch, _BatchEncoder(self, settings))
+        if not writer.event_count:
+            return
+
+        writer.finish()
+
+        self.metrics.observe("serialization_seconds", time.perf_counter() - serialization_started)
+        self.metrics.observe("batch_size", writer.event_count)
+
+        self._send_request_body(batch, settings, writer, writer.body())
+
+    def _stream_log_batch(self, batch, settings, writer):
+        """
+        Post a batch of log records to Seq, encoding them into the request body as it is sent.
+
+        Because the request starts before the batch has been encoded, the request body is sent chunked,
+        and records that cannot be encoded are skipped (rather than preventing the request from being sent).
+
+        :param batch: A list representing the batch.
+        :param settings: The settings to use for the batch.
+        :param writer: The `RequestBodyWriter` for the request body.
+        """
+
+        def request_body_chunks():
+            encoder = _BatchEncoder(self, settings)
+
+            writer.begin(settings.use_clef)
+            for record in batch:
+                self._write_log_batch(writer, [record], encoder)
+                if writer.pending_bytes >= DEFAULT_CHUNK_SIZE:
+                    yield writer.take()
+
+            writer.finish()
+            yield writer.take()
+
+            self.metrics.observe("batch_size", writer.event_count)
+
+        self._send_request_body(batch, settings, writer, request_body_chunks())
+
+    def _write_log_batch(self, writer, batch, encoder):
+        """
+        Encode log records into a request body.
+
+        Each record is encoded separately, so a record that cannot be encoded does not prevent the rest of the batch from being published.
+
+        :param writer: The `RequestBodyWriter` for the request body.
+        :param batch: The log records to encode.
+        :param encoder: The `_BatchEncoder` for the batch.
+        """
+
+        for record in batch:
+            try:
+                event_json = encoder.encode(record)
+            except TypeError:
+                # cannot serialize to JSON
+                # report an serialization error and continue serializing what you can
+                self.metrics.increment("events_dropped")
+                self.handleError(record)
+                continue
+
+            writer.write_event(event_json)
+
+    def _send_request_body(self, batch, settings, writer, request_body):
+        """
+        Post a request body (produced by a `RequestBodyWriter`) representing a batch of log records to Seq.
+
+        :param batch: A list representing the batch.
+        :param settings: The settings to use for the batch.
+        :param writer: The `RequestBodyWriter` that produced the request body.
+        :param request_body: The request body (a file-like object, or an iterable of chunks).
+        """
+
+        headers = {'Content-Type': settings.content_type}
+        if writer.content_encoding:
+            headers['Content-Encoding'] = writer.content_encoding
+        if self._api_key:
+            headers['X-Seq-ApiKey'] = self._api_key
+
+        # The handler lock is not held while posting (the transport is thread-safe), so logging calls are never blocked by a slow request.
+        try:
+            post_started = time.perf_counter()
+            self.transport.post(settings.server_url, request_body, headers)
+
+            self.metrics.observe("post_latency_seconds", time.perf_counter() - post_started)
+            self.metrics.increment("events_sent", writer.event_count)
+            self.metrics.increment("bytes_sent", writer.bytes_written)
+        except self.transport.errors as requestFailed:
+            # A streamed request body may have failed before all of the batch was encoded.
+            self.metrics.increment("events_failed", len(batch) if self.stream_request_body else writer.event_count)
+
+            if not settings.ignore_seq_submission_errors:
+                # Only notify for the first record in the batch, or we'll be generating too much noise.
+                self.handleError(batch[0])
+
+                # Attempt to log error response
+                response = getattr(requestFailed, 'response', None)
+                if response is None:
+                    _log_logger_error('response from Seq was unavailable.', requestFailed)
+                elif not response.text:
+                    _log_logger_error('response body from Seq was empty.', requestFailed)
+                else:
+                    _log_logger_error('response body from Seq:\n\n{0}'.format(response.text), requestFailed)
+
+    def handleError(self, record: StructuredLogRecord):
+        """
+        Handle errors which occur during an emit() call.
+
+        :param record: The StructuredLogRecord being logged.
+        """
+
+        exception = None
+
+        if _callback_on_failure:
+            _, exception, _ = sys.exc_info()
+
+        super().handleError(record)
+
+        if _callback_on_failure:
+            _callback_on_failure(exception)
+
+
+class _BatchEncoder:
+    """
+    Encodes the log records in a batch as JSON.
+
+    Parts of the event that are shared between records are computed once per batch, rather than once per record:
+    the level and message template members (pre-serialised for each distinct level and template), the static log context
+    (pre-serialised for each logger), and the date, time and UTC offset of the timestamp (for each distinct second).
+    """
+
+    def __init__(self, handler, settings):
+        """
+        Create a new `_BatchEncoder`.
+
+        :param handler: The `SeqLogHandler` that is publishing the batch.
+        :type handler: SeqLogHandler
+        :param settings: The settings to use for the batch.
+        :type settings: SeqLogHandlerSettings
+        """
+
+        self.handler = handler
+        self.settings = settings
+        self.json_backend = handler.json_backend
+        self.limits = handler.property_limits
+
+        if settings.use_clef:
+            self._header_names = ('@l', '@mt')
+        else:
+            self._header_names = ('Level', 'MessageTemplate')
+
+        self._headers = {}  # (levelno, message template) -> pre-serialised level and message template members.
+        self._timestamp_parts = {}  # whole seconds -> (date and time, UTC offset).
+
+    def encode(self, record):
+        """
+        Encode a log record as JSON.
+
+        :param record: The LogRecord.
+        :type record: StructuredLogRecord
+        :return: The UTF-8 encoded JSON representing the event.
+        :rtype: bytes
+        """
+
+        event_json = self._encode(record)
+
+        max_event_bytes = self.limits.max_event_bytes if self.limits else None
+        if max_event_bytes is not None and len(event_json) > max_event_bytes:
+            event_json = self._encode_within_limit(record, max_event_bytes)
+
+        return event_json
+
+    def _encode(self, record):
+        """
+        Encode a log record as JSON (applying any limits to individual property values).
+        """
+
+        settings = self.settings
+        static_log_context = _get_record_log_context(record)
+        header = self._get_header(record.levelno, _get_message_template(record))
+        exception = self.handler._get_exception_text(record, settings)
+
+        if settings.use_clef:
+            event_data = {"@t": self._get_timestamp(record.created, 'T')}
+            for log_prop_name, log_prop in _get_event_properties(record, static_log_context, limits=self.limits).items():
+                event_data[_clef_property_names.get(log_prop_name, log_prop_name)] = log_prop
+
+            if hasattr(record, 'args'):
+                # Standard (unnamed) format arguments (use 0-based index as property name).
+                event_data["@r"] = [str(arg) for arg in record.args]
+
+            if exception is not None:
+                event_data["@x"] = exception
+
+            if self._can_splice(event_data, static_log_context.clef_properties):
+                return _splice_json_members(
+                    _prepend_json_members(self.json_backend.dumps(event_data), header),
+                    static_log_context.clef_json
+                )
+        else:
+            event_data = {"Timestamp": self._get_timestamp(record.created, ' ')}
+            if exception is not None:
+                event_data["Exception"] = exception
+
+            properties = _get_event_properties(record, static_log_context, include_args=True, limits=self.limits)
+
+            # Properties must be the last member (static log context properties are spliced into it).
+            event_data["Properties"] = properties
+
+            if static_log_context.properties.keys().isdisjoint(properties):
+                return _splice_json_members(
+                    _prepend_json_members(self.json_backend.dumps(event_data), header),
+                    static_log_context.ingest_json,
+                    depth=2
+                )
+
+        # Some of the record's properties override shared ones with the same name, so they can't be spliced in.
+        return self.json_backend.dumps(self.handler._build_event_data(record, True, settings))
+
+    def _encode_within_limit(self, record, max_event_bytes):
+        """
+        Encode a log record that exceeds the maximum event size, replacing its largest properties
+        (and, if necessary, truncating its message template and exception) until it fits.
+
+        :param record: The LogRecord.
+        :param max_event_bytes: The maximum event size (in bytes).
+        :return: The UTF-8 encoded JSON representing the event.
+        :rtype: bytes
+        """
+
+        dumps = self.json_backend.dumps
+        event_data = self.handler._build_event_data(record, True, self.settings)
+
+        if self.settings.use_clef:
+            properties = event_data
+            truncatable_names = ('@mt', '@x')
+            property_names = [name for name in event_data if not name.startswith('@')]
+        else:
+            properties = event_data['Properties']
+            truncatable_names = ('MessageTemplate', 'Exception')
+            property_names = list(properties)
+
+        truncated_property_names = properties.pop(TRUNCATED_PROPERTIES_PROPERTY_NAME, [])
+        if TRUNCATED_PROPERTIES_PROPERTY_NAME in property_names:
+            property_names.remove(TRUNCATED_PROPERTIES_PROPERTY_NAME)
+
+        # The event is re-measured after each pass (including the property that lists the truncated properties).
+        properties[TRUNCATED_PROPERTIES_PROPERTY_NAME] = truncated_property_names
+        event_json = dumps(event_data)
+
+        while len(event_json) > max_event_bytes:
+            excess_bytes = len(event_json) - max_event_bytes
+
+            replaced_names, excess_bytes = shrink_members(
+                properties,
+                excess_bytes,
+                dumps,
+                [name for name in property_names if name not in truncated_property_names]
+            )
+            truncated_property_names += replaced_names
+
+            truncated_names = []
+            for name in truncatable_names:
+                value = event_data.get(name)
+                if excess_bytes <= 0 or not isinstance(value, str) or len(value) <= 3:
+                    continue
+
+                # Removing N characters removes at least N bytes.
+                event_data[name] = value[:max(0, len(value) - excess_bytes - 3)] + '...'
+                excess_bytes -= len(value.encode('utf-8')) - len(event_data[name].encode('utf-8'))
+                if name not in truncated_property_names:
+                    truncated_names.append(name)
+
+            truncated_property_names += truncated_names
+            properties[TRUNCATED_PROPERTIES_PROPERTY_NAME] = truncated_property_names
+
+            previous_size = len(event_json)
+            event_json = dumps(event_data)
+            if len(event_json) >= previous_size:
+                break  # Nothing left to truncate.
+
+        return event_json
+
+    def _can_splice(self, event_data, static_properties):
+        """
+        Determine whether the pre-serialised members can be spliced into the event (i.e. none of them are overridden by the event's own members).
+        """
+
+        return static_properties.keys().isdisjoint(event_data) and not any(name in event_data for name in self._header_names)
+
+    def _get_header(self, levelno, message_template):
+        """
+        Get the pre-serialised level and message template members for the specified level and message template.
+        """
+
+        header_key = (levelno, message_template)
+        header = self._headers.get(header_key)
+        if header is None:
+            level_name, message_template_name = self._header_names
+            header = self.json_backend.dumps({
+                level_name: logging.getLevelName(levelno),
+                message_template_name: message_template
+            })[1:-1]
+            self._headers[header_key] = header
+
+        return header
+
+    def _get_timestamp(self, created, sep):
+        """
+        Get a record creation time as an ISO-formatted local date / time string (equivalent to `_get_local_timestamp`).
+        """
+
+        # Split the creation time into whole seconds and microseconds, exactly as datetime.fromtimestamp() does.
+        fraction, seconds = math.modf(created)
+        microseconds = round(fraction * 1e6)
+        if microseconds >= 1000000:
+            seconds += 1
+            microseconds -= 1000000
+        elif microseconds < 0:
+            seconds -= 1
+            microseconds += 1000000
+
+        timestamp_parts = self._timestamp_parts.get(seconds)
+        if timestamp_parts is None:
+            timestamp = datetime.fromtimestamp(seconds).astimezone().isoformat(sep=sep)
+            timestamp_parts = self._timestamp_parts[seconds] = (timestamp[:19], timestamp[19:])
+
+        date_and_time, utc_offset = timestamp_parts
+        if not microseconds:
+            return date_and_time + utc_offset
+
+        return '{0}.{1:06d}{2}'.format(date_and_time, microseconds, utc_offset)
+
+
+def _get_message_template(record):
+    """
+    Get the message template for the specified log record.
+
+    :param record: The LogRecord.
+    :return: The message template (or, for records that do not have one, the formatted message).
+    :rtype: str
+    """
+
+    if isinstance(record, StructuredLogRecord):
+        return record.getMessageTemplate()
+
+    return record.getMessage()
+
+
+def _get_event_properties(record, static_log_context, include_args=False, limits=None):
+    """
+    Get the properties (other than the static log context) for the specified log record, encoded for serialisation as JSON.
+
+    Properties are combined in order of increasing precedence: dynamic global log properties, ambient properties,
+    standard format arguments (if requested) and the record's own properties.
+
+    :param record: The LogRecord.
+    :param static_log_context: The static log context for the record.
+    :type static_log_context: _StaticLogContext
+    :param include_args: Include standard (unnamed) format arguments (using their 0-based index as the property name)?
+    :param limits: If specified, property values that exceed these limits are truncated (and the names of the truncated
+                   properties are listed in the `TruncatedProperties` property).
+    :type limits: PropertyLimits
+    :return: A dictionary containing the properties.
+    :rtype: dict
+    """
+
+    if getattr(record, 'log_context', None):
+        # Dynamic global log properties were captured when the record was created.
+        properties = {}
+    else:
+        properties = static_log_context.get_dynamic_properties()
+
+    ambient_props = getattr(record, 'ambient_props', None)
+    if ambient_props:
+        properties.update(ambient_props)
+
+    if include_args and hasattr(record, 'args'):
+        # Standard (unnamed) format arguments (use 0-based index as property name).
+        for (arg_index, arg) in enumerate(record.args or []):
+            properties[str(arg_index)] = arg
+
+    if hasattr(record, 'log_props'):
+        # assume record is StructuredLogRecord
+        properties.update(_get_own_log_props(record))
+
+        if not record.args and isinstance(record.msg, str):
+            # Capture hints in the message template ("{@name}" or "{$name}") destructure or stringify the corresponding property values.
+            for log_prop_name, capture_hint in get_capture_hints(record.msg):
+                if log_prop_name in properties:
+                    properties[log_prop_name] = capture_value(properties[log_prop_name], capture_hint)
+
+    for log_prop_name, log_prop in properties.items():
+        if type(log_prop) in _json_primitive_types:
+            # No encoding necessary.
+            continue
+
+        # Values of types with a registered converter (such as bytes, UUIDs and datetimes) are converted here, so that limits apply to them;
+        # the JSON encoder converts any other values (including those nested within lists and dicts).
+        properties[log_prop_name] = convert_value(log_prop)
+
+    truncated_property_names = None
+    if limits is not None and limits.limits_values:
+        truncated_property_names = truncate_properties(properties, limits)
+
+    if truncated_property_names:
+        properties[TRUNCATED_PROPERTIES_PROPERTY_NAME] = truncated_property_names
+
+    return properties
+
+
+def _prepend_json_members(json_bytes, members):
+    """
+    Insert pre-serialised members at the start of a JSON object.
+
+    :param json_bytes: The UTF-8 encoded JSON representing the object.
+    :param members: The UTF-8 encoded members to insert (JSON object members, without the enclosing braces).
+    :return: The UTF-8 encoded JSON with the members inserted.
+    :rtype: bytes
+    """
+
+    tail = json_bytes[1:].lstrip()
+    separator = b'' if tail.startswith(b'}') else b','
+
+    return b''.join((b'{', members, separator, tail))
+
+
+def _get_local_timestamp(record, use_clef=False):
+    """
+    Get the record's UTC timestamp as an ISO-formatted date / time string.
+
+    :param record: The LogRecord.
+    :type record: StructuredLogRecord
+    :param use_clef: CLEF requires the time separator to be true ISO8601
+    :return: The ISO-formatted date / time string.
+    :rtype: str
+    """
+
+    # astimezone() attaches the local time zone (including its UTC offset at that moment).
+    timestamp = datetime.fromtimestamp(record.created).astimezone()
+
+    return timestamp.isoformat(sep='T' if use_clef else ' ')
+
+
+def _get_own_log_props(record):
+    """
+    Get the log properties for the specified log record, other than those copied from its static log context.
+
+    :param record: The LogRecord.
+    :return: A dictionary containing the properties.
+    :rtype: dict
+    """
+
+    log_props = getattr(record, 'log_props', None) or {}
+    log_context = getattr(record, 'log_context', None)
+    if log_context is None:
+        return log_props
+
+    return log_context.get_own_properties(log_props)
+
+
+def _get_record_log_context(record):
+    """
+    Get the static log context for the specified log record.
+
+    :param record: The LogRecord.
+    :return: The static log context captured when the record was created or, if there isn't one, the current static log context for the record's logger.
+    :rtype: _StaticLogContext
+    """
+
+    return getattr(record, 'log_context', None) or _get_static_log_context(record.name if record.name else None)
+
+
+def _splice_json_members(json_bytes, members, depth=1):
+    """
+    Insert pre-serialised members at the end of a JSON object.
+
+    :param json_bytes: The UTF-8 encoded JSON representing the outer object.
+    :param members: The UTF-8 encoded members to insert (JSON object members, without the enclosing braces).
+    :param depth: 1 to insert the members into the outer object, or 2 to insert them into the object that is the outer object's last member.
+    :return: The UTF-8 encoded JSON with the members inserted.
+    :rtype: bytes
+    """
+
+    if not members:
+        return json_bytes
+
+    end = len(json_bytes)
+    for _ in range(depth):
+        end = json_bytes.rindex(b'}', 0, end)
+
+    head = json_bytes[:end].rstrip()
+    separator = b'' if head.endswith(b'{') else b','
+
+    return b''.join((head, separator, members, json_bytes[end:]))
+
+
+def _get_setting_overrides(use_clef=None, support_stack_info=None, ignore_seq_submission_errors=None):
+    """
+    Get the handler settings that have been explicitly configured (those that are None follow the global feature flags).
+
+    :return: A dict of settings (by name).
+    :rtype: dict
+    """
+
+    overrides = {
+        'use_clef': use_clef,
+        'support_stack_info': support_stack_info,
+        'ignore_seq_submission_errors': ignore_seq_submission_errors
+    }
+
+    return {name: bool(value) for name, value in overrides.items() if value is not None}
+
+
+def _ensure_class(class_or_class_name, compatible_class=None):
+    """
+    Ensure that the supplied value is either a class or a fully-qualified class name.
+
+    :param name: A class or a fully-qualified class name.
     :param expected_base_class: If specified then the class must be, or (eventually) derive from, this class.
     :return: The class represented by class_or_class_name.
     """
@@ -725,27 +1960,6 @@ def _ensure_class(class_or_class_name, compatible_class=None):
     return target_class
 
 
-def _encode_bytes_if_required(data):
-    """
-    If the specified data is represented as bytes, convert it to a UTF8 string (using Base64 encoding if the bytes do not represent valid UTF8).
-
-    This is needed because json.dumps cannot serialise bytes.
-
-    :param data: The data to encode.
-    :return: If the data is represented as bytes, an equivalent UTF8 or Base64-encoded string; otherwise, the original data.
-    """
-
-    if (not isinstance(data, bytes)):
-        return data
-
-    try:
-        data = data.decode('utf8')
-    except UnicodeDecodeError:
-        data = base64.encodebytes(data).decode('ascii')
-
-    return data
-
-
 def _log_logger_error(message: str, exception: Exception = None):
     """
     Log an error encountered by a logger or logging infrastructure (if a failure callback has not been registered).
@@ -756,3 +1970,23 @@ def _log_logger_error(message: str, exception: Exception = None):
 
     if (not _callback_on_failure):
         sys.stderr.write('Logging error - {0}\n\n{1}\n\n'.format(message, exception))
+
+
+def _reset_after_fork():
+    """
+    Reset process-specific state in a child process (after `fork`).
+
+    SeqLogHandler pipelines are reset by `seqlog.pipeline`.
+    """
+
+    # The ProcessId global log property (unless it has been explicitly set to something other than the parent's PID) tracks the current process.
+    parent_process_id = _default_global_log_props["ProcessId"]
+    _default_global_log_props["ProcessId"] = os.getpid()
+    if _global_log_props.get("ProcessId") == parent_process_id:
+        _global_log_props["ProcessId"] = os.getpid()
+
+    _invalidate_static_log_contexts()
+
+
+if hasattr(os, 'register_at_fork'):  # Not available on Windows.
+    os.register_at_fork(after_in_child=_reset_after_fork)
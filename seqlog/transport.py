@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+
+import os
+import weakref
+
+# Live transports (reset in child processes after a fork, since their connections are shared with the parent process).
+_transports = weakref.WeakSet()
+
+# The size (in bytes) of the blocks in which Http2Transport sends request bodies.
+_body_block_size = 65536
+
+
+class SeqTransport:
+    """
+    The base class for transports that submit request bodies (batches of encoded log entries) to Seq.
+
+    A transport can be shared by several `SeqLogHandler`s (it must be safe to call `post` from multiple threads).
+    """
+
+    name = None  #: The transport name.
+
+    #: The exception types raised when a request body could not be submitted.
+    #: If Seq responded, the exception has a `response` attribute (the HTTP response, with a `text` attribute).
+    errors = ()
+
+    def post(self, url, body, headers):
+        """
+        Submit a request body to Seq.
+
+        :param url: The URL to post to.
+        :type url: str
+        :param body: The request body (either a file-like object with a known length, or an iterable of chunks).
+        :param headers: The request headers.
+        :type headers: dict
+        :raises: One of `errors`, if the request fails (or Seq responds with an error status code).
+        """
+
+        raise NotImplementedError()
+
+    def close(self):
+        """
+        Close the transport (and any connections that it holds open).
+        """
+
+        pass
+
+    def reset_after_fork(self):
+        """
+        Reset the transport in a child process (after `fork`), so that it does not use connections that belong to the parent process.
+        """
+
+        pass
+
+
+class RequestsTransport(SeqTransport):
+    """
+    Transport that submits each request body as a separate HTTP/1.1 POST (using a `requests.Session`, which keeps connections alive between requests).
+    """
+
+    name = 'requests'
+
+    def __init__(self, session=None):
+        """
+        Create a new `RequestsTransport`.
+
+        :param session: The `requests.Session` to use (if not specified, a new session is created).
+        """
+
+        import requests
+
+        self.session = session or requests.Session()
+        self.errors = (requests.RequestException,)
+
+        _transports.add(self)
+
+    def post(self, url, body, headers):
+        response = self.session.post(url, data=body, headers=headers, stream=True)  # stream=True prevents '362'
+
+        # Consume the (small) response body, so the connection is returned to the pool and reused for the next request.
+        response.content
+
+        response.raise_for_status()
+
+    def close(self):
+        self.session.close()
+
+    def reset_after_fork(self):
+        from requests.adapters import HTTPAdapter
+
+        for adapter in self.session.adapters.values():
+            if isinstance(adapter, HTTPAdapter):
+                # Round-tripping the adapter's (pickled) state replaces its connection pools with new ones, without closing
+                # the inherited connections (which belong to the parent process).
+                adapter.__setstate__(adapter.__getstate__())
+
+
+class Http2Transport(SeqTransport):
+    """
+    Transport that uses `httpx` to submit request bodies over HTTP/2 (where the server supports it; otherwise, over HTTP/1.1).
+
+    HTTP/2 is negotiated (via TLS) for https:// server URLs; plain-text (http://) server URLs use HTTP/1.1,
+    unless the transport is created with `http2_prior_knowledge=True` (or by the name 'h2c').
+
+    The transport does not make uploads concurrent: each pipeline lane (see `seqlog.pipeline.SeqLogPipeline`) posts its batches one at a time.
+    Requests are only multiplexed over a single connection when they come from different lanes or pipelines that share the transport
+    (for example, several handlers with different API keys).
+    Requires the `httpx` and `h2` packages (`pip install seqlog[http2]`).
+    """
+
+    name = 'http2'
+
+    def __init__(self, client=None, http2_prior_knowledge=False, timeout=30.0):
+        """
+        Create a new `Http2Transport`.
+
+        :param client: The `httpx.Client` to use (if not specified, a new client is created).
+        :param http2_prior_knowledge: Use HTTP/2 (without negotiation) for plain-text (http://) server URLs?
+                                      Only specify this if the server (or a proxy in front of it) accepts HTTP/2 without TLS.
+        :type http2_prior_knowledge: bool
+        :param timeout: The request timeout (in seconds).
+        :type timeout: float
+        """
+
+        import httpx
+
+        self.http2_prior_knowledge = http2_prior_knowledge
+
+        self._client_options = {'http1': not http2_prior_knowledge, 'http2': True, 'timeout': timeout}
+        self._owns_client = client is None
+
+        self.client = client or httpx.Client(**self._client_options)
+        self.errors = (httpx.HTTPError,)
+
+        _transports.add(self)
+
+    def post(self, url, body, headers):
+        if hasattr(body, 'read'):
+            # Send the body in blocks, rather than copying all of it first (its length is known, so it is not sent in chunks).
+            headers = dict(headers, **{'Content-Length': str(len(body))})
+            content = (bytes(block) for block in iter(lambda: body.read(_body_block_size), b''))
+        else:
+            content = (bytes(chunk) for chunk in body)
+
+        response = self.client.post(url, content=content, headers=headers)
+        response.raise_for_status()
+
+    def close(self):
+        self.client.close()
+
+    def reset_after_fork(self):
+        # A client supplied by the caller cannot be recreated (the caller must do so in the child process).
+        if self._owns_client:
+            import httpx
+
+            # The inherited client (and its connections) is abandoned, rather than closed, since its connections belong to the parent process.
+            self.client = httpx.Client(**self._client_options)
+
+
+class H2cTransport(Http2Transport):
+    """
+    Transport that uses `httpx` to submit request bodies over HTTP/2, using prior knowledge (rather than negotiation)
+    so that plain-text (http://) server URLs also use HTTP/2 ("h2c").
+
+    Only use this if the server (or a proxy in front of it) accepts HTTP/2 without TLS.
+    Requires the `httpx` and `h2` packages (`pip install seqlog[http2]`).
+    """
+
+    name = 'h2c'
+
+    def __init__(self, client=None, timeout=30.0):
+        """
+        Create a new `H2cTransport`.
+
+        :param client: The `httpx.Client` to use (if not specified, a new client is created).
+        :param timeout: The request timeout (in seconds).
+        :type timeout: float
+        """
+
+        super().__init__(client, http2_prior_knowledge=True, timeout=timeout)
+
+
+# Well-known transports.
+_transports_by_name = {
+    'requests': RequestsTransport,
+    'http2': Http2Transport,
+    'h2c': H2cTransport
+}
+
+
+def create_transport(transport=None):
+    """
+    Create (or resolve) a transport.
+
+    :param transport: A `SeqTransport` instance, or the name of a well-known transport ('requests', 'http2' or 'h2c').
+                      If not specified, the 'requests' transport is used.
+    :return: The transport.
+    :rtype: SeqTransport
+    """
+
+    if isinstance(transport, SeqTransport):
+        return transport
+
+    return _get_transport_class(transport)()
+
+
+def _get_transport_class(name):
+    """
+    Get the class for a well-known transport.
+
+    :param name: The transport name ('requests', 'http2' or 'h2c'). If not specified, the 'requests' transport is used.
+    :type name: str
+    :return: The transport class.
+    :raises ValueError: The transport name is not supported.
+    """
+
+    transport_class = _transports_by_name.get(name or 'requests')
+    if not transport_class:
+        raise ValueError("Unsupported transport: '{}'.".format(name))
+
+    return transport_class
+
+
+def _reset_transports_after_fork():
+    """
+    Reset all live transports in a child process (after `fork`).
+    """
+
+    for transport in list(_transports):
+        transport.reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):  # Not available on Windows.
+    os.register_at_fork(after_in_child=_reset_transports_after_fork)
@@ -17,7 +17,6 @@ with open('HISTORY.rst') as history_file:
     history = normalize_line_endings(history)
 
 requirements = [
-    'python_dateutil>=2.5.3',
     'requests>=2.10.0',
     'PyYAML>=3.11',
 ]
@@ -57,6 +56,11 @@ setup(
     },
     include_package_data=True,
     install_requires=requirements,
+    extras_require={
+        'orjson': ['orjson>=3.0.0'],
+        'ujson': ['ujson>=5.0.0'],
+        'http2': ['httpx[http2]>=0.23.0']
+    },
     license="MIT license",
     zip_safe=False,
     keywords='seqlog',
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from seqlog.feature_flags import FeatureFlag, configure_feature, is_feature_enabled
+from seqlog.json_backends import is_json_backend_available
+from seqlog.structured_logging import reset_global_log_properties
+from tests.seq_server import FakeSeqServer
+
+
+@pytest.fixture(params=[False, True], ids=['raw', 'clef'])
+def use_clef(request):
+    """
+    Run the test once for each submission format (api/events/raw and CLEF).
+    """
+
+    previous_value = is_feature_enabled(FeatureFlag.USE_CLEF)
+    configure_feature(FeatureFlag.USE_CLEF, request.param)
+    yield request.param
+    configure_feature(FeatureFlag.USE_CLEF, previous_value)
+
+
+@pytest.fixture
+def global_log_properties():
+    """
+    Restore the default global log properties once the test is complete.
+    """
+
+    yield
+    reset_global_log_properties()
+
+
+@pytest.fixture
+def seq_server():
+    """
+    A fake Seq server (that requires the API key 'test-api-key') for the duration of the test.
+    """
+
+    with FakeSeqServer(api_key='test-api-key') as server:
+        yield server
+
+
+@pytest.fixture(params=['stdlib', 'orjson', 'ujson'])
+def backend_name(request):
+    """
+    Run the test once for each well-known JSON backend (tests for backends that are not installed are skipped).
+    """
+
+    if not is_json_backend_available(request.param):
+        pytest.skip("JSON backend '{}' is not installed.".format(request.param))
+
+    return request.param
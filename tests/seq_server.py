@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+
+"""
+A lightweight, in-process fake Seq server for tests and benchmarks.
+
+Accepts events via `api/events/raw` (JSON) and `ingest/clef` (newline-delimited CLEF), validates their payloads,
+and records them. Failure modes (API-key rejection, latency, 429 / 503 responses, connection resets and request-size
+limits) can be injected so that throughput, retry and outage behaviour can be tested without a real Seq instance.
+"""
+
+import gzip
+import json
+import socket
+import struct
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+
+
+class FakeSeqServer:
+    """
+    A fake Seq server, listening on a loopback port.
+    """
+
+    def __init__(self, api_key=None, latency=0, max_request_size=None, host='127.0.0.1', port=0):
+        """
+        Create a new `FakeSeqServer`.
+
+        :param api_key: If specified, requests must supply this API key (via the X-Seq-ApiKey header or the apiKey query parameter).
+        :param latency: An artificial delay (in seconds) before each response.
+        :param max_request_size: If specified, requests with bodies larger than this (in bytes) are rejected with 413.
+        :param host: The host address to listen on.
+        :param port: The port to listen on (0 to pick a free port).
+        """
+
+        self.api_key = api_key
+        self.latency = latency
+        self.max_request_size = max_request_size
+
+        self.events = []
+        self.requests = []
+
+        self._lock = Lock()
+        self._scripted_failures = []
+
+        self._server = ThreadingHTTPServer((host, port), _FakeSeqRequestHandler)
+        self._server.daemon_threads = True
+        self._server.fake_seq = self
+        self._server_thread = None
+
+    @property
+    def url(self):
+        """
+        The server's base URL.
+        """
+
+        host, port = self._server.server_address[:2]
+
+        return 'http://{}:{}/'.format(host, port)
+
+    def start(self):
+        """
+        Start the server (on a background thread).
+
+        :return: The server.
+        """
+
+        self._server_thread = Thread(name='Fake Seq server', target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        self._server_thread.start()
+
+        return self
+
+    def stop(self):
+        """
+        Stop the server.
+        """
+
+        self._server.shutdown()
+        self._server.server_close()
+        if self._server_thread:
+            self._server_thread.join()
+
+    def fail_next(self, status, count=1, retry_after=None):
+        """
+        Respond to the next `count` requests with the specified HTTP status code (e.g. 429 or 503).
+
+        :param status: The HTTP status code.
+        :param count: The number of requests to fail.
+        :param retry_after: An optional value for the Retry-After response header.
+        """
+
+        with self._lock:
+            self._scripted_failures.extend([(status, retry_after)] * count)
+
+    def reset_next(self, count=1):
+        """
+        Reset the connection (without responding) for the next `count` requests.
+
+        :param count: The number of requests whose connections will be reset.
+        """
+
+        with self._lock:
+            self._scripted_failures.extend([('reset', None)] * count)
+
+    def wait_for_events(self, count, timeout=5.0):
+        """
+        Wait until at least `count` events have been received.
+
+        :param count: The expected number of events.
+        :param timeout: The maximum time (in seconds) to wait.
+        :return: `True`, if the expected number of events was received; otherwise, `False`.
+        """
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if len(self.events) >= count:
+                    return True
+
+            time.sleep(0.01)
+
+        return False
+
+    def _next_scripted_failure(self):
+        with self._lock:
+            if self._scripted_failures:
+                return self._scripted_failures.pop(0)
+
+        return None
+
+    def _record(self, path, headers, body_size, events, client_address=None):
+        with self._lock:
+            self.requests.append({
+                'path': path,
+                'headers': dict(headers),
+                'body_size': body_size,
+                'event_count': len(events),
+                'client_address': client_address
+            })
+            self.events.extend(events)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+class PayloadError(Exception):
+    """
+    Raised when a request payload is not valid for the target endpoint.
+    """
+
+
+class _FakeSeqRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass  # Keep test output clean.
+
+    def do_POST(self):
+        fake_seq = self.server.fake_seq
+
+        try:
+            body = self._read_body()
+        except PayloadError as invalid_body:
+            self._respond(400, {'Error': str(invalid_body)})
+            return
+
+        path, _, query = self.path.partition('?')
+        path = '/' + path.strip('/')
+
+        if fake_seq.latency:
+            time.sleep(fake_seq.latency)
+
+        scripted_failure = fake_seq._next_scripted_failure()
+        if scripted_failure:
+            status, retry_after = scripted_failure
+            if status == 'reset':
+                self._reset_connection()
+                return
+
+            self._respond(status, {'Error': 'Scripted failure.'}, retry_after=retry_after)
+            return
+
+        if fake_seq.api_key is not None:
+            supplied_api_key = self.headers.get('X-Seq-ApiKey') or _get_query_parameter(query, 'apiKey')
+            if supplied_api_key != fake_seq.api_key:
+                self._respond(401, {'Error': 'Invalid API key.'})
+                return
+
+        if fake_seq.max_request_size is not None and len(body) > fake_seq.max_request_size:
+            self._respond(413, {'Error': 'Request too large.'})
+            return
+
+        try:
+            if path == '/api/events/raw':
+                events = _parse_raw_events(body)
+            elif path == '/ingest/clef':
+                events = _parse_clef_events(body)
+            else:
+                self._respond(404, {'Error': 'Not found.'})
+                return
+        except PayloadError as invalid_payload:
+            self._respond(400, {'Error': str(invalid_payload)})
+            return
+
+        fake_seq._record(path, self.headers, len(body), events, self.client_address)
+        self._respond(201, {'MinimumLevelAccepted': None})
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            body = self._read_chunked_body()
+        else:
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        if self.headers.get('Content-Encoding', '').lower() == 'gzip':
+            try:
+                body = gzip.decompress(body)
+            except OSError as invalid_gzip:
+                raise PayloadError('Invalid gzip body: {}'.format(invalid_gzip))
+
+        return body
+
+    def _read_chunked_body(self):
+        chunks = []
+        while True:
+            chunk_size = int(self.rfile.readline().split(b';', 1)[0].strip(), 16)
+            if chunk_size == 0:
+                # Discard trailers.
+                while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                    pass
+
+                return b''.join(chunks)
+
+            chunks.append(self.rfile.read(chunk_size))
+            self.rfile.readline()  # Trailing CRLF.
+
+    def _respond(self, status, body, retry_after=None):
+        response_body = json.dumps(body).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response_body)))
+        if retry_after is not None:
+            self.send_header('Retry-After', str(retry_after))
+        self.end_headers()
+        self.wfile.write(response_body)
+
+    def _reset_connection(self):
+        # SO_LINGER with a zero timeout causes close() to send RST rather than FIN.
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+        self.close_connection = True
+        self.connection.close()
+
+
+def _parse_raw_events(body):
+    """
+    Parse and validate an `api/events/raw` request body.
+    """
+
+    try:
+        payload = json.loads(body.decode('utf-8'))
+    except ValueError as invalid_json:
+        raise PayloadError('Invalid JSON: {}'.format(invalid_json))
+
+    if not isinstance(payload, dict) or not isinstance(payload.get('Events'), list):
+        raise PayloadError("Request body must be an object with an 'Events' array.")
+
+    for event in payload['Events']:
+        if not isinstance(event, dict):
+            raise PayloadError('Events must be objects.')
+        if 'Timestamp' not in event:
+            raise PayloadError("Event is missing 'Timestamp'.")
+        if 'MessageTemplate' not in event:
+            raise PayloadError("Event is missing 'MessageTemplate'.")
+        if not isinstance(event.get('Properties', {}), dict):
+            raise PayloadError("Event 'Properties' must be an object.")
+
+    return payload['Events']
+
+
+def _parse_clef_events(body):
+    """
+    Parse and validate an `ingest/clef` (newline-delimited CLEF) request body.
+    """
+
+    events = []
+    for line in body.decode('utf-8').splitlines():
+        if not line.strip():
+            continue
+
+        try:
+            event = json.loads(line)
+        except ValueError as invalid_json:
+            raise PayloadError('Invalid JSON on line {}: {}'.format(len(events) + 1, invalid_json))
+
+        if not isinstance(event, dict):
+            raise PayloadError('CLEF events must be objects.')
+        if '@t' not in event:
+            raise PayloadError("CLEF event is missing '@t'.")
+
+        events.append(event)
+
+    return events
+
+
+def _get_query_parameter(query, name):
+    for parameter in query.split('&'):
+        parameter_name, _, value = parameter.partition('=')
+        if parameter_name == name:
+            return value
+
+    return None
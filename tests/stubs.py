@@ -1,5 +1,30 @@
+import io
+import json
 import logging
 
+from seqlog import SeqLogHandler
+from seqlog.structured_logging import StructuredLogger, StructuredLogRecord
+
+
+class NotSerializable(object):
+    pass
+
+
+class CustomEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, NotSerializable):
+            return "<not serializable>"
+
+        return super().default(o)
+
+
+class FlushCountingStream(io.StringIO):
+    flush_count = 0
+
+    def flush(self):
+        self.flush_count += 1
+        super().flush()
+
 
 class StubStructuredLogHandler(logging.Handler):
     def __init__(self):
@@ -33,3 +58,49 @@ class StubStructuredLogHandler(logging.Handler):
         self.messages.append(
             self.format(record)
         )
+
+
+def create_test_log_record(message='Hello {name}!', level=logging.INFO, logger_name='test', exc_info=None, created=None, **log_props):
+    """
+    Create a StructuredLogRecord (without going through a logger).
+
+    :param created: An optional creation time (seconds since the epoch) for the record.
+    """
+
+    record = StructuredLogRecord(logger_name, level, '/dev/null', 1, message, (), exc_info, log_props=log_props)
+    if created is not None:
+        record.created = created
+
+    return record
+
+
+def create_handler(server_url='http://localhost:5341', api_key=None, on_error=None, created_handlers=None, **handler_options):
+    """
+    Create a SeqLogHandler.
+
+    :param on_error: An optional callable that replaces the handler's `handleError()`.
+    :param created_handlers: An optional list that the handler is appended to (so it can be closed when the test is complete).
+    """
+
+    handler = SeqLogHandler(server_url, api_key, **handler_options)
+    if on_error:
+        handler.handleError = on_error
+
+    if created_handlers is not None:
+        created_handlers.append(handler)
+
+    return handler
+
+
+def create_logged_record(message, **log_props):
+    """
+    Log a message via a StructuredLogger and capture the resulting record.
+    """
+
+    records = []
+
+    logger = StructuredLogger("test", logging.INFO)
+    logger.handle = records.append
+    logger.info(message, **log_props)
+
+    return records[0]
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_ambient
+----------------------------------
+
+Tests for ambient (scoped) log properties via `seqlog.context`.
+"""
+
+import ast
+import asyncio
+import io
+import json
+import logging
+from threading import Thread
+
+import seqlog
+from seqlog import ClefFileHandler, ClefStreamHandler, SeqLogHandler
+from seqlog.ambient import get_ambient_log_properties
+from seqlog.structured_logging import ConsoleStructuredLogHandler
+from tests.stubs import create_logged_record
+
+
+class TestAmbientLogProperties(object):
+    def test_nested_scopes(self):
+        assert get_ambient_log_properties() is None
+
+        with seqlog.context(trace_id="trace1", RequestId="request1"):
+            with seqlog.context(span_id="span2", RequestId="request2"):
+                assert get_ambient_log_properties() == {"trace_id": "trace1", "span_id": "span2", "RequestId": "request2"}
+
+            assert get_ambient_log_properties() == {"trace_id": "trace1", "RequestId": "request1"}
+
+        assert get_ambient_log_properties() is None
+
+    def test_threads_isolated(self):
+        observed = []
+
+        def log_from_thread():
+            observed.append(get_ambient_log_properties())
+
+        with seqlog.context(RequestId="request1"):
+            thread = Thread(target=log_from_thread)
+            thread.start()
+            thread.join()
+
+        assert observed == [None]
+
+    def test_asyncio_tasks_isolated(self):
+        async def handle_request(request_id):
+            with seqlog.context(RequestId=request_id):
+                await asyncio.sleep(0.01)
+
+                return get_ambient_log_properties()["RequestId"]
+
+        async def handle_requests():
+            return await asyncio.gather(*(handle_request(request_id) for request_id in ("a", "b", "c")))
+
+        assert asyncio.run(handle_requests()) == ["a", "b", "c"]
+
+    def test_captured_when_record_created(self):
+        with seqlog.context(RequestId="request1"):
+            record = create_logged_record("Handling {RequestId}")
+
+        assert record.ambient_props == {"RequestId": "request1"}
+        assert record.getMessage() == "Handling request1"
+
+    def test_trace_context_clef(self):
+        handler = SeqLogHandler("http://localhost:5341", use_clef=True)
+        try:
+            with seqlog.context(trace_id="4bf92f3577b34da6a3ce929d0e0e4736", span_id="00f067aa0ba902b7", RequestId="request1"):
+                record = create_logged_record("Hello")
+
+            encoded_event = json.loads(handler._encode_event(record))
+        finally:
+            handler.close()
+
+        assert encoded_event["@tr"] == "4bf92f3577b34da6a3ce929d0e0e4736"
+        assert encoded_event["@sp"] == "00f067aa0ba902b7"
+        assert encoded_event["RequestId"] == "request1"
+
+    def test_log_props_override_ambient_props(self):
+        handler = SeqLogHandler("http://localhost:5341", use_clef=False)
+        try:
+            with seqlog.context(RequestId="ambient"):
+                record = create_logged_record("Hello", RequestId="explicit")
+
+            encoded_event = json.loads(handler._encode_event(record))
+        finally:
+            handler.close()
+
+        assert encoded_event["Properties"]["RequestId"] == "explicit"
+
+
+class TestAmbientLogPropertiesWithStandardLoggers(object):
+    def test_clef_stream_handler(self):
+        stream = io.StringIO()
+        handler = ClefStreamHandler(stream)
+
+        with seqlog.context(RequestId="request1"):
+            create_standard_logger(handler).info("Hello")
+        handler.close()
+
+        assert json.loads(stream.getvalue())["RequestId"] == "request1"
+
+    def test_clef_file_handler(self, tmp_path):
+        handler = ClefFileHandler(tmp_path / "events.clef")
+
+        with seqlog.context(RequestId="request1"):
+            create_standard_logger(handler).info("Hello")
+        handler.close()
+
+        assert json.loads((tmp_path / "events.clef").read_text(encoding="utf-8"))["RequestId"] == "request1"
+
+    def test_console_handler(self):
+        stream = io.StringIO()
+        handler = ConsoleStructuredLogHandler(stream)
+
+        with seqlog.context(RequestId="request1"):
+            create_standard_logger(handler).info("Hello")
+        handler.close()
+
+        first_line, second_line = stream.getvalue().splitlines()
+        assert first_line == "Hello"
+        assert ast.literal_eval(second_line.partition(": ")[2])["RequestId"] == "request1"
+
+
+def create_standard_logger(handler):
+    # A standard logger (whatever logger class seqlog may have installed for logging.getLogger).
+    logger = logging.Logger("test_ambient_standard", logging.INFO)
+    logger.addHandler(handler)
+
+    return logger
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_clef
+----------------------------------
+
+Tests for `seqlog.clef` (local CLEF stream / file handlers).
+"""
+
+import io
+import json
+import logging
+import logging.config
+import sys
+
+from seqlog import ClefFileHandler, ClefStreamHandler
+from tests.stubs import FlushCountingStream, create_test_log_record
+
+
+class TestClefStreamHandler(object):
+    def test_text_stream(self):
+        stream = io.StringIO()
+        handler = ClefStreamHandler(stream, flush_interval=0)
+
+        handler.handle(create_test_log_record(name='wörld'))
+        handler.handle(create_test_log_record(name='moon'))
+
+        events = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert [event['name'] for event in events] == ['wörld', 'moon']
+        assert events[0]['@mt'] == 'Hello {name}!'
+        assert events[0]['@l'] == 'INFO'
+        assert events[0]['LoggerName'] == 'test'
+
+    def test_binary_stream(self):
+        stream = io.BytesIO()
+        handler = ClefStreamHandler(stream, flush_interval=0)
+
+        handler.handle(create_test_log_record(name='wörld'))
+
+        assert json.loads(stream.getvalue().decode('utf-8'))['name'] == 'wörld'
+
+    def test_defaults_to_stdout(self):
+        handler = ClefStreamHandler()
+
+        assert handler.stream is sys.stdout
+
+    def test_flushes_at_flush_level(self):
+        stream = FlushCountingStream()
+        handler = ClefStreamHandler(stream, flush_interval=3600, flush_level='WARNING')
+
+        handler.handle(create_test_log_record(name='world'))
+        assert stream.flush_count == 0
+
+        handler.handle(create_test_log_record(level=logging.WARNING, name='world'))
+        assert stream.flush_count == 1
+
+        handler.close()
+        assert stream.flush_count == 2
+        assert len(stream.getvalue().splitlines()) == 2
+
+    def test_exception(self):
+        stream = io.StringIO()
+        handler = ClefStreamHandler(stream)
+
+        try:
+            raise ValueError('Oops')
+        except ValueError:
+            handler.handle(create_test_log_record(level=logging.ERROR, exc_info=sys.exc_info(), name='world'))
+
+        assert 'ValueError: Oops' in json.loads(stream.getvalue())['@x']
+
+
+class TestClefFileHandler(object):
+    def test_write(self, tmp_path):
+        log_file = tmp_path / 'app.clef'
+        handler = ClefFileHandler(str(log_file))
+        try:
+            handler.handle(create_test_log_record(name='world'))
+        finally:
+            handler.close()
+
+        assert json.loads(log_file.read_text('utf-8'))['name'] == 'world'
+
+    def test_appends(self, tmp_path):
+        log_file = tmp_path / 'app.clef'
+        for name in ('world', 'moon'):
+            handler = ClefFileHandler(str(log_file))
+            handler.handle(create_test_log_record(name=name))
+            handler.close()
+
+        assert [json.loads(line)['name'] for line in log_file.read_text('utf-8').splitlines()] == ['world', 'moon']
+
+    def test_size_rotation(self, tmp_path):
+        log_file = tmp_path / 'app.clef'
+        handler = ClefFileHandler(str(log_file), max_bytes=1024, backup_count=2)
+        try:
+            for index in range(30):
+                handler.handle(create_test_log_record(name='x' * 100, index=index))
+        finally:
+            handler.close()
+
+        log_files = [log_file, tmp_path / 'app.clef.1', tmp_path / 'app.clef.2']
+        assert sorted(tmp_path.iterdir()) == sorted(log_files)
+
+        for rotated_file in log_files:
+            assert rotated_file.stat().st_size <= 1024
+
+        # Most recent events are in the current file, preceded by those in app.clef.1, then app.clef.2.
+        indexes = [
+            json.loads(line)['index']
+            for rotated_file in reversed(log_files)
+            for line in rotated_file.read_text('utf-8').splitlines()
+        ]
+        assert indexes == list(range(indexes[0], 30))
+
+    def test_size_rotation_without_backups(self, tmp_path):
+        log_file = tmp_path / 'app.clef'
+        handler = ClefFileHandler(str(log_file), max_bytes=1024)
+        try:
+            for index in range(30):
+                handler.handle(create_test_log_record(name='x' * 100, index=index))
+        finally:
+            handler.close()
+
+        assert list(tmp_path.iterdir()) == [log_file]
+        assert log_file.stat().st_size <= 1024
+
+    def test_interval_rotation(self, tmp_path, monkeypatch):
+        log_file = tmp_path / 'app.clef'
+        handler = ClefFileHandler(str(log_file), rotate_interval=60, backup_count=1)
+        try:
+            handler.handle(create_test_log_record(name='world'))
+
+            now = handler._rotate_at
+            monkeypatch.setattr('seqlog.clef.time.time', lambda: now)
+            handler.handle(create_test_log_record(name='moon'))
+        finally:
+            handler.close()
+
+        assert json.loads((tmp_path / 'app.clef.1').read_text('utf-8'))['name'] == 'world'
+        assert json.loads(log_file.read_text('utf-8'))['name'] == 'moon'
+
+    def test_dict_config(self, tmp_path):
+        log_file = tmp_path / 'app.clef'
+        logging.config.dictConfig({
+            'version': 1,
+            'handlers': {
+                'clef': {
+                    'class': 'seqlog.ClefFileHandler',
+                    'filename': str(log_file),
+                    'max_bytes': 1048576,
+                    'backup_count': 3,
+                    'flush_level': 'WARNING'
+                }
+            },
+            'loggers': {
+                'test_clef_file': {
+                    'handlers': ['clef'],
+                    'propagate': False
+                }
+            }
+        })
+
+        handler = logging.getLogger('test_clef_file').handlers[0]
+        try:
+            assert isinstance(handler, ClefFileHandler)
+            assert handler.flush_level == logging.WARNING
+        finally:
+            handler.close()
+
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_console_handler
+----------------------------------
+
+Tests for `seqlog.structured_logging.ConsoleStructuredLogHandler`.
+"""
+
+import ast
+import contextlib
+import io
+import json
+import logging
+import time
+
+import pytest
+
+import seqlog
+from seqlog.structured_logging import ConsoleStructuredLogHandler, StructuredLogger
+from tests.stubs import FlushCountingStream
+
+
+class TestConsoleStructuredLogHandler(object):
+    def test_renders_template_and_properties(self):
+        stream = io.StringIO()
+        handler = ConsoleStructuredLogHandler(stream)
+        handler.setFormatter(logging.Formatter('[%(levelname)s] %(message)s'))
+
+        create_logger(handler).info("Hello, {name}!", name="world")
+
+        first_line, second_line = stream.getvalue().splitlines()
+        assert first_line == "[INFO] Hello, world!"
+        assert second_line.startswith("\tLog entry properties: ")
+        assert ast.literal_eval(second_line.partition(": ")[2]) == {"name": "world"}
+
+    @pytest.mark.parametrize('message, args', [
+        ("Hello, world!", ()),
+        ("Hello, %s!", ("world",))
+    ])
+    def test_no_properties_line_without_user_properties(self, message, args):
+        stream = io.StringIO()
+        handler = ConsoleStructuredLogHandler(stream)
+
+        create_logger(handler).info(message, *args)
+
+        assert stream.getvalue() == "Hello, world!\n"
+
+    def test_includes_ambient_properties(self):
+        stream = io.StringIO()
+        handler = ConsoleStructuredLogHandler(stream)
+
+        with seqlog.context(RequestId="request1"):
+            create_logger(handler).info("Hello, {name}!", name="world")
+
+        first_line, second_line = stream.getvalue().splitlines()
+        assert first_line == "Hello, world!"
+        properties = ast.literal_eval(second_line.partition(": ")[2])
+        assert properties["RequestId"] == "request1"
+        assert properties["name"] == "world"
+
+    def test_hide_properties(self):
+        stream = io.StringIO()
+        handler = ConsoleStructuredLogHandler(stream, show_properties=False)
+
+        create_logger(handler).info("Hello, {name}!", name="world")
+
+        assert stream.getvalue() == "Hello, world!\n"
+
+    @pytest.mark.parametrize('output_format', ['clef', 'json'])
+    def test_event_output(self, output_format):
+        stream = io.StringIO()
+        handler = ConsoleStructuredLogHandler(stream, output_format=output_format)
+
+        logger = create_logger(handler)
+        logger.info("Hello, {name}!", name="world")
+        logger.info("Hello, {name}!", name="moon")
+
+        events = [json.loads(line) for line in stream.getvalue().splitlines()]
+        if output_format == 'clef':
+            assert [event["name"] for event in events] == ["world", "moon"]
+            assert events[0]["@mt"] == "Hello, {name}!"
+        else:
+            assert [event["Properties"]["name"] for event in events] == ["world", "moon"]
+            assert events[0]["MessageTemplate"] == "Hello, {name}!"
+
+    def test_unsupported_output_format(self):
+        with pytest.raises(ValueError):
+            ConsoleStructuredLogHandler(output_format='xml')
+
+    def test_buffered_until_flush_interval(self):
+        stream = FlushCountingStream()
+        handler = ConsoleStructuredLogHandler(stream, flush_interval=3600)
+
+        logger = create_logger(handler)
+        for index in range(100):
+            logger.info("Message {index}", index=index)
+
+        assert stream.flush_count == 0
+
+        logger.error("Failed")
+        assert stream.flush_count == 1
+
+        handler._next_flush_at = 0
+        logger.info("Hello")
+        assert stream.flush_count == 2
+
+    def test_flushed_by_timer(self):
+        stream = FlushCountingStream()
+        handler = ConsoleStructuredLogHandler(stream, flush_interval=0.05)
+        try:
+            create_logger(handler).info("Hello")
+
+            deadline = time.monotonic() + 5
+            while stream.flush_count == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            assert stream.flush_count == 1
+        finally:
+            handler.close()
+
+    def test_default_stream_follows_stdout(self):
+        handler = ConsoleStructuredLogHandler(show_properties=False)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()) as stdout:
+                create_logger(handler).info("Hello")
+                handler.flush()
+
+            assert stdout.getvalue() == "Hello\n"
+        finally:
+            handler.close()
+
+    def test_binary_stream(self):
+        stream = io.BytesIO()
+        handler = ConsoleStructuredLogHandler(stream, show_properties=False)
+
+        create_logger(handler).info("Hello, {name}!", name="wörld")
+
+        assert stream.getvalue() == "Hello, wörld!\n".encode('utf-8')
+
+
+def create_logger(handler):
+    logger = StructuredLogger("test_console", logging.INFO)
+    logger.addHandler(handler)
+
+    return logger
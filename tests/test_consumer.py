@@ -1,107 +1,147 @@
-#!/usr/bin/env python
-# -*- coding: utf-8 -*-
-
-"""
-test_seqlog
-----------------------------------
-
-Tests for `seqlog.consumer.QueueConsumer` module.
-"""
-import logging
-from queue import Queue
-from threading import Event
-from time import sleep
-
-import seqlog
-
-from seqlog.structured_logging import StructuredLogRecord
-
-from seqlog import SeqLogHandler
-from seqlog.consumer import QueueConsumer
-
-
-class TestLogRecordConsumer(object):
-
-    def test_callable_failures(self):
-        lh = SeqLogHandler('localhost')
-        le = StructuredLogRecord('test', logging.INFO, '/dev/null', 1, 'Hello world!', (), None)
-        callable_called = False
-
-        def handle_failure(e):
-            nonlocal callable_called
-            callable_called = True
-
-        seqlog.set_callback_on_failure(handle_failure)
-
-        lh.publish_log_batch([le])
-        assert callable_called
-
-    #
-    # Without flush timeout
-    #
-    def test_batchsize_2_pre_fill(self):
-        record_queue = Queue()
-        record_queue.put("Item1")
-        record_queue.put("Item2")
-
-        batch_received = Event()
-
-        def handler(record_batch):
-            assert len(record_batch) == 2, \
-                "Incorrect batch size (expected 2, but found {}.".format(len(record_batch))
-
-            batch_received.set()
-
-        consumer = QueueConsumer("Test Consumer", record_queue, handler, batch_size=2)
-        consumer.start()
-
-        batch_received.wait(timeout=2000)
-
-        consumer.stop()
-
-    def test_batchsize_2_post_fill(self):
-        record_queue = Queue()
-
-        batch_received = Event()
-
-        def handler(record_batch):
-            assert len(record_batch) == 2, \
-                "Incorrect batch size (expected 2, but found {}.".format(len(record_batch))
-
-            batch_received.set()
-
-        consumer = QueueConsumer("Test Consumer", record_queue, handler, batch_size=2)
-        consumer.start()
-
-        record_queue.put("Item1")
-        record_queue.put("Item2")
-
-        batch_received.wait(timeout=2000)
-
-        consumer.stop()
-
-    #
-    # With flush timeout
-    #
-    def test_batchsize_3_post_fill_flush_timeout(self):
-        record_queue = Queue()
-
-        batch_received = Event()
-
-        def handler(record_batch):
-            assert len(record_batch) == 2, \
-                "Incorrect batch size (expected 2, but found {}.".format(len(record_batch))
-
-            batch_received.set()
-
-        consumer = QueueConsumer("Test Consumer", record_queue, handler, batch_size=3, auto_flush_timeout=0.2)
-        consumer.start()
-
-        record_queue.put("Item1")
-        record_queue.put("Item2")
-        sleep(300 / 1000)
-        record_queue.put("Item3")
-
-        batch_received.wait(timeout=2000)
-
-        consumer.stop()
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_seqlog
+----------------------------------
+
+Tests for `seqlog.consumer.QueueConsumer` module.
+"""
+import logging
+from queue import Queue
+from threading import Event
+from time import sleep
+
+import seqlog
+
+from seqlog.structured_logging import StructuredLogRecord
+
+from seqlog import SeqLogHandler
+from seqlog.consumer import QueueConsumer
+
+
+class TestLogRecordConsumer(object):
+
+    def test_callable_failures(self):
+        lh = SeqLogHandler('localhost')
+        le = StructuredLogRecord('test', logging.INFO, '/dev/null', 1, 'Hello world!', (), None)
+        callable_called = False
+
+        def handle_failure(e):
+            nonlocal callable_called
+            callable_called = True
+
+        seqlog.set_callback_on_failure(handle_failure)
+
+        lh.publish_log_batch([le])
+        assert callable_called
+
+    #
+    # Without flush timeout
+    #
+    def test_batchsize_2_pre_fill(self):
+        record_queue = Queue()
+        record_queue.put("Item1")
+        record_queue.put("Item2")
+
+        batch_received = Event()
+
+        def handler(record_batch):
+            assert len(record_batch) == 2, \
+                "Incorrect batch size (expected 2, but found {}.".format(len(record_batch))
+
+            batch_received.set()
+
+        consumer = QueueConsumer("Test Consumer", record_queue, handler, batch_size=2)
+        consumer.start()
+
+        batch_received.wait(timeout=2000)
+
+        consumer.stop()
+
+    def test_batchsize_2_post_fill(self):
+        record_queue = Queue()
+
+        batch_received = Event()
+
+        def handler(record_batch):
+            assert len(record_batch) == 2, \
+                "Incorrect batch size (expected 2, but found {}.".format(len(record_batch))
+
+            batch_received.set()
+
+        consumer = QueueConsumer("Test Consumer", record_queue, handler, batch_size=2)
+        consumer.start()
+
+        record_queue.put("Item1")
+        record_queue.put("Item2")
+
+        batch_received.wait(timeout=2000)
+
+        consumer.stop()
+
+    #
+    # With flush timeout
+    #
+    def test_batchsize_3_post_fill_flush_timeout(self):
+        record_queue = Queue()
+
+        batch_received = Event()
+        batches = []
+
+        def handler(record_batch):
+            batches.append(record_batch)
+            batch_received.set()
+
+        consumer = QueueConsumer("Test Consumer", record_queue, handler, batch_size=3, auto_flush_timeout=0.2)
+        consumer.start()
+
+        record_queue.put("Item1")
+        record_queue.put("Item2")
+        sleep(300 / 1000)
+        record_queue.put("Item3")
+
+        batch_received.wait(timeout=2000)
+
+        consumer.stop()
+        consumer.consumer_thread.join(timeout=2)
+
+        # The first batch is published by the flush timeout (and the remaining record, when the consumer stops).
+        assert batches == [["Item1", "Item2"], ["Item3"]]
+
+    #
+    # Stopping
+    #
+    def test_stop_publishes_current_batch(self):
+        record_queue = Queue()
+        batches = []
+
+        consumer = QueueConsumer("Test Consumer", record_queue, batches.append, batch_size=10)
+        consumer.start()
+
+        for item_number in range(3):
+            record_queue.put("Item{}".format(item_number + 1))
+
+        consumer.stop()
+        consumer.consumer_thread.join(timeout=2)
+
+        assert batches == [["Item1", "Item2", "Item3"]]
+        assert not consumer.is_running
+
+    #
+    # Draining the queue
+    #
+    def test_drain_queue_respects_batchsize(self):
+        record_queue = Queue()
+        for item_number in range(5):
+            record_queue.put("Item{}".format(item_number + 1))
+
+        batches = []
+
+        consumer = QueueConsumer("Test Consumer", record_queue, batches.append, batch_size=2)
+        consumer.is_running = True  # Drain on this thread (without starting the consumer thread).
+
+        consumer.flush(drain_queue=True)
+
+        assert batches == [["Item1", "Item2"], ["Item3", "Item4"], ["Item5"]]
+        assert record_queue.empty()
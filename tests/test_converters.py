@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_converters
+----------------------------------
+
+Tests for `seqlog.converters` (per-type converters for property values that JSON does not support).
+"""
+
+import dataclasses
+import datetime
+import decimal
+import enum
+import json
+import uuid
+
+import pytest
+
+from seqlog import SeqLogHandler
+from seqlog.converters import (
+    convert_value, get_converter, overrides_native_types, register_converter, requires_conversion, unregister_converter
+)
+from seqlog.json_backends import create_json_backend
+from seqlog.structured_logging import best_effort_json_encode
+from tests.stubs import CustomEncoder, NotSerializable, create_test_log_record
+
+_test_uuid = uuid.UUID('12345678-1234-5678-1234-567812345678')
+
+
+class Color(enum.Enum):
+    RED = 'red'
+
+
+@dataclasses.dataclass
+class Point(object):
+    x: int
+    y: int
+
+
+class TestConverters(object):
+    @pytest.mark.parametrize('value, expected_value', [
+        (_test_uuid, '12345678-1234-5678-1234-567812345678'),
+        (datetime.datetime(2020, 1, 2, 3, 4, 5, 6000), '2020-01-02T03:04:05.006000'),
+        (datetime.date(2020, 1, 2), '2020-01-02'),
+        (datetime.time(3, 4, 5), '03:04:05'),
+        (decimal.Decimal('1.10'), '1.10'),
+        (Color.RED, 'red'),
+        (Point(1, 2), {'x': 1, 'y': 2}),
+        ({3, 1, 2}, [1, 2, 3]),
+        (b'bytes', 'bytes'),
+        (b'\xff', '/w==\n')
+    ])
+    def test_builtin_converters(self, value, expected_value):
+        assert convert_value(value) == expected_value
+
+    def test_unconverted_value(self):
+        value = NotSerializable()
+
+        assert convert_value(value) is value
+        assert get_converter(NotSerializable) is None
+
+    def test_registered_converter(self):
+        register_converter(NotSerializable, lambda value: '<registered>')
+        try:
+            assert convert_value(NotSerializable()) == '<registered>'
+        finally:
+            unregister_converter(NotSerializable)
+
+        assert get_converter(NotSerializable) is None
+
+    def test_most_derived_converter_wins(self):
+        class DerivedUUID(uuid.UUID):
+            pass
+
+        register_converter(DerivedUUID, lambda value: 'derived')
+        try:
+            assert convert_value(DerivedUUID(int=1)) == 'derived'
+            assert convert_value(_test_uuid) == str(_test_uuid)
+        finally:
+            unregister_converter(DerivedUUID)
+
+        assert convert_value(DerivedUUID(int=1)) == str(uuid.UUID(int=1))
+
+
+    def test_best_effort_json_encode_is_deprecated(self):
+        values = {'Name': 'value'}
+
+        with pytest.deprecated_call():
+            assert best_effort_json_encode(values) is values
+
+        with pytest.deprecated_call():
+            assert best_effort_json_encode(_test_uuid) == str(_test_uuid)
+
+    @pytest.mark.parametrize('data, expected_result', [
+        ({'Name': 'value', 'Values': [1, 2.5, True, None, ('a', 'b')], 'Nested': {1: {'Key': 'value'}}}, False),
+        ({'Values': [1, {'When': datetime.date(2020, 1, 2)}]}, True),
+        ({'Values': {(1, 2): 'tuple'}}, True),
+        ({'Value': Color.RED}, True),
+        ({'Value': decimal.Decimal('1.5')}, True)
+    ])
+    def test_requires_conversion(self, data, expected_result):
+        assert requires_conversion(data) == expected_result
+
+    def test_overrides_native_types(self):
+        native_types = (uuid.UUID, enum.Enum)
+        uuid_converter = get_converter(uuid.UUID)
+
+        assert not overrides_native_types(native_types, native_types)
+        assert overrides_native_types(native_types, (uuid.UUID, ))
+
+        register_converter(Color, lambda value: value.name)
+        try:
+            assert overrides_native_types(native_types, native_types)
+        finally:
+            unregister_converter(Color)
+
+        unregister_converter(uuid.UUID)
+        try:
+            assert overrides_native_types(native_types, native_types)
+        finally:
+            register_converter(uuid.UUID, uuid_converter)
+
+        assert not overrides_native_types(native_types, native_types)
+
+
+class TestConvertingBackends(object):
+    def test_nested_values_converted(self, backend_name):
+        backend = create_json_backend(backend_name, convert_values=True)
+        data = {
+            'Values': [_test_uuid, {'When': datetime.date(2020, 1, 2)}, (Color.RED, decimal.Decimal('1.5'))],
+            'Point': Point(1, 2),
+            'Other': NotSerializable()
+        }
+
+        assert json.loads(backend.dumps(data)) == {
+            'Values': [str(_test_uuid), {'When': '2020-01-02'}, ['red', '1.5']],
+            'Point': {'x': 1, 'y': 2},
+            'Other': str(data['Other'])
+        }
+
+    def test_registered_converter_overrides_native(self, backend_name):
+        backend = create_json_backend(backend_name, convert_values=True)
+        date_converter, uuid_converter = get_converter(datetime.date), get_converter(uuid.UUID)
+
+        register_converter(datetime.date, lambda value: value.strftime('%d/%m/%Y'))
+        register_converter(uuid.UUID, lambda value: value.hex)
+        try:
+            data = {'Values': [datetime.datetime(2020, 1, 2, 3, 4, 5), {'Id': _test_uuid}]}
+
+            assert json.loads(backend.dumps(data)) == {'Values': ['02/01/2020', {'Id': _test_uuid.hex}]}
+        finally:
+            register_converter(datetime.date, date_converter)
+            register_converter(uuid.UUID, uuid_converter)
+
+    def test_registered_enum_converter_overrides_native(self, backend_name):
+        backend = create_json_backend(backend_name, convert_values=True)
+
+        register_converter(Color, lambda value: value.name)
+        try:
+            assert json.loads(backend.dumps({'Values': [Color.RED, Point(1, 2)], 'Keys': {Color.RED: 1}})) == {
+                'Values': ['RED', {'x': 1, 'y': 2}],
+                'Keys': {'RED': 1}
+            }
+        finally:
+            unregister_converter(Color)
+
+        assert json.loads(backend.dumps({'Value': Color.RED})) == {'Value': 'red'}
+
+    def test_keys_converted(self, backend_name):
+        backend = create_json_backend(backend_name, convert_values=True)
+
+        assert json.loads(backend.dumps({'Values': {(1, 2): 'tuple', 3: 'integer'}})) == {'Values': {'(1, 2)': 'tuple', '3': 'integer'}}
+
+    def test_custom_encoder_is_fallback(self):
+        backend = create_json_backend('stdlib', CustomEncoder, convert_values=True)
+
+        assert json.loads(backend.dumps([NotSerializable(), _test_uuid, object])) == ['<not serializable>', str(_test_uuid), str(object)]
+
+    def test_properties_converted(self, backend_name, use_clef):
+        handler = SeqLogHandler('http://localhost:5341', json_backend=backend_name)
+        try:
+            record = create_test_log_record(name=_test_uuid, Items=[datetime.date(2020, 1, 2), b'bytes'], Color=Color.RED)
+            event = json.loads(handler._encode_event(record))
+            properties = event if use_clef else event['Properties']
+
+            assert properties['name'] == str(_test_uuid)
+            assert properties['Items'] == ['2020-01-02', 'bytes']
+            assert properties['Color'] == 'red'
+        finally:
+            handler.close()
+
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dedup
+----------------------------------
+
+Tests for `seqlog.dedup` module.
+"""
+
+import logging
+from queue import Queue
+from threading import Event
+
+from seqlog import SeqLogHandler
+from seqlog.consumer import QueueConsumer
+from seqlog.dedup import DuplicateEventSuppressor
+from seqlog.structured_logging import StructuredLogger
+from tests.stubs import StubStructuredLogHandler, create_test_log_record
+
+
+class TestDuplicateEventSuppressor(object):
+    def test_duplicates_collapsed(self):
+        suppressor = DuplicateEventSuppressor(window=60)
+
+        for created in (100.0, 101.0, 102.0):
+            assert suppressor.process(create_test_log_record("Health check {status}", created=created, status="OK")) == []
+
+        released = suppressor.drain()
+        assert len(released) == 1
+
+        log_props = released[0].log_props
+        assert log_props["RepeatCount"] == 3
+        assert log_props["FirstTimestamp"] < log_props["LastTimestamp"]
+
+    def test_distinct_properties_not_collapsed(self):
+        suppressor = DuplicateEventSuppressor(window=60)
+
+        suppressor.process(create_test_log_record("Health check {status}", created=100.0, status="OK"))
+        suppressor.process(create_test_log_record("Health check {status}", created=101.0, status="Degraded"))
+
+        released = suppressor.drain()
+        assert len(released) == 2
+        assert all("RepeatCount" not in record.log_props for record in released)
+
+    def test_window_expiry(self):
+        suppressor = DuplicateEventSuppressor(window=5)
+
+        suppressor.process(create_test_log_record("Retrying", created=100.0))
+        assert suppressor.expire(now=0) == []
+
+        released = suppressor.expire(now=float("inf"))
+        assert len(released) == 1
+
+    def test_records_with_exceptions_pass_through(self):
+        suppressor = DuplicateEventSuppressor(window=60)
+
+        record = create_test_log_record("Failed", created=100.0)
+        record.exc_text = "Traceback (most recent call last): ..."
+
+        assert suppressor.process(record) == [record]
+
+    def test_repeat_count_not_visible_to_other_handlers(self, seq_server):
+        other_handler = StubStructuredLogHandler()
+
+        seq_handler = SeqLogHandler(seq_server.url, "test-api-key", use_clef=True, duplicate_suppression_window=60)
+        try:
+            logger = StructuredLogger("test_dedup_handlers", logging.INFO)
+            logger.addHandler(seq_handler)
+            logger.addHandler(other_handler)
+            for _ in range(3):
+                logger.info("Health check {status}", status="OK")
+
+            seq_handler.log_queue.join()
+            seq_handler.flush()
+        finally:
+            seq_handler.close()
+
+        assert [event["RepeatCount"] for event in seq_server.events] == [3]
+        assert len(other_handler.records) == 3
+        assert not any("RepeatCount" in record.log_props for record in other_handler.records)
+
+    def test_consumer_stage(self):
+        record_queue = Queue()
+        batch_received = Event()
+        batches = []
+
+        def handler(record_batch):
+            batches.append(record_batch)
+            batch_received.set()
+
+        consumer = QueueConsumer("Test Consumer", record_queue, handler, batch_size=10,
+                                 stage=DuplicateEventSuppressor(window=60))
+        consumer.start()
+
+        for created in range(5):
+            record_queue.put(create_test_log_record("Retrying", created=float(created)))
+        record_queue.join()
+
+        consumer.flush()
+        batch_received.wait(timeout=2)
+        consumer.stop()
+
+        assert len(batches) == 1
+        assert len(batches[0]) == 1
+        assert batches[0][0].log_props["RepeatCount"] == 5
+
+    def test_consumer_stop_publishes_held_records(self):
+        record_queue = Queue()
+        batches = []
+
+        consumer = QueueConsumer("Test Consumer", record_queue, batches.append, batch_size=10,
+                                 stage=DuplicateEventSuppressor(window=60))
+        consumer.start()
+
+        for created in range(3):
+            record_queue.put(create_test_log_record("Retrying", created=float(created)))
+
+        consumer.stop()
+        consumer.consumer_thread.join(timeout=2)
+
+        assert len(batches) == 1
+        assert [record.log_props["RepeatCount"] for record in batches[0]] == [3]
+
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_destructuring
+----------------------------------
+
+Tests for `seqlog.destructuring` (capture hints in message templates, and destructuring of property values).
+"""
+
+import collections
+import dataclasses
+import json
+import uuid
+
+import pytest
+
+from seqlog import SeqLogHandler
+from seqlog.destructuring import capture_value, destructure, get_capture_hints, strip_capture_hints
+from tests.stubs import create_test_log_record
+
+Point = collections.namedtuple('Point', 'x y')
+
+
+class Order(object):
+    def __init__(self, order_id, lines=None):
+        self.id = order_id
+        self.lines = lines or []
+        self._secret = 'hidden'
+        self.parent = None
+
+    def __str__(self):
+        return 'Order #{}'.format(self.id)
+
+
+class Slotted(object):
+    __slots__ = ('name', 'value', '_private')
+
+    def __init__(self, name):
+        self.name = name
+        self._private = 'hidden'
+
+
+@dataclasses.dataclass
+class Customer(object):
+    name: str
+    order: Order
+
+
+class AttrsLike(object):
+    __attrs_attrs__ = (collections.namedtuple('Attribute', 'name')('name'),)
+
+    def __init__(self):
+        self.name = 'attrs'
+        self.other = 'not an attribute'
+
+
+class TestCaptureHints(object):
+    @pytest.mark.parametrize('message_template, expected_template, expected_hints', [
+        ('Hello {name}!', 'Hello {name}!', ()),
+        ('Placed {@order} for {$user}', 'Placed {order} for {user}', (('order', '@'), ('user', '$'))),
+        ('Total {@total:>10}', 'Total {total:>10}', (('total', '@'),)),
+        ('Literal {{@order}}', 'Literal {{@order}}', ()),
+        ('Escaped {{{@order}}}', 'Escaped {{{order}}}', (('order', '@'),))
+    ])
+    def test_parse(self, message_template, expected_template, expected_hints):
+        assert strip_capture_hints(message_template) == expected_template
+        assert get_capture_hints(message_template) == expected_hints
+
+    def test_stringify(self):
+        assert capture_value(Order(1), '$') == 'Order #1'
+        assert capture_value([1, 2], '$') == '[1, 2]'
+
+
+class TestDestructure(object):
+    def test_object(self):
+        assert destructure(Order(1, [{'sku': 'A1', 'quantity': 2}])) == {'id': 1, 'lines': [{'sku': 'A1', 'quantity': 2}], 'parent': None}
+
+    def test_slots(self):
+        assert destructure(Slotted('slotted')) == {'name': 'slotted'}
+
+    def test_attrs_class(self):
+        assert destructure(AttrsLike()) == {'name': 'attrs'}
+
+    def test_named_tuple(self):
+        assert destructure(Point(1, 2)) == {'x': 1, 'y': 2}
+
+    def test_converted_values(self):
+        customer_id = uuid.UUID(int=1)
+
+        assert destructure({'id': customer_id, 'customer': Customer('Zoë', Order(2))}) == {
+            'id': str(customer_id),
+            'customer': {'name': 'Zoë', 'order': {'id': 2, 'lines': [], 'parent': None}}
+        }
+
+    def test_max_depth(self):
+        order = Order(1, [[1]])
+        order.parent = order
+
+        assert destructure(order, max_depth=2) == {
+            'id': 1,
+            'lines': ['[...]'],
+            'parent': {'id': 1, 'lines': '[...]', 'parent': '{...}'}
+        }
+
+    def test_not_destructured(self):
+        assert destructure(object) == str(object)
+        assert destructure(len) == str(len)
+
+
+class TestCapturedProperties(object):
+    def test_capture_hints_applied(self, use_clef):
+        handler = SeqLogHandler('http://localhost:5341', use_clef=use_clef)
+        try:
+            record = create_test_log_record('Placed {@order} for {$user} ({total})', order=Order(1), user=Order(2), total=Order(3))
+            event = json.loads(handler._encode_event(record))
+            properties = event if use_clef else event['Properties']
+
+            assert (event['@mt'] if use_clef else event['MessageTemplate']) == 'Placed {@order} for {$user} ({total})'
+            assert properties['order'] == {'id': 1, 'lines': [], 'parent': None}
+            assert properties['user'] == 'Order #2'
+            assert properties['total'] == 'Order #3'
+        finally:
+            handler.close()
+
+    def test_message_formatted(self):
+        record = create_test_log_record('Placed {@order} for {$user}', order=Order(1), user='Zoë')
+
+        assert record.getMessage() == 'Placed Order #1 for Zoë'
+
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_encoding
+----------------------------------
+
+Tests for `seqlog.encoding` (request body writer).
+"""
+
+import gzip
+import json
+
+import pytest
+
+from seqlog.encoding import RequestBodyWriter
+
+
+class TestRequestBodyWriter(object):
+    def test_raw_body(self):
+        writer = RequestBodyWriter()
+        write_events(writer, False, ['{"A": 1}', '{"B": 2}'])
+
+        assert bytes(writer.body().read()) == b'{"Events": [{"A": 1},{"B": 2}]}'
+        assert writer.event_count == 2
+        assert writer.bytes_written == len(b'{"Events": [{"A": 1},{"B": 2}]}')
+
+    def test_clef_body(self):
+        writer = RequestBodyWriter()
+        write_events(writer, True, ['{"A": 1}', '{"B": "é"}'])
+
+        assert bytes(writer.body().read()) == '{"A": 1}\r\n{"B": "é"}'.encode('utf-8')
+
+    def test_gzip_body(self):
+        writer = RequestBodyWriter(compression='gzip')
+        write_events(writer, False, ['{"A": %d}' % index for index in range(1000)])
+
+        body = bytes(writer.body().read())
+
+        assert writer.content_encoding == 'gzip'
+        assert writer.bytes_written == len(body)
+        assert len(json.loads(gzip.decompress(body).decode('utf-8'))['Events']) == 1000
+
+    def test_unsupported_compression(self):
+        with pytest.raises(ValueError):
+            RequestBodyWriter(compression='brotli')
+
+    def test_buffer_reused(self):
+        writer = RequestBodyWriter()
+        write_events(writer, True, ['{"A": 1}', '{"B": 2}'])
+        buffer = writer._buffer
+
+        write_events(writer, True, ['{"C": 3}'])
+
+        assert writer._buffer is buffer
+        assert bytes(writer.body().read()) == b'{"C": 3}'
+
+    def test_large_buffer_released(self):
+        writer = RequestBodyWriter(retained_capacity=16)
+        write_events(writer, True, ['{"A": "%s"}' % ('x' * 32)])
+        buffer = writer._buffer
+
+        write_events(writer, True, ['{"B": 2}'])
+
+        assert writer._buffer is not buffer
+
+    def test_take(self):
+        writer = RequestBodyWriter()
+        writer.begin(use_clef=False)
+        writer.write_event('{"A": 1}')
+        chunks = [writer.take()]
+        writer.write_event('{"B": 2}')
+        writer.finish()
+        chunks.append(writer.take())
+
+        assert writer.pending_bytes == 0
+        assert b''.join(chunks) == b'{"Events": [{"A": 1},{"B": 2}]}'
+
+    def test_body_read_in_blocks(self):
+        writer = RequestBodyWriter()
+        write_events(writer, True, ['{"A": "%s"}' % ('x' * 10000)])
+        body = writer.body()
+
+        assert len(body) == 10009
+        assert b''.join(body) == b'{"A": "%s"}' % (b'x' * 10000)
+        assert len(body) == 0
+
+
+def write_events(writer, use_clef, events):
+    writer.begin(use_clef)
+    for event in events:
+        writer.write_event(event)
+    writer.finish()
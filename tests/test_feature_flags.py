@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_feature_flags
+----------------------------------
+
+Tests for `seqlog.feature_flags` module.
+"""
+
+import pytest
+
+from seqlog.feature_flags import FeatureFlag, configure_feature, configure_features, get_feature_snapshot, is_feature_enabled
+
+
+@pytest.fixture
+def restore_features():
+    features = get_feature_snapshot()
+    yield
+    configure_features({
+        FeatureFlag.EXTRA_PROPERTIES: features.extra_properties,
+        FeatureFlag.STACK_INFO: features.stack_info,
+        FeatureFlag.IGNORE_SEQ_SUBMISSION_ERRORS: features.ignore_seq_submission_errors,
+        FeatureFlag.USE_CLEF: features.use_clef
+    })
+
+
+class TestFeatureFlags(object):
+    def test_configure_feature(self, restore_features):
+        configure_feature(FeatureFlag.STACK_INFO, True)
+        assert is_feature_enabled(FeatureFlag.STACK_INFO)
+
+        configure_feature(FeatureFlag.STACK_INFO, None)
+        assert is_feature_enabled(FeatureFlag.STACK_INFO)
+
+        configure_feature(FeatureFlag.STACK_INFO, False)
+        assert not is_feature_enabled(FeatureFlag.STACK_INFO)
+
+    def test_snapshot_is_immutable(self, restore_features):
+        configure_feature(FeatureFlag.USE_CLEF, False)
+        snapshot = get_feature_snapshot()
+
+        configure_feature(FeatureFlag.USE_CLEF, True)
+
+        assert not snapshot.use_clef
+        assert get_feature_snapshot().use_clef
+
+    def test_configure_features_applied_together(self, restore_features):
+        snapshot = get_feature_snapshot()
+
+        configure_features({FeatureFlag.USE_CLEF: True, FeatureFlag.STACK_INFO: True, FeatureFlag.EXTRA_PROPERTIES: None})
+
+        new_snapshot = get_feature_snapshot()
+        assert new_snapshot.use_clef and new_snapshot.stack_info
+        assert new_snapshot.extra_properties == snapshot.extra_properties
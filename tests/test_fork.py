@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_fork
+----------------------------------
+
+Tests for `SeqLogHandler` in child processes (after `fork`).
+"""
+
+import os
+
+import pytest
+
+from seqlog import SeqLogHandler
+from tests.stubs import create_test_log_record
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'register_at_fork'), reason='fork is not supported on this platform')
+
+
+class TestFork(object):
+    def test_child_process_publishes_own_events(self, seq_server):
+        handler = SeqLogHandler(seq_server.url, 'test-api-key', batch_size=10, auto_flush_timeout=60, use_clef=True)
+        try:
+            # Publish a batch first, so the parent's transport holds a pooled connection.
+            handler.publish_log_batch([create_test_log_record(name='parent-0')])
+
+            # Queued (but not yet published) in the parent process.
+            handler.handle(create_test_log_record(name='parent-1'))
+            handler.log_queue.join()
+            parent_queue = handler.log_queue
+
+            child_pid = os.fork()
+            if child_pid == 0:
+                os._exit(_run_child(handler, parent_queue))
+
+            _, status = os.waitpid(child_pid, 0)
+            assert os.WEXITSTATUS(status) == 0
+
+            handler.flush()
+            seq_server.wait_for_events(3)
+
+            process_ids = {event['name']: event['ProcessId'] for event in seq_server.events}
+            assert process_ids == {'parent-0': os.getpid(), 'parent-1': os.getpid(), 'child': child_pid}
+            assert len(seq_server.events) == 3
+        finally:
+            handler.close()
+
+
+def _run_child(handler, parent_queue):
+    # Runs in the child process; the return value is the child's exit status.
+    try:
+        assert handler.log_queue is not parent_queue
+        assert handler.consumer.current_batch == []
+        assert not handler.consumer.is_running
+
+        handler.handle(create_test_log_record(name='child'))
+        assert handler.consumer.is_running
+
+        handler.log_queue.join()
+        handler.flush()
+
+        return 0
+    except BaseException:
+        return 1
+
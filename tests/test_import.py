@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_import
+----------------------------------
+
+Tests for the cost of importing the `seqlog` module.
+"""
+
+import subprocess
+import sys
+
+
+class TestImport(object):
+    def test_heavy_dependencies_not_loaded_on_import(self):
+        """
+        Verify that importing seqlog (and logging to the console) does not load PyYAML, requests, or dateutil.
+        """
+
+        loaded_modules = _run_python(
+            "import sys, seqlog; "
+            "seqlog.log_to_console(); "
+            "print(','.join(sorted(name for name in ('yaml', 'requests', 'dateutil') if name in sys.modules)))"
+        )
+
+        assert loaded_modules == ''
+
+    def test_requests_loaded_when_transport_created(self):
+        """
+        Verify that creating a SeqLogHandler does not load requests (or start a thread) until it is used.
+        """
+
+        loaded_modules = _run_python(
+            "import sys, threading, seqlog; "
+            "handler = seqlog.SeqLogHandler('http://localhost:5341'); "
+            "print('requests' in sys.modules, threading.active_count()); "
+            "handler.transport; "
+            "print('requests' in sys.modules)"
+        )
+
+        assert loaded_modules.splitlines() == ['False 1', 'True']
+
+
+def _run_python(code):
+    return subprocess.check_output([sys.executable, '-c', code], universal_newlines=True).strip()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_json_backends
+----------------------------------
+
+Conformance tests for `seqlog.json_backends` (every installed backend must produce equivalent JSON).
+"""
+
+import json
+
+import pytest
+
+from seqlog import SeqLogHandler
+from seqlog.json_backends import StdlibJsonBackend, create_json_backend, is_json_backend_available
+from seqlog.structured_logging import set_global_log_properties
+from tests.stubs import CustomEncoder, NotSerializable, create_test_log_record
+
+# Event data that all backends must serialise identically (once parsed).
+_conformance_data = [
+    {},
+    {"Message": "Hello, world!"},
+    {"Unicode": "Zoë ünïcödé 日本語 🚀", "Escapes": "quote \" backslash \\ newline \n tab \t nul \u0000"},
+    {"Integers": [0, -1, 2 ** 31, 2 ** 53, -(2 ** 63), 2 ** 64 - 1]},
+    {"BigInteger": 2 ** 100},
+    {"Floats": [0.0, -1.5, 3.141592653589793, 1e-300, 1.7976931348623157e308]},
+    {"Constants": [True, False, None]},
+    {"Nested": {"List": [1, [2, [3, {"Deep": "value"}]]], "Tuple": (1, "two")}},
+    {1: "integer key", False: "boolean key", None: "null key"},
+    {"Properties": {"LoggerName": "test", "Values": list(range(100))}}
+]
+
+
+class TestJsonBackendConformance(object):
+    @pytest.mark.parametrize('data', _conformance_data)
+    def test_matches_stdlib(self, backend_name, data):
+        encoded = create_json_backend(backend_name).dumps(data)
+
+        assert isinstance(encoded, bytes)
+        assert json.loads(encoded) == json.loads(json.dumps(data))
+
+    def test_not_serializable(self, backend_name):
+        with pytest.raises(TypeError):
+            create_json_backend(backend_name).dumps({"Value": NotSerializable()})
+
+    def test_encoded_events_match(self, backend_name, use_clef, global_log_properties):
+        set_global_log_properties(MachineName="test-machine", Environment="Zoë")
+        record = create_test_log_record(name='wörld', Count=2 ** 70, Items=[1.5, None, True])
+
+        stdlib_handler = SeqLogHandler('http://localhost:5341', json_backend='stdlib')
+        handler = SeqLogHandler('http://localhost:5341', json_backend=backend_name)
+        try:
+            assert handler.json_backend.name == backend_name
+            assert json.loads(handler._encode_event(record)) == json.loads(stdlib_handler._encode_event(record))
+        finally:
+            stdlib_handler.close()
+            handler.close()
+
+
+class TestJsonBackendSelection(object):
+    def test_auto_prefers_fastest_installed(self):
+        expected_name = next(name for name in ['orjson', 'ujson', 'stdlib'] if is_json_backend_available(name))
+
+        assert create_json_backend('auto').name == expected_name
+
+    def test_custom_encoder_uses_stdlib(self):
+        backend = create_json_backend('auto', CustomEncoder)
+
+        assert isinstance(backend, StdlibJsonBackend)
+        assert json.loads(backend.dumps({"Value": NotSerializable()})) == {"Value": "<not serializable>"}
+
+    def test_default_encoder_is_not_custom(self):
+        expected_name = create_json_backend('auto').name
+
+        assert create_json_backend('auto', json.JSONEncoder).name == expected_name
+
+    def test_custom_encoder_class_name(self):
+        handler = SeqLogHandler('http://localhost:5341', json_encoder_class='tests.stubs.CustomEncoder')
+        try:
+            assert handler.json_backend.name == 'stdlib'
+            assert handler.json_encoder_class is CustomEncoder
+        finally:
+            handler.close()
+
+    def test_custom_encoder_not_supported(self, backend_name):
+        if backend_name == 'stdlib':
+            return
+
+        with pytest.raises(ValueError):
+            create_json_backend(backend_name, CustomEncoder)
+
+    def test_unsupported_backend(self):
+        with pytest.raises(ValueError):
+            create_json_backend('simplejson')
+
+        assert not is_json_backend_available('simplejson')
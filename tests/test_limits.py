@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_limits
+----------------------------------
+
+Tests for `seqlog.limits` (property value size limits), and their application when encoding events.
+"""
+
+import json
+
+from seqlog.limits import PropertyLimits, truncate_value
+from tests.stubs import create_handler, create_test_log_record
+
+
+class TestTruncateValue(object):
+    def test_string_truncated(self):
+        assert truncate_value('x' * 10, PropertyLimits(max_string_length=4)) == ('xxxx...', True)
+
+    def test_collection_truncated(self):
+        limits = PropertyLimits(max_collection_length=2)
+
+        assert truncate_value([1, 2, 3], limits) == ([1, 2], True)
+        assert truncate_value({'a': 1, 'b': 2, 'c': 3}, limits) == ({'a': 1, 'b': 2}, True)
+
+    def test_depth_truncated(self):
+        limits = PropertyLimits(max_depth=2)
+
+        assert truncate_value({'a': {'b': {'c': 1}}, 'd': [[1]]}, limits) == ({'a': {'b': '{...}'}, 'd': ['[...]']}, True)
+
+    def test_nested_values_truncated(self):
+        limits = PropertyLimits(max_string_length=2)
+
+        assert truncate_value({'a': ['xyz', 'x']}, limits) == ({'a': ['xy...', 'x']}, True)
+
+    def test_value_within_limits_not_copied(self):
+        value = {'a': ['xyz', {'b': 1}]}
+
+        truncated_value, truncated = truncate_value(value, PropertyLimits(max_string_length=3, max_collection_length=2, max_depth=3))
+
+        assert truncated_value is value
+        assert not truncated
+
+
+class TestEventLimits(object):
+    def test_property_values_truncated(self, use_clef):
+        handler = create_handler(use_clef=use_clef, max_property_string_length=20, max_property_collection_length=2)
+        try:
+            properties = encode_event_properties(handler, payload='x' * 100, items=list(range(10)), name='short')
+
+            assert properties['payload'] == 'x' * 20 + '...'
+            assert properties['items'] == [0, 1]
+            assert properties['name'] == 'short'
+            assert sorted(properties['TruncatedProperties']) == ['items', 'payload']
+        finally:
+            handler.close()
+
+    def test_event_within_limits_not_marked(self, use_clef):
+        handler = create_handler(use_clef=use_clef, max_property_string_length=20)
+        try:
+            properties = encode_event_properties(handler, name='short')
+
+            assert 'TruncatedProperties' not in properties
+        finally:
+            handler.close()
+
+    def test_oversized_event_shrunk(self, use_clef):
+        handler = create_handler(use_clef=use_clef, max_event_bytes=2048)
+        try:
+            event_json = handler._encode_event(create_test_log_record(huge={'data': 'x' * 100000}, large='y' * 1000, name='small'))
+            properties = get_event_properties(json.loads(event_json), use_clef)
+
+            assert len(event_json) <= 2048
+            assert properties['huge'].startswith('<truncated: ')
+            assert properties['large'] == 'y' * 1000
+            assert properties['name'] == 'small'
+            assert properties['TruncatedProperties'] == ['huge']
+        finally:
+            handler.close()
+
+    def test_oversized_message_truncated(self, use_clef):
+        handler = create_handler(use_clef=use_clef, max_event_bytes=2048)
+        try:
+            record = create_test_log_record('z' * 10000)
+            event_json = handler._encode_event(record)
+            event = json.loads(event_json)
+
+            assert len(event_json) <= 2048
+            assert (event['@mt'] if use_clef else event['MessageTemplate']).endswith('z...')
+        finally:
+            handler.close()
+
+    def test_event_size_unlimited(self, use_clef):
+        handler = create_handler(use_clef=use_clef, max_event_bytes=None)
+        try:
+            event_json = handler._encode_event(create_test_log_record(huge='x' * 500000))
+
+            assert len(event_json) > 500000
+        finally:
+            handler.close()
+
+
+def encode_event_properties(handler, **log_props):
+    event = json.loads(handler._encode_event(create_test_log_record(**log_props)))
+
+    return get_event_properties(event, handler.settings.use_clef)
+
+
+def get_event_properties(event, use_clef):
+    return event if use_clef else event['Properties']
+
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_metrics
+----------------------------------
+
+Tests for `seqlog.metrics` module.
+"""
+
+from seqlog import SeqLogHandler
+from seqlog.metrics import Histogram, HandlerMetrics
+from tests.stubs import create_test_log_record
+
+
+class TestHistogram(object):
+    def test_cumulative_buckets(self):
+        histogram = Histogram((1, 5, 10))
+        for value in (1, 3, 7, 100):
+            histogram.observe(value)
+
+        snapshot = histogram.snapshot()
+        assert snapshot["buckets"] == {1: 1, 5: 2, 10: 3, float("inf"): 4}
+        assert snapshot["count"] == 4
+        assert snapshot["sum"] == 111
+
+
+class TestHandlerMetrics(object):
+    def test_snapshot(self):
+        metrics = HandlerMetrics(queue_depth=lambda: 3)
+        metrics.increment("events_enqueued", 2)
+        metrics.observe("batch_size", 2)
+
+        snapshot = metrics.snapshot()
+        assert snapshot["events_enqueued"] == 2
+        assert snapshot["queue_depth"] == 3
+        assert snapshot["batch_size"]["count"] == 1
+
+    def test_to_prometheus(self):
+        metrics = HandlerMetrics()
+        metrics.increment("events_sent", 5)
+        metrics.observe("post_latency_seconds", 0.02)
+
+        exposition = metrics.to_prometheus(labels={"handler": "seq"})
+        assert 'seqlog_events_sent_total{handler="seq"} 5' in exposition
+        assert 'seqlog_post_latency_seconds_bucket{handler="seq",le="0.025"} 1' in exposition
+        assert 'seqlog_post_latency_seconds_bucket{handler="seq",le="+Inf"} 1' in exposition
+        assert 'seqlog_post_latency_seconds_count{handler="seq"} 1' in exposition
+
+
+class TestSeqLogHandlerMetrics(object):
+    def test_successful_batch(self):
+        handler = SeqLogHandler("http://localhost:5341")
+        handler.session = StubSession()
+        try:
+            handler.publish_log_batch([create_test_log_record(name="world"), create_test_log_record(name="world")])
+
+            snapshot = handler.metrics.snapshot()
+            assert snapshot["events_sent"] == 2
+            assert snapshot["bytes_sent"] == len(handler.session.bodies[0])
+            assert snapshot["batch_size"]["count"] == 1
+            assert snapshot["post_latency_seconds"]["count"] == 1
+        finally:
+            handler.close()
+
+    def test_failed_batch(self):
+        handler = SeqLogHandler("localhost")
+        try:
+            handler.publish_log_batch([create_test_log_record(name="world")])
+
+            snapshot = handler.metrics.snapshot()
+            assert snapshot["events_failed"] == 1
+            assert snapshot["events_sent"] == 0
+        finally:
+            handler.close()
+
+
+class StubResponse(object):
+    content = b''
+
+    def raise_for_status(self):
+        pass
+
+
+class StubSession(object):
+    def __init__(self):
+        self.bodies = []
+
+    def post(self, url, data=None, **kwargs):
+        self.bodies.append(data)
+
+        return StubResponse()
+
+    def close(self):
+        pass
+
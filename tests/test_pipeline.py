@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_pipeline
+----------------------------------
+
+Tests for pipelines shared between `SeqLogHandler`s.
+"""
+
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from seqlog import pipeline as pipeline_module
+from seqlog.transport import SeqTransport
+from tests.stubs import create_handler, create_test_log_record
+
+
+@pytest.fixture
+def handlers():
+    created_handlers = []
+
+    yield created_handlers
+
+    for handler in reversed(created_handlers):
+        handler.close()
+
+
+class TestSharedPipeline(object):
+    def test_identical_handlers_share_pipeline(self, handlers):
+        handler1 = create_handler('http://localhost:5341', 'key', created_handlers=handlers)
+        handler2 = create_handler('http://localhost:5341/', 'key', created_handlers=handlers)
+
+        assert handler1.pipeline is handler2.pipeline
+        assert handler1.log_queue is handler2.log_queue
+        assert handler1.pipeline.publisher is handler1
+
+    @pytest.mark.parametrize('handler_options', [
+        {'api_key': 'other-key'},
+        {'server_url': 'http://other:5341'},
+        {'batch_size': 20},
+        {'use_clef': True},
+        {'share_pipeline': False}
+    ])
+    def test_different_handlers_do_not_share_pipeline(self, handlers, handler_options):
+        handler1 = create_handler('http://localhost:5341', 'key', created_handlers=handlers)
+        handler2 = create_handler(created_handlers=handlers, **dict({'server_url': 'http://localhost:5341', 'api_key': 'key'}, **handler_options))
+
+        assert handler1.pipeline is not handler2.pipeline
+
+    def test_records_from_handlers_published_in_one_batch(self, seq_server, handlers):
+        handler1 = create_handler(seq_server.url, 'test-api-key', use_clef=True, created_handlers=handlers)
+        handler2 = create_handler(seq_server.url, 'test-api-key', use_clef=True, created_handlers=handlers)
+        handler2.setLevel(logging.WARNING)
+        handler2.addFilter(lambda record: record.log_props['name'] != 'excluded')
+
+        for handler, level, name in [
+            (handler1, logging.INFO, 'handler1'),
+            (handler2, logging.INFO, 'below-level'),
+            (handler2, logging.WARNING, 'excluded'),
+            (handler2, logging.WARNING, 'handler2')
+        ]:
+            record = create_test_log_record(level=level, name=name)
+            if record.levelno >= handler.level:  # As checked by Logger.callHandlers().
+                handler.handle(record)
+
+        handler1.log_queue.join()
+        handler1.flush()
+
+        assert [event['name'] for event in seq_server.events] == ['handler1', 'handler2']
+        assert len(seq_server.requests) == 1
+        assert handler1.metrics.snapshot()['events_sent'] == 2
+
+    def test_closing_handler_keeps_pipeline_running(self, seq_server, handlers):
+        handler1 = create_handler(seq_server.url, 'test-api-key', use_clef=True, created_handlers=handlers)
+        handler2 = create_handler(seq_server.url, 'test-api-key', use_clef=True, created_handlers=handlers)
+
+        handler1.handle(create_test_log_record(level=logging.INFO, name='handler1'))
+        handler1.log_queue.join()
+        handler1.close()
+
+        assert handler2.consumer.is_running
+        assert handler2.pipeline.publisher is handler2
+
+        consumer_thread = handler2.consumer.consumer_thread
+        handler2.flush()  # As logging.shutdown() does.
+        handler2.close()
+        consumer_thread.join(5)
+
+        assert not handler2.consumer.is_running
+        assert [event['name'] for event in seq_server.events] == ['handler1']
+
+        handler3 = create_handler(seq_server.url, 'test-api-key', use_clef=True, created_handlers=handlers)
+        assert handler3.pipeline is not handler2.pipeline
+
+    def test_reconfigure_does_not_affect_other_handlers(self, handlers):
+        handler1 = create_handler('http://localhost:5341', 'key', use_clef=False, created_handlers=handlers)
+        handler2 = create_handler('http://localhost:5341', 'key', use_clef=False, created_handlers=handlers)
+        shared_pipeline = handler1.pipeline
+
+        handler1.reconfigure(use_clef=True)
+
+        assert handler1.settings.use_clef
+        assert not handler2.settings.use_clef
+        assert handler1.pipeline is not shared_pipeline
+        assert handler2.pipeline is shared_pipeline
+        assert shared_pipeline.publisher is handler2
+
+    def test_reconfigured_pipeline_not_shared_with_new_handlers(self, handlers):
+        handler1 = create_handler('http://localhost:5341', 'key', use_clef=False, created_handlers=handlers)
+        pipeline = handler1.pipeline
+
+        handler1.reconfigure(use_clef=True)
+        handler2 = create_handler('http://localhost:5341', 'key', use_clef=False, created_handlers=handlers)
+
+        assert handler1.pipeline is pipeline  # A handler that is not sharing its pipeline keeps it.
+        assert handler2.pipeline is not pipeline
+        assert handler1.settings.use_clef
+        assert not handler2.settings.use_clef
+
+    def test_unchanged_settings_keep_sharing_pipeline(self, handlers):
+        handler1 = create_handler('http://localhost:5341', 'key', use_clef=True, created_handlers=handlers)
+        handler2 = create_handler('http://localhost:5341', 'key', use_clef=True, created_handlers=handlers)
+
+        handler1.reconfigure(use_clef=True)
+
+        assert handler1.pipeline is handler2.pipeline
+
+
+class TestPriorityLanes(object):
+    def test_priority_records_published_immediately(self, seq_server, handlers):
+        handler = create_handler(seq_server.url, 'test-api-key', use_clef=True, flush_level=None, created_handlers=handlers)
+
+        for name in ('info1', 'info2', 'info3'):
+            handler.handle(create_test_log_record(level=logging.INFO, name=name))
+        handler.handle(create_test_log_record(level=logging.ERROR, name='error'))
+        handler.pipeline.priority_queue.join()
+
+        assert [event['name'] for event in seq_server.events] == ['error']
+
+        handler.log_queue.join()
+        handler.flush()
+
+        assert [event['name'] for event in seq_server.events] == ['error', 'info1', 'info2', 'info3']
+        assert len(seq_server.requests) == 2
+
+    def test_priority_lane_disabled(self, seq_server, handlers):
+        handler = create_handler(seq_server.url, 'test-api-key', use_clef=True, priority_level=None, flush_level=None, created_handlers=handlers)
+
+        handler.handle(create_test_log_record(level=logging.ERROR, name='error'))
+        handler.log_queue.join()
+
+        assert handler.pipeline.priority_consumer is None
+        assert seq_server.events == []
+
+    def test_priority_level_name(self, handlers):
+        handler = create_handler('http://localhost:5341', priority_level='warning', created_handlers=handlers)
+
+        assert handler.pipeline.priority_level == logging.WARNING
+
+    def test_lower_priority_records_shed_when_queue_full(self, handlers):
+        transport = BlockingTransport()
+        handler = create_handler('http://localhost:5341', batch_size=2, max_queue_size=2, use_clef=True, transport=transport, created_handlers=handlers)
+        try:
+            # The first batch blocks the consumer while it is being sent.
+            handler.handle(create_test_log_record(level=logging.INFO, name='info1'))
+            handler.handle(create_test_log_record(level=logging.INFO, name='info2'))
+            assert transport.blocked.wait(5)
+
+            for name in ('info3', 'info4', 'shed'):
+                handler.handle(create_test_log_record(level=logging.INFO, name=name))
+            handler.handle(create_test_log_record(level=logging.ERROR, name='error'))
+            handler.pipeline.priority_queue.join()
+
+            assert transport.names == ['error']
+            assert handler.metrics.snapshot()['events_dropped'] == 1
+            assert handler.metrics.snapshot()['queue_depth'] == 2
+        finally:
+            transport.unblock.set()
+
+        handler.log_queue.join()
+
+        assert transport.names == ['error', 'info1', 'info2', 'info3', 'info4']
+
+
+class TestFlushTriggers(object):
+    @pytest.mark.parametrize('priority_level', [logging.ERROR, None])
+    def test_flush_level_publishes_current_batch(self, seq_server, handlers, priority_level):
+        handler = create_handler(seq_server.url, 'test-api-key', use_clef=True, priority_level=priority_level, created_handlers=handlers)
+
+        handler.handle(create_test_log_record(level=logging.INFO, name='info1'))
+        handler.handle(create_test_log_record(level=logging.INFO, name='info2'))
+        handler.handle(create_test_log_record(level=logging.CRITICAL, name='critical'))
+
+        assert seq_server.wait_for_events(3)
+        assert sorted(event['name'] for event in seq_server.events) == ['critical', 'info1', 'info2']
+
+    def test_flush_level_name(self, handlers):
+        handler = create_handler('http://localhost:5341', flush_level='critical', created_handlers=handlers)
+
+        assert handler.pipeline.flush_level == logging.CRITICAL
+
+    def test_flush_draining_queue(self, seq_server, handlers):
+        handler = create_handler(seq_server.url, 'test-api-key', use_clef=True, flush_level=None, created_handlers=handlers)
+        handler.handle(create_test_log_record(level=logging.INFO, name='info1'))
+
+        # Records added directly to the queue are not seen by the consumer thread before the flush (which holds its lock).
+        with handler.consumer.state_lock:
+            handler.log_queue.put(create_test_log_record(level=logging.INFO, name='info2'))
+            handler.pipeline.flush(drain_queue=True)
+
+        assert sorted(event['name'] for event in seq_server.events) == ['info1', 'info2']
+
+    def test_uncaught_exception_flushes_pipelines(self, seq_server, handlers, monkeypatch):
+        uncaught_exceptions = []
+        monkeypatch.setattr(sys, 'excepthook', lambda *exc_info: uncaught_exceptions.append(exc_info[1]))
+        monkeypatch.setattr(pipeline_module, '_previous_excepthook', None)
+
+        handler = create_handler(seq_server.url, 'test-api-key', use_clef=True, flush_level=None, flush_on_crash=True, created_handlers=handlers)
+        handler.handle(create_test_log_record(level=logging.INFO, name='info'))
+
+        error = ValueError('Crashed')
+        sys.excepthook(ValueError, error, None)
+
+        assert [event['name'] for event in seq_server.events] == ['info']
+        assert uncaught_exceptions == [error]
+
+    @pytest.mark.skipif(not hasattr(signal, 'SIGKILL'), reason='POSIX signals are not supported on this platform')
+    def test_sigterm_flushes_pipelines(self, seq_server):
+        process = subprocess.run([sys.executable, '-c', (
+            "import logging, os, signal, seqlog; "
+            "from seqlog.structured_logging import StructuredLogRecord; "
+            "handler = seqlog.SeqLogHandler({url!r}, 'test-api-key', use_clef=True, flush_level=None, flush_on_crash=True); "
+            "handler.handle(StructuredLogRecord('test', logging.INFO, '', 1, 'Hello {{name}}!', (), None, log_props={{'name': 'info'}})); "
+            "os.kill(os.getpid(), signal.SIGTERM)"
+        ).format(url=seq_server.url)], timeout=30)
+
+        assert process.returncode == -signal.SIGTERM
+        assert [event['name'] for event in seq_server.events] == ['info']
+
+
+    @pytest.mark.skipif(not hasattr(signal, 'SIGUSR1'), reason='POSIX signals are not supported on this platform')
+    def test_signal_during_put_does_not_deadlock(self, seq_server, handlers, monkeypatch):
+        received_signals = []
+        monkeypatch.setattr(sys, 'excepthook', sys.excepthook)
+        monkeypatch.setattr(pipeline_module, '_previous_excepthook', None)
+        monkeypatch.setattr(pipeline_module, '_previous_signal_handlers', {})
+        monkeypatch.setattr(pipeline_module, '_signal_flush_timeout', pipeline_module._signal_flush_timeout)
+
+        previous_handler = signal.signal(signal.SIGUSR1, lambda signum, frame: received_signals.append(signum))
+        try:
+            pipeline_module.install_crash_flush_hooks(signals=(signal.SIGUSR1,), flush_timeout=0.5)
+
+            handler = create_handler(seq_server.url, 'test-api-key', use_clef=True, flush_level=None, created_handlers=handlers)
+            handler.handle(create_test_log_record(level=logging.INFO, name='info'))
+            handler.log_queue.join()
+
+            # The signal arrives while the main thread holds the queue's lock (as it does while adding a record to the queue).
+            with handler.log_queue.mutex:
+                os.kill(os.getpid(), signal.SIGUSR1)
+
+                assert received_signals == [signal.SIGUSR1]
+
+            assert seq_server.wait_for_events(1)
+            assert [event['name'] for event in seq_server.events] == ['info']
+        finally:
+            signal.signal(signal.SIGUSR1, previous_handler)
+
+
+class BlockingTransport(SeqTransport):
+    """
+    Transport that blocks the first request until `unblock` is set.
+    """
+
+    errors = (IOError,)
+
+    def __init__(self):
+        self.names = []
+        self.blocked = threading.Event()
+        self.unblock = threading.Event()
+
+    def post(self, url, body, headers):
+        names = [line.split(b'"name":"')[1].split(b'"')[0].decode('utf-8') for line in bytes(body.read()).split(b'\r\n')]
+
+        if not self.blocked.is_set():
+            self.blocked.set()
+            self.unblock.wait(5)
+
+        self.names.extend(names)
+
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_sampling
+----------------------------------
+
+Tests for `seqlog.sampling` module.
+"""
+
+import io
+import json
+import logging
+
+import seqlog
+from seqlog.sampling import SamplingFilter, SamplingRule, TokenBucketStrategy, OneInNStrategy, BurstThenSampleStrategy
+from seqlog.structured_logging import ConsoleStructuredLogHandler, StructuredLogger
+from tests.stubs import StubStructuredLogHandler, create_test_log_record
+
+
+class TestSamplingStrategies(object):
+    def test_token_bucket(self):
+        strategy = TokenBucketStrategy(rate=1, burst=2)
+
+        assert [strategy.sample(0.0) for _ in range(4)] == [1, 1, 0, 0]
+        assert strategy.sample(1.0) == 3  # 1 token replenished; represents the 2 records suppressed before it.
+
+    def test_one_in_n(self):
+        strategy = OneInNStrategy(n=3)
+
+        assert [strategy.sample(0.0) for _ in range(7)] == [1, 0, 0, 3, 0, 0, 3]
+
+    def test_burst_then_sample(self):
+        strategy = BurstThenSampleStrategy(burst=2, n=2, period=10)
+
+        assert [strategy.sample(0.0) for _ in range(6)] == [1, 1, 1, 0, 2, 0]
+        assert strategy.sample(10.0) == 2  # New period.
+
+
+class TestSamplingFilter(object):
+    def test_unmatched_records_pass(self):
+        sampling_filter = SamplingFilter(rules=[SamplingRule("one_in_n", logger="noisy", n=100)])
+
+        record = create_test_log_record("Hello", logging.INFO, logger_name="quiet")
+        assert sampling_filter.filter(record)
+        assert "SampledCount" not in record.log_props
+
+    def test_rule_applies_to_child_loggers(self):
+        sampling_filter = SamplingFilter(rules=[{"strategy": "one_in_n", "logger": "noisy", "n": 2}])
+
+        results = [bool(sampling_filter.filter(create_test_log_record("Hello", logging.INFO, logger_name="noisy.child"))) for _ in range(4)]
+        assert results == [True, False, True, False]
+
+        assert sampling_filter.filter(create_test_log_record("Hello", logging.INFO, logger_name="noisy_neighbour"))
+
+    def test_rule_level(self):
+        sampling_filter = SamplingFilter(rules=[{"strategy": "one_in_n", "level": "INFO", "n": 1000}])
+
+        assert sampling_filter.filter(create_test_log_record("Hello", logging.INFO))
+        assert not sampling_filter.filter(create_test_log_record("Hello", logging.INFO))
+        assert sampling_filter.filter(create_test_log_record("Hello", logging.ERROR))
+        assert sampling_filter.filter(create_test_log_record("Hello", logging.ERROR))
+
+    def test_call_sites_sampled_independently(self):
+        sampling_filter = SamplingFilter(rules=[{"strategy": "one_in_n", "n": 1000}])
+
+        assert sampling_filter.filter(create_test_log_record("Hello {name}", logging.INFO))
+        assert sampling_filter.filter(create_test_log_record("Goodbye {name}", logging.INFO))
+        assert not sampling_filter.filter(create_test_log_record("Hello {name}", logging.INFO))
+
+    def test_sampled_count(self):
+        sampling_filter = SamplingFilter(rules=[{"strategy": "one_in_n", "n": 3}])
+
+        kept = []
+        for _ in range(6):
+            record = create_test_log_record("Hello", logging.INFO)
+            sampled_record = sampling_filter.filter(record)
+            if sampled_record:
+                assert "SampledCount" not in record.log_props  # The original record is left unchanged.
+                kept.append(sampled_record)
+
+        assert [record.log_props["SampledCount"] for record in kept] == [1, 3]
+
+    def test_unhashable_message(self):
+        sampling_filter = SamplingFilter(rules=[{"strategy": "one_in_n", "n": 2}])
+
+        assert sampling_filter.filter(create_test_log_record(["not", "hashable"], logging.INFO))
+        assert not sampling_filter.filter(create_test_log_record(["not", "hashable"], logging.INFO))
+
+    def test_sampled_count_not_visible_to_other_handlers(self):
+        sampled_stream = io.StringIO()
+        sampled_handler = ConsoleStructuredLogHandler(sampled_stream, output_format='clef')
+        sampled_handler.addFilter(SamplingFilter(rules=[{"strategy": "one_in_n", "n": 2}]))
+        other_handler = StubStructuredLogHandler()
+
+        logger = StructuredLogger("test_sampling_handlers", logging.INFO)
+        logger.addHandler(sampled_handler)
+        logger.addHandler(other_handler)
+        for _ in range(3):
+            logger.info("Hello, {name}", name="world")
+
+        assert [json.loads(line)["SampledCount"] for line in sampled_stream.getvalue().splitlines()] == [1, 2]
+        assert len(other_handler.records) == 3
+        assert not any("SampledCount" in record.log_props for record in other_handler.records)
+
+    def test_logger_filter_replaces_record(self):
+        handler = StubStructuredLogHandler()
+
+        logger = StructuredLogger("test_sampling_logger", logging.INFO)
+        logger.addFilter(SamplingFilter(rules=[{"strategy": "one_in_n", "n": 2}]))
+        logger.addHandler(handler)
+        for _ in range(3):
+            logger.info("Hello, {name}", name="world")
+
+        assert [record.log_props["SampledCount"] for record in handler.records] == [1, 2]
+
+    def test_configure_from_dict(self):
+        seqlog.configure_from_dict({
+            "version": 1,
+            "filters": {
+                "sampler": {
+                    "()": "seqlog.sampling.SamplingFilter",
+                    "rules": [
+                        {"strategy": "token_bucket", "logger": "test_sampling", "rate": 0.001, "burst": 2}
+                    ]
+                }
+            },
+            "handlers": {
+                "test_handler": {
+                    "class": "tests.stubs.StubStructuredLogHandler",
+                    "filters": ["sampler"]
+                }
+            },
+            "loggers": {
+                "test_sampling": {
+                    "level": "INFO",
+                    "handlers": ["test_handler"],
+                    "propagate": False
+                }
+            }
+        }, override_root_logger=False)
+
+        logger = logging.getLogger("test_sampling")
+        for _ in range(5):
+            logger.info("Hello, {name}", name="world")
+
+        handler = logger.handlers[0]
+        assert isinstance(handler, StubStructuredLogHandler)
+        assert len(handler.records) == 2
+
@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_seq_log_handler
+----------------------------------
+
+Tests for `seqlog.structured_logging.SeqLogHandler` event serialisation.
+"""
+
+import gc
+import json
+import logging
+import logging.config
+import sys
+import weakref
+
+import pytest
+
+import seqlog
+from seqlog import SeqLogHandler
+from seqlog.feature_flags import FeatureFlag, configure_feature
+from seqlog.encoding import RequestBodyWriter
+from seqlog.structured_logging import set_global_log_properties
+from seqlog.structured_logging import _BatchEncoder, _get_local_timestamp
+from tests.stubs import create_logged_record, create_test_log_record
+
+
+@pytest.fixture
+def handler():
+    handler = SeqLogHandler('http://localhost:5341')
+    yield handler
+    handler.close()
+
+
+class TestEventSerialization(object):
+    def test_static_context_spliced(self, handler, use_clef, global_log_properties):
+        set_global_log_properties(MachineName="test-machine", Environment=b"Test")
+        record = create_logged_record("Hello, {name}!", name="world")
+
+        encoded_event = json.loads(handler._encode_event(record))
+        assert encoded_event == handler._build_event_data(record)
+
+        properties = encoded_event if use_clef else encoded_event["Properties"]
+        assert properties["MachineName"] == "test-machine"
+        assert properties["Environment"] == "Test"
+        assert properties["LoggerName"] == "test"
+        assert properties["name"] == "world"
+
+    def test_no_static_context(self, handler, use_clef, global_log_properties):
+        set_global_log_properties()
+        record = create_logged_record("Hello, {name}!", name="world")
+
+        encoded_event = json.loads(handler._encode_event(record))
+        assert encoded_event == handler._build_event_data(record)
+
+    def test_record_properties_override_static_context(self, handler, use_clef, global_log_properties):
+        set_global_log_properties(Environment="Test")
+        record = create_logged_record("Hello from {Environment}", Environment="Override")
+
+        encoded_event = json.loads(handler._encode_event(record))
+
+        properties = encoded_event if use_clef else encoded_event["Properties"]
+        assert properties["Environment"] == "Override"
+
+    def test_ambient_properties_override_static_context(self, handler, use_clef, global_log_properties):
+        set_global_log_properties(Environment="Test")
+        with seqlog.context(Environment="Ambient"):
+            record = create_logged_record("Hello")
+
+        assert record.log_props["Environment"] == "Test"
+
+        encoded_event = json.loads(handler._encode_event(record))
+        assert encoded_event == handler._build_event_data(record)
+
+        properties = encoded_event if use_clef else encoded_event["Properties"]
+        assert properties["Environment"] == "Ambient"
+
+    def test_trace_context_clef(self, handler, global_log_properties):
+        set_global_log_properties(trace_id="4bf92f3577b34da6a3ce929d0e0e4736", span_id=lambda: "00f067aa0ba902b7")
+        record = create_logged_record("Hello")
+
+        handler.reconfigure(use_clef=True)
+        encoded_event = json.loads(handler._encode_event(record))
+
+        assert encoded_event["@tr"] == "4bf92f3577b34da6a3ce929d0e0e4736"
+        assert encoded_event["@sp"] == "00f067aa0ba902b7"
+        assert "trace_id" not in encoded_event
+        assert "span_id" not in encoded_event
+
+    def test_standard_log_record(self, handler, use_clef, global_log_properties):
+        set_global_log_properties(Environment="Test")
+        record = logging.LogRecord("standard", logging.INFO, "test.py", 17, "Hello, %s!", ("world",), None)
+
+        encoded_event = json.loads(handler._encode_event(record))
+        assert encoded_event == handler._build_event_data(record)
+
+        properties = encoded_event if use_clef else encoded_event["Properties"]
+        assert properties["LoggerName"] == "standard"
+
+
+class TestBatchEncoding(object):
+    @pytest.mark.parametrize('created', [
+        1700000000.0, 1700000000.5, 1700000000.000001, 1700000000.9999996, 1700000001.25, 951782400.123456
+    ])
+    def test_timestamps_match(self, handler, use_clef, created):
+        record = create_logged_record("Hello")
+        record.created = created
+
+        encoded_event = json.loads(_BatchEncoder(handler, handler.settings).encode(record))
+
+        if use_clef:
+            assert encoded_event["@t"] == _get_local_timestamp(record, True)
+        else:
+            assert encoded_event["Timestamp"] == _get_local_timestamp(record)
+
+    def test_batch_matches_event_data(self, handler, use_clef, global_log_properties):
+        set_global_log_properties(Environment="Test", RequestCount=lambda: 3)
+        records = [
+            create_logged_record("Hello, {name}!", name="world"),
+            create_logged_record("Hello, {name}!", name="moon"),
+            create_logged_record("Goodbye, {name}!", name="world"),
+            logging.LogRecord("standard", logging.WARNING, "test.py", 17, "Hello, %s!", ("world",), None),
+            create_logged_record("Hello, {Environment}!", Environment="Override")
+        ]
+
+        encoder = _BatchEncoder(handler, handler.settings)
+        encoded_events = [json.loads(encoder.encode(record)) for record in records]
+
+        assert encoded_events == [handler._build_event_data(record) for record in records]
+        assert len(encoder._headers) == 4
+
+    def test_unencodable_record_isolated(self, handler, use_clef):
+        failures = []
+        handler.handleError = failures.append
+
+        bad_record = logging.LogRecord("standard", logging.INFO, "test.py", 17, "Count: %d", ("not a number",), None)
+        records = [create_logged_record("Hello, {name}!", name="world"), bad_record, create_logged_record("Hello, {name}!", name="moon")]
+
+        writer = RequestBodyWriter()
+        writer.begin(use_clef)
+        handler._write_log_batch(writer, records, _BatchEncoder(handler, handler.settings))
+        writer.finish()
+
+        assert failures == [bad_record]
+        assert writer.event_count == 2
+        assert handler.metrics.snapshot()["events_dropped"] == 1
+
+
+class TestHandlerSettings(object):
+    def test_follows_global_feature_flags(self, handler):
+        configure_feature(FeatureFlag.USE_CLEF, True)
+        try:
+            assert handler.settings.use_clef
+            assert handler.server_url == 'http://localhost:5341/ingest/clef'
+        finally:
+            configure_feature(FeatureFlag.USE_CLEF, False)
+
+        assert not handler.settings.use_clef
+        assert handler.server_url == 'http://localhost:5341/api/events/raw'
+
+    def test_reconfigure(self, handler):
+        settings = handler.settings
+
+        new_settings = handler.reconfigure(use_clef=True, support_stack_info=True)
+
+        assert new_settings is handler.settings
+        assert new_settings.use_clef and new_settings.support_stack_info
+        assert new_settings.content_type == 'application/vnd.serilog.clef'
+        assert not settings.use_clef  # Previous snapshot is unaffected.
+
+    def test_constructor_options(self):
+        clef_handler = SeqLogHandler('http://localhost:5341', use_clef=True, ignore_seq_submission_errors=True)
+        raw_handler = SeqLogHandler('http://legacy-seq:5341', use_clef=False, support_stack_info=True)
+        try:
+            assert clef_handler.settings.use_clef
+            assert clef_handler.settings.ignore_seq_submission_errors
+            assert clef_handler.server_url == 'http://localhost:5341/ingest/clef'
+
+            assert not raw_handler.settings.use_clef
+            assert raw_handler.settings.support_stack_info
+            assert raw_handler.server_url == 'http://legacy-seq:5341/api/events/raw'
+
+            record = create_logged_record("Hello")
+            assert "@mt" in json.loads(clef_handler._encode_event(record))
+            assert "MessageTemplate" in json.loads(raw_handler._encode_event(record))
+        finally:
+            clef_handler.close()
+            raw_handler.close()
+
+    def test_dict_config_options(self):
+        logging.config.dictConfig({
+            "version": 1,
+            "handlers": {
+                "seq": {
+                    "class": "seqlog.structured_logging.SeqLogHandler",
+                    "server_url": "http://localhost:5341",
+                    "use_clef": True,
+                    "support_stack_info": True
+                }
+            },
+            "loggers": {
+                "test_handler_options": {
+                    "handlers": ["seq"],
+                    "propagate": False
+                }
+            }
+        })
+
+        handler = logging.getLogger("test_handler_options").handlers[0]
+        try:
+            assert handler.settings.use_clef
+            assert handler.settings.support_stack_info
+            assert not handler.settings.ignore_seq_submission_errors
+        finally:
+            handler.close()
+
+    def test_reconfigure_overrides_global_feature_flags(self, handler):
+        handler.reconfigure(use_clef=True)
+
+        configure_feature(FeatureFlag.USE_CLEF, False)
+        configure_feature(FeatureFlag.STACK_INFO, True)
+        try:
+            assert handler.settings.use_clef
+            assert handler.settings.support_stack_info
+        finally:
+            configure_feature(FeatureFlag.STACK_INFO, False)
+
+
+class TestExceptionCapture(object):
+    def test_traceback_frames_released_when_queued(self):
+        handler = SeqLogHandler('http://localhost:5341', priority_level=None, flush_level=None)
+        try:
+            record, frame_local_ref = create_exception_record()
+            handler.handle(record)
+            handler.log_queue.join()
+
+            queued_record = handler.consumer.current_batch[0]
+            assert queued_record.exc_info is None
+            assert 'ValueError: Failed' in queued_record.exc_text
+
+            # Other handlers still see the original exception information.
+            assert record.exc_info[0] is ValueError
+            assert record.exc_text == queued_record.exc_text
+
+            record = None
+            gc.collect()
+            assert frame_local_ref() is None
+        finally:
+            handler.close()
+
+    def test_exc_info_captured_on_logging_thread(self):
+        handler = SeqLogHandler('http://localhost:5341', priority_level=None, flush_level=None)
+        try:
+            try:
+                raise KeyError('missing')
+            except KeyError:
+                handler.handle(create_test_log_record('Failed', logging.ERROR, exc_info=True))
+
+            handler.log_queue.join()
+
+            assert "KeyError: 'missing'" in handler.consumer.current_batch[0].exc_text
+        finally:
+            handler.close()
+
+
+class _FrameLocal(object):
+    pass
+
+
+def create_exception_record():
+    """
+    Create a log record for an exception whose traceback references a local variable.
+
+    :return: The record, and a weak reference to the local variable.
+    """
+
+    frame_local = _FrameLocal()
+    try:
+        raise ValueError('Failed')
+    except ValueError:
+        record = create_test_log_record('Failed', logging.ERROR, exc_info=sys.exc_info())
+
+    return record, weakref.ref(frame_local)
+
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_seq_server
+----------------------------------
+
+Tests for `SeqLogHandler` submission over HTTP, using the fake Seq server in `tests.seq_server`.
+"""
+
+import pytest
+
+from tests.seq_server import FakeSeqServer
+from tests.stubs import create_handler, create_test_log_record
+
+
+@pytest.fixture
+def failures():
+    # Records passed to SeqLogHandler.handleError().
+    return []
+
+
+class TestSeqServerSubmission(object):
+    def test_events_accepted(self, seq_server, use_clef):
+        handler = create_handler(seq_server.url, 'test-api-key')
+        try:
+            handler.publish_log_batch([create_test_log_record(name='world'), create_test_log_record(name='moon')])
+
+            assert len(seq_server.events) == 2
+            assert seq_server.requests[0]['path'] == ('/ingest/clef' if use_clef else '/api/events/raw')
+
+            if use_clef:
+                assert [event['name'] for event in seq_server.events] == ['world', 'moon']
+            else:
+                assert [event['Properties']['name'] for event in seq_server.events] == ['world', 'moon']
+        finally:
+            handler.close()
+
+    def test_invalid_api_key(self, seq_server, use_clef, failures):
+        handler = create_handler(seq_server.url, 'wrong-api-key', on_error=failures.append)
+        try:
+            handler.publish_log_batch([create_test_log_record(name='world')])
+
+            assert seq_server.events == []
+            assert len(failures) == 1
+            assert handler.metrics.snapshot()['events_failed'] == 1
+        finally:
+            handler.close()
+
+    @pytest.mark.parametrize('status', [429, 503])
+    def test_server_unavailable(self, seq_server, use_clef, failures, status):
+        handler = create_handler(seq_server.url, 'test-api-key', on_error=failures.append)
+        try:
+            seq_server.fail_next(status)
+            handler.publish_log_batch([create_test_log_record(name='world')])
+            handler.publish_log_batch([create_test_log_record(name='moon')])
+
+            assert len(failures) == 1
+            assert len(seq_server.events) == 1
+        finally:
+            handler.close()
+
+    def test_connection_reset(self, seq_server, use_clef, failures):
+        handler = create_handler(seq_server.url, 'test-api-key', on_error=failures.append)
+        try:
+            seq_server.reset_next()
+            handler.publish_log_batch([create_test_log_record(name='world')])
+
+            assert len(failures) == 1
+            assert seq_server.events == []
+        finally:
+            handler.close()
+
+    def test_request_too_large(self, use_clef, failures):
+        with FakeSeqServer(max_request_size=1024) as seq_server:
+            handler = create_handler(seq_server.url, on_error=failures.append)
+            try:
+                handler.publish_log_batch([create_test_log_record(name='x' * 2048)])
+
+                assert len(failures) == 1
+                assert seq_server.events == []
+            finally:
+                handler.close()
+
+    def test_gzip_request_body(self, seq_server, use_clef):
+        handler = create_handler(seq_server.url, 'test-api-key', compression='gzip')
+        try:
+            handler.publish_log_batch([create_test_log_record(name='world'), create_test_log_record(name='moon')])
+
+            assert len(seq_server.events) == 2
+            assert seq_server.requests[0]['headers']['Content-Encoding'] == 'gzip'
+            assert handler.metrics.snapshot()['bytes_sent'] < seq_server.requests[0]['body_size']  # body_size is uncompressed
+        finally:
+            handler.close()
+
+    def test_streamed_request_body(self, seq_server, use_clef):
+        handler = create_handler(seq_server.url, 'test-api-key', stream_request_body=True)
+        try:
+            handler.publish_log_batch([create_test_log_record(name='x' * 1024, index=index) for index in range(200)])
+
+            assert len(seq_server.events) == 200
+            assert seq_server.requests[0]['headers']['Transfer-Encoding'] == 'chunked'
+            assert handler.metrics.snapshot()['events_sent'] == 200
+        finally:
+            handler.close()
+
+    def test_consumer_started_on_first_emit(self, seq_server, use_clef):
+        handler = create_handler(seq_server.url, 'test-api-key')
+        try:
+            assert not handler.consumer.is_running
+            assert handler.pipeline._transport is None
+
+            handler.handle(create_test_log_record(name='world'))
+            handler.log_queue.join()
+            handler.flush()
+
+            assert len(seq_server.events) == 1
+            assert handler.consumer.is_running
+            assert handler.pipeline._transport is not None
+        finally:
+            handler.close()
+
+    def test_consumer_started_explicitly(self, seq_server, use_clef, failures):
+        # As in Gunicorn's post_worker_init hook, after the worker process has been forked.
+        handler = create_handler(seq_server.url, 'test-api-key', on_error=failures.append)
+        try:
+            handler.consumer.start()
+
+            handler.handle(create_test_log_record(name='world'))
+            handler.log_queue.join()
+            handler.flush()
+
+            assert len(seq_server.events) == 1
+            assert failures == []
+        finally:
+            handler.close()
+
+    def test_emit_error_handled(self, seq_server, failures, monkeypatch):
+        handler = create_handler(seq_server.url, 'test-api-key', on_error=failures.append)
+        try:
+            def enqueue(record):
+                raise RuntimeError('Failed to enqueue record.')
+
+            monkeypatch.setattr(handler.pipeline, 'enqueue', enqueue)
+            record = create_test_log_record(name='world')
+
+            handler.handle(record)
+
+            assert failures == [record]
+        finally:
+            handler.close()
+
+    def test_unused_handler_closed(self, seq_server):
+        handler = create_handler(seq_server.url, 'test-api-key')
+        handler.close()
+
+        assert not handler.consumer.is_running
+        assert handler.pipeline._transport is None
+        assert seq_server.requests == []
+
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_ship
+----------------------------------
+
+Tests for `seqlog.ship` (shipping CLEF files to Seq), using the fake Seq server in `tests.seq_server`.
+"""
+
+import json
+
+import pytest
+
+from seqlog.ship import ClefShipper, _iter_batches, main
+
+
+@pytest.fixture
+def clef_file(tmp_path):
+    return create_clef_file(tmp_path / 'events.clef', 100)
+
+
+class TestIterBatches(object):
+    def test_batches_end_at_line_boundaries(self):
+        data = b'aaa\nbb\ncccc\nd\n'
+
+        assert list(_iter_batches(data, 0, 8)) == [(0, 7), (7, 14)]
+
+    def test_oversized_line(self):
+        data = b'a\n' + b'b' * 20 + b'\nc\n'
+
+        assert list(_iter_batches(data, 0, 8)) == [(0, 2), (2, 23), (23, 25)]
+
+    def test_incomplete_last_line_left(self):
+        data = b'aaa\nbbb'
+
+        assert list(_iter_batches(data, 0, 8)) == [(0, 4)]
+        assert list(_iter_batches(data, 4, 8)) == []
+
+
+class TestClefShipper(object):
+    def test_file_shipped(self, seq_server, clef_file):
+        result = ship(seq_server, [clef_file], batch_bytes=1024)
+
+        assert not result.failed
+        assert result.bytes_sent == clef_file.stat().st_size
+        assert sorted(event['Index'] for event in seq_server.events) == list(range(100))
+        assert result.batches_sent == len(seq_server.requests) > 1
+        assert all(request['body_size'] <= 1024 for request in seq_server.requests)
+
+    def test_compressed(self, seq_server, clef_file):
+        result = ship(seq_server, [clef_file], compression='gzip', batch_bytes=1024)
+
+        assert not result.failed
+        assert len(seq_server.events) == 100
+        assert all(request['headers']['Content-Encoding'] == 'gzip' for request in seq_server.requests)
+
+    def test_resumes_from_checkpoint(self, seq_server, clef_file, tmp_path):
+        checkpoint_file = tmp_path / 'checkpoint.json'
+        first_line_length = clef_file.read_bytes().index(b'\n') + 1
+        checkpoint_file.write_text(json.dumps({str(clef_file): first_line_length}))
+
+        ship(seq_server, [clef_file], checkpoint_file=str(checkpoint_file))
+
+        assert sorted(event['Index'] for event in seq_server.events) == list(range(1, 100))
+        assert json.loads(checkpoint_file.read_text()) == {str(clef_file): clef_file.stat().st_size}
+
+        ship(seq_server, [clef_file], checkpoint_file=str(checkpoint_file))
+
+        assert len(seq_server.events) == 99
+
+    def test_incomplete_last_line_shipped_once_complete(self, seq_server, clef_file, tmp_path):
+        checkpoint_file = tmp_path / 'checkpoint.json'
+        complete_size = clef_file.stat().st_size
+        with open(str(clef_file), 'ab') as file:
+            file.write(b'{"@t": "2020-01-01T00:00:00.000Z", "@mt": "Event {Index}", ')
+
+        result = ship(seq_server, [clef_file], checkpoint_file=str(checkpoint_file))
+
+        assert result.bytes_sent == complete_size
+        assert len(seq_server.events) == 100
+        assert json.loads(checkpoint_file.read_text()) == {str(clef_file): complete_size}
+
+        with open(str(clef_file), 'ab') as file:
+            file.write(b'"Index": 100}\n')
+
+        ship(seq_server, [clef_file], checkpoint_file=str(checkpoint_file))
+
+        assert sorted(event['Index'] for event in seq_server.events) == list(range(101))
+
+    def test_retried(self, seq_server, clef_file):
+        seq_server.fail_next(503, count=2)
+
+        result = ship(seq_server, [clef_file], retry_delay=0.01)
+
+        assert not result.failed
+        assert result.retries == 2
+        assert len(seq_server.events) == 100
+
+    def test_rejected_batch_stops_shipping(self, seq_server, clef_file, tmp_path):
+        checkpoint_file = tmp_path / 'checkpoint.json'
+        second_file = create_clef_file(tmp_path / 'second.clef', 10)
+        seq_server.fail_next(400)
+
+        result = ship(seq_server, [clef_file, second_file], batch_bytes=1024, concurrency=1, checkpoint_file=str(checkpoint_file))
+
+        assert result.failed
+        assert result.retries == 0
+        assert seq_server.events == []
+        assert json.loads(checkpoint_file.read_text()) == {str(clef_file): 0}
+
+
+class TestMain(object):
+    def test_exit_code(self, seq_server, clef_file, capsys):
+        assert main([str(clef_file), '--server-url', seq_server.url, '--api-key', 'test-api-key', '--concurrency', '2']) == 0
+        assert len(seq_server.events) == 100
+
+        assert main([str(clef_file), '--server-url', seq_server.url, '--api-key', 'wrong-api-key']) == 1
+        assert 'Failed to ship' in capsys.readouterr().err
+
+
+def ship(seq_server, filenames, **shipper_options):
+    shipper = ClefShipper(seq_server.url, api_key='test-api-key', **shipper_options)
+    try:
+        return shipper.ship(filenames)
+    finally:
+        shipper.transport.close()
+
+
+def create_clef_file(path, event_count):
+    with open(str(path), 'wb') as clef_file:
+        for index in range(event_count):
+            event = {'@t': '2020-01-01T00:00:00.000Z', '@mt': 'Event {Index}', 'Index': index}
+            clef_file.write(json.dumps(event).encode('utf-8') + b'\n')
+
+    return path
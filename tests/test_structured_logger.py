@@ -12,7 +12,7 @@ import logging
 
 import tests.assertions as expect
 
-from seqlog import clear_global_log_properties
+from seqlog import clear_global_log_properties, set_global_log_properties
 from seqlog.structured_logging import StructuredLogger
 from tests.stubs import StubStructuredLogHandler
 
@@ -129,6 +129,43 @@ class TestStructuredLogger(object):
                               Argument5={"Key1": 1, "Array": [{"InArrayNum1": 111, "InArrayStr1": "str1"}]},
                               LoggerName="test")
 
+    def test_static_log_context(self):
+        logger, handler = create_logger()
+        set_global_log_properties(Environment="Test")
+
+        logger.info("Hello from {Environment} ({LoggerName})")
+
+        record = handler.pop_record()
+        assert record.log_context.properties == {"Environment": "Test", "LoggerName": "test"}
+        assert record.log_props["Environment"] == "Test"
+        assert record.log_props["LoggerName"] == "test"
+        expect.log_message(record, "Hello from Test (test)")
+
+    def test_static_log_context_invalidated(self):
+        logger, handler = create_logger()
+
+        set_global_log_properties(Environment="Test")
+        logger.info("Hello")
+        first_context = handler.pop_record().log_context
+
+        logger.info("Hello")
+        assert handler.pop_record().log_context is first_context
+
+        set_global_log_properties(Environment="Production")
+        logger.info("Hello")
+        assert handler.pop_record().log_context.properties["Environment"] == "Production"
+
+    def test_dynamic_global_properties(self):
+        logger, handler = create_logger()
+        set_global_log_properties(RequestId=lambda: "abc123", Missing=lambda: None)
+
+        logger.info("Hello")
+
+        record = handler.pop_record()
+        assert record.log_props["RequestId"] == "abc123"
+        assert "Missing" not in record.log_props
+        assert "RequestId" not in record.log_context.properties
+
 
 def create_logger(level=logging.INFO):
     """
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_transport
+----------------------------------
+
+Tests for `seqlog.transport` (transports used by `SeqLogHandler` to submit log entries), using the fake Seq server in `tests.seq_server`.
+"""
+
+import pytest
+
+from seqlog import SeqLogHandler
+from seqlog.transport import H2cTransport, Http2Transport, RequestsTransport, SeqTransport, create_transport
+from tests.seq_server import FakeSeqServer
+from tests.stubs import create_handler, create_test_log_record
+
+
+@pytest.fixture(params=['requests', 'http2'])
+def transport_name(request):
+    if request.param == 'http2':
+        pytest.importorskip('httpx')
+        pytest.importorskip('h2')
+
+    return request.param
+
+
+class TestTransports(object):
+    def test_events_accepted(self, seq_server, use_clef, transport_name):
+        handler = SeqLogHandler(seq_server.url, 'test-api-key', transport=transport_name)
+        try:
+            assert handler.transport.name == transport_name
+
+            handler.publish_log_batch([create_test_log_record(name='world'), create_test_log_record(name='moon')])
+            handler.publish_log_batch([create_test_log_record(name='sun')])
+
+            assert len(seq_server.events) == 3
+            assert handler.metrics.snapshot()['events_sent'] == 3
+        finally:
+            handler.close()
+
+    def test_connection_reused(self, seq_server, transport_name):
+        handler = SeqLogHandler(seq_server.url, 'test-api-key', transport=transport_name)
+        try:
+            for _ in range(3):
+                handler.publish_log_batch([create_test_log_record(name='world')])
+
+            assert len({request['client_address'] for request in seq_server.requests}) == 1
+        finally:
+            handler.close()
+
+    def test_compressed_and_streamed(self, seq_server, use_clef, transport_name):
+        handler = SeqLogHandler(
+            seq_server.url, 'test-api-key', transport=transport_name, compression='gzip', stream_request_body=True
+        )
+        try:
+            handler.publish_log_batch([create_test_log_record(name='x' * 1024, index=index) for index in range(200)])
+
+            assert len(seq_server.events) == 200
+            assert seq_server.requests[0]['headers']['Content-Encoding'] == 'gzip'
+        finally:
+            handler.close()
+
+    def test_body_length_sent(self, seq_server, transport_name):
+        handler = SeqLogHandler(seq_server.url, 'test-api-key', transport=transport_name)
+        try:
+            handler.publish_log_batch([create_test_log_record(name='x' * 1024, index=index) for index in range(200)])
+
+            assert len(seq_server.events) == 200
+            assert int(seq_server.requests[0]['headers']['Content-Length']) == seq_server.requests[0]['body_size']
+            assert 'Transfer-Encoding' not in seq_server.requests[0]['headers']
+        finally:
+            handler.close()
+
+    def test_server_error(self, seq_server, transport_name):
+        failures = []
+        handler = create_handler(seq_server.url, 'test-api-key', on_error=failures.append, transport=transport_name)
+        try:
+            seq_server.fail_next(503)
+            handler.publish_log_batch([create_test_log_record(name='world')])
+
+            assert len(failures) == 1
+            assert handler.metrics.snapshot()['events_failed'] == 1
+        finally:
+            handler.close()
+
+    def test_connection_refused(self, transport_name):
+        with FakeSeqServer() as stopped_server:
+            server_url = stopped_server.url
+
+        failures = []
+        handler = create_handler(server_url, on_error=failures.append, transport=transport_name)
+        try:
+            handler.publish_log_batch([create_test_log_record(name='world')])
+
+            assert len(failures) == 1
+        finally:
+            handler.close()
+
+
+class TestTransportSelection(object):
+    def test_default(self):
+        handler = SeqLogHandler('http://localhost:5341')
+        try:
+            assert isinstance(handler.transport, RequestsTransport)
+            assert handler.session is handler.transport.session
+        finally:
+            handler.close()
+
+    def test_unsupported(self):
+        with pytest.raises(ValueError):
+            create_transport('carrier-pigeon')
+
+    def test_shared_transport(self, seq_server):
+        transport = RecordingTransport()
+        first_handler = SeqLogHandler(seq_server.url, 'first-api-key', transport=transport)
+        second_handler = SeqLogHandler(seq_server.url, 'second-api-key', transport=transport)
+
+        first_handler.publish_log_batch([create_test_log_record(name='world')])
+        second_handler.publish_log_batch([create_test_log_record(name='moon')])
+
+        first_handler.close()
+        second_handler.close()
+
+        assert [headers['X-Seq-ApiKey'] for headers in transport.headers] == ['first-api-key', 'second-api-key']
+        assert not transport.closed  # Handlers do not close transports that they did not create.
+
+    def test_http2_by_name(self):
+        pytest.importorskip('httpx')
+        pytest.importorskip('h2')
+
+        transport = create_transport('http2')
+
+        assert isinstance(transport, Http2Transport)
+        assert not transport.http2_prior_knowledge
+
+    def test_h2c_by_name(self):
+        pytest.importorskip('httpx')
+        pytest.importorskip('h2')
+
+        transport = create_transport('h2c')
+
+        assert isinstance(transport, H2cTransport)
+        assert transport.http2_prior_knowledge
+
+
+class RecordingTransport(SeqTransport):
+    errors = (IOError,)
+
+    def __init__(self):
+        self.headers = []
+        self.closed = False
+
+    def post(self, url, body, headers):
+        self.headers.append(headers)
+
+    def close(self):
+        self.closed = True
+